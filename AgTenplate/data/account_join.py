@@ -0,0 +1,132 @@
+"""
+Streaming Join Between Parent Accounts and Their Child Records
+Gives every Account row a stable ID and generates child records (contacts)
+against it, so each child carries its account's real ID, address and location.
+
+Child records draw their parent positions in ascending order, which turns the
+join into a single merge pass over the parent CSV: only the current parent row
+is held in memory, so Account files far larger than memory can be joined.
+Children come out grouped by parent, in parent file order.
+"""
+
+import csv
+import os
+import random
+from collections import deque
+from itertools import islice
+
+from dataset_cache import file_digest
+
+# Column every parent row carries its (stable) Salesforce Account ID in
+ACCOUNT_ID = "Account ID"
+
+
+def mock_account_id(position, prefix="001"):
+    """Stable 18-character mock Account ID for the parent row at position
+
+    The same row of the same file always gets the same ID, so separately
+    generated child files agree on it.
+    """
+    return f"{prefix}{position + 1:012d}AAA"
+
+
+def count_rows(filename):
+    """Number of data rows in a CSV file, counted in one streaming pass"""
+    with open(filename, 'r', newline='', encoding='utf-8') as file:
+        last = deque(enumerate(csv.reader(file)), maxlen=1)  # Index of the last row, header is 0
+        return last[0][0] if last else 0
+
+
+class AccountSource:
+    """Parent Account rows read from a CSV file, or a fallback list if it is missing
+
+    Rows get their ACCOUNT_ID from an "Id" column when the file has one (an org
+    export) and from mock_account_id(position) otherwise. The source is only a
+    filename and a row count, so it is cheap to pass to worker processes.
+    """
+
+    def __init__(self, filename, fallback=()):
+        self.filename = filename
+        self.fallback = list(fallback)
+        self._count = None
+
+    @property
+    def exists(self):
+        """Whether the parent CSV file is there (otherwise the fallback rows are used)"""
+        return os.path.exists(self.filename)
+
+    def __len__(self):
+        """Number of parent rows (the file is counted once, on first use)"""
+        if self._count is None:
+            self._count = count_rows(self.filename) if self.exists else len(self.fallback)
+        return self._count
+
+    @property
+    def cache_key(self):
+        """What the parent rows depend on, for dataset_cache: the file's content or the fallback rows"""
+        if self.exists:
+            return [self.filename, file_digest(self.filename)]
+        return [self.filename, self.fallback]
+
+    def rows_at(self, positions):
+        """Yield the parent row at each of the ascending positions, repeating shared parents
+
+        Rows between the wanted positions are skipped without building dicts.
+        """
+        if not self.exists:
+            for position in positions:
+                yield self.fallback[position]
+            return
+        with open(self.filename, 'r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            position, row = -1, None
+            for wanted in positions:
+                if wanted != position:
+                    values = next(islice(reader, wanted - position - 1, None))
+                    row = dict(zip(header, values))
+                    row[ACCOUNT_ID] = row.get("Id") or mock_account_id(wanted)
+                    position = wanted
+                yield row
+
+    def shard_range(self, start_index, count, total):
+        """Parent positions [low, high) owned by children start_index..start_index+count of total
+
+        Children are spread over parents in proportion, so shards merged in
+        order stay grouped by parent.
+        """
+        parents = len(self)
+        if not total or not parents:
+            return 0, parents
+        low = min(start_index * parents // total, parents - 1)
+        high = max((start_index + count) * parents // total, low + 1)
+        return low, min(high, parents)
+
+
+def sorted_positions(count, low, high, rng=random):
+    """Yield count uniform random integers in [low, high) in ascending order
+
+    Draws the order statistics one at a time instead of sorting, so memory
+    stays constant however many children are generated.
+    """
+    span = high - low
+    current = 0.0
+    for remaining in range(count, 0, -1):
+        current += (1.0 - current) * (1.0 - rng.random() ** (1.0 / remaining))
+        yield low + min(int(current * span), span - 1)
+
+
+def iter_children(entity, source, count, rng=random, as_of=None, start_index=0, total_records=None,
+                  **params):
+    """Yield count child rows of entity joined to parents from source
+
+    entity reads its parent's columns with fieldgen.Parent(). With start_index
+    and total_records set (a shard of a larger run), children only join to the
+    parents in the shard's share of the file.
+    """
+    if not count or not len(source):
+        return iter(())
+    low, high = source.shard_range(start_index, count, total_records)
+    positions = sorted_positions(count, low, high, random.Random(rng.getrandbits(64)))
+    return entity.iter_rows(None, rng=rng, start_index=start_index, as_of=as_of,
+                            parents=source.rows_at(positions), **params)
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Offline Account Radar: Nearby-Account Queries Against Generated Account CSVs
+Mirrors AccountRadarController.getNearbyAccounts / getNearbyAccountsByLocation
+so the radar can be profiled and tuned at realistic data volumes without an org.
+
+The controller queries a lat/lng bounding box with LIMIT 200 (no ORDER BY),
+keeps the candidates within the radius by haversine distance, sorts them and
+returns the closest 50. Here the accounts are held in a uniform lat/lng grid,
+so a query only visits the cells overlapping the bounding box, and every query
+reports which of the truly closest accounts the 200-row candidate cap would
+have silently dropped.
+
+Usage:
+    python3 data/account_radar.py data/agriculture_farms.csv data/agriculture_distributors.csv
+    python3 data/account_radar.py --generate 1000000 --sizes 1000,10000,100000,1000000
+"""
+
+import argparse
+import csv
+import heapq
+import math
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from account_join import mock_account_id
+from fieldgen import EARTH_RADIUS_KM
+
+# Limits hard-coded in AccountRadarController
+CANDIDATE_LIMIT = 200  # SOQL LIMIT on the bounding-box query
+RESULT_LIMIT = 50  # Closest accounts returned to the component
+MAX_RADIUS_KM = 500
+KM_PER_DEGREE = 111.0  # Approximation the controller uses for the bounding box
+
+DEFAULT_CELL_DEGREES = 0.5
+
+
+def radar_distance_km(lat1, lng1, lat2, lng2):
+    """Haversine distance in kilometers, in the atan2 form calculateDistance uses"""
+    d_lat = math.radians(lat2 - lat1)
+    d_lng = math.radians(lng2 - lng1)
+    a = (math.sin(d_lat / 2) * math.sin(d_lat / 2) +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(d_lng / 2) * math.sin(d_lng / 2))
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) the controller's SOQL query filters on"""
+    lat_delta = radius_km / KM_PER_DEGREE
+    lng_delta = radius_km / (KM_PER_DEGREE * math.cos(math.radians(latitude)))
+    return latitude - lat_delta, latitude + lat_delta, longitude - lng_delta, longitude + lng_delta
+
+
+def validate_radius(radius_km):
+    """Reject radii getNearbyAccounts would reject"""
+    if radius_km is None or radius_km <= 0 or radius_km > MAX_RADIUS_KM:
+        raise ValueError(f"Radius must be between 1 and {MAX_RADIUS_KM} kilometers")
+
+
+class RadarResult:
+    """Outcome of one nearby-accounts query
+
+    accounts holds (distance, position) pairs of the exact closest accounts,
+    candidates the number of accounts inside the bounding box, and dropped the
+    (distance, position) pairs of exact results the org would not return
+    because they fell outside the first CANDIDATE_LIMIT box rows.
+    """
+
+    def __init__(self, accounts, candidates, dropped):
+        self.accounts = accounts
+        self.candidates = candidates
+        self.dropped = dropped
+
+    @property
+    def capped(self):
+        """Whether the bounding box held more rows than the SOQL LIMIT"""
+        return self.candidates > CANDIDATE_LIMIT
+
+
+class AccountIndex:
+    """Accounts with coordinates, bucketed into a uniform lat/lng grid
+
+    Accounts are kept as parallel lists in load order; the grid maps each
+    (lat cell, lng cell) to the positions of the accounts in it. Load order
+    stands in for the org's unordered SOQL row order when simulating LIMIT 200.
+    """
+
+    def __init__(self, cell_degrees=DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.ids = []
+        self.names = []
+        self.types = []
+        self.lats = []
+        self.lngs = []
+        self._cells = defaultdict(list)
+        self._rows_loaded = 0  # CSV rows read by load_csv so far, which number the mock IDs
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def add(self, account_id, name, account_type, lat, lng):
+        """Add one account and return its position"""
+        position = len(self.ids)
+        self.ids.append(account_id)
+        self.names.append(name)
+        self.types.append(account_type)
+        self.lats.append(lat)
+        self.lngs.append(lng)
+        self._cells[self._cell(lat, lng)].append(position)
+        return position
+
+    def load_csv(self, filename, limit=None):
+        """Stream an Account CSV into the index, skipping rows without coordinates
+
+        IDs come from the "Id" column of an org export, or else are stable mock
+        IDs numbered on across every file loaded, so accounts of different files
+        never share one (the first file's are the IDs the contact generators
+        join to). Returns the number of accounts added.
+        """
+        added = 0
+        with open(filename, 'r', newline='', encoding='utf-8') as file:
+            for position, row in enumerate(csv.DictReader(file), self._rows_loaded):
+                if limit is not None and added >= limit:
+                    break
+                self._rows_loaded = position + 1
+                lat, lng = row.get("Billing Latitude"), row.get("Billing Longitude")
+                if not lat or not lng:
+                    continue
+                self.add(row.get("Id") or mock_account_id(position), row["Account Name"],
+                         row.get("Record Type") or row.get("Agriculture Type"), float(lat), float(lng))
+                added += 1
+        return added
+
+    def in_box(self, min_lat, max_lat, min_lng, max_lng):
+        """Positions of the accounts inside a bounding box, in load order"""
+        lat_low, lng_low = self._cell(min_lat, min_lng)
+        lat_high, lng_high = self._cell(max_lat, max_lng)
+        lats, lngs = self.lats, self.lngs
+        found = []
+        for lat_cell in range(lat_low, lat_high + 1):
+            for lng_cell in range(lng_low, lng_high + 1):
+                for position in self._cells.get((lat_cell, lng_cell), ()):
+                    if min_lat <= lats[position] <= max_lat and min_lng <= lngs[position] <= max_lng:
+                        found.append(position)
+        found.sort()
+        return found
+
+    def scan_box(self, min_lat, max_lat, min_lng, max_lng):
+        """in_box() by a full scan, the baseline an unindexed query pays"""
+        return [
+            position for position, (lat, lng) in enumerate(zip(self.lats, self.lngs))
+            if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+        ]
+
+    def nearby(self, latitude, longitude, radius_km, exclude=None, limit=RESULT_LIMIT, scan=False):
+        """Closest accounts within radius_km, like getNearbyAccounts
+
+        exclude is the position of the current account (getNearbyAccounts skips
+        it; getNearbyAccountsByLocation passes None).
+        """
+        validate_radius(radius_km)
+        box = bounding_box(latitude, longitude, radius_km)
+        candidates = (self.scan_box if scan else self.in_box)(*box)
+        if exclude is not None:
+            candidates = [position for position in candidates if position != exclude]
+
+        lats, lngs = self.lats, self.lngs
+        within = []
+        for rank, position in enumerate(candidates):
+            distance = radar_distance_km(latitude, longitude, lats[position], lngs[position])
+            if distance <= radius_km:
+                within.append((distance, position, rank))
+
+        exact = heapq.nsmallest(limit, within)
+        dropped = []
+        if len(candidates) > CANDIDATE_LIMIT:
+            # The org only sees the first CANDIDATE_LIMIT box rows
+            org = {position for _, position, _ in
+                   heapq.nsmallest(limit, (hit for hit in within if hit[2] < CANDIDATE_LIMIT))}
+            dropped = [(distance, position) for distance, position, _ in exact if position not in org]
+        return RadarResult([(distance, position) for distance, position, _ in exact], len(candidates), dropped)
+
+
+def generate_index(count, seed=None, cell_degrees=DEFAULT_CELL_DEGREES):
+    """An index of count farms drawn in memory by the farm batch engine"""
+    from generate_farm_data import FARM
+
+    index = AccountIndex(cell_degrees)
+    for position, farm in enumerate(FARM.iter_batches(count, seed=seed)):
+        index.add(mock_account_id(position), farm["Account Name"], farm["Agriculture Type"],
+                  farm["Billing Latitude"], farm["Billing Longitude"])
+    return index
+
+
+def subset(index, size):
+    """A fresh index holding the first size accounts of index"""
+    part = AccountIndex(index.cell_degrees)
+    for position in range(min(size, len(index))):
+        part.add(index.ids[position], index.names[position], index.types[position],
+                 index.lats[position], index.lngs[position])
+    return part
+
+
+def benchmark(index, radius_km, queries, rng, scan_limit=200000):
+    """Run queries centered on random accounts and return latency and cap statistics
+
+    The full-scan baseline is skipped for indexes above scan_limit accounts.
+    """
+    centers = [rng.randrange(len(index)) for _ in range(queries)]
+    grid_us, scan_us, candidates, capped, dropped = [], [], [], 0, 0
+    for center in centers:
+        lat, lng = index.lats[center], index.lngs[center]
+        start = time.perf_counter()
+        result = index.nearby(lat, lng, radius_km, exclude=center)
+        grid_us.append((time.perf_counter() - start) * 1e6)
+        if len(index) <= scan_limit:
+            start = time.perf_counter()
+            index.nearby(lat, lng, radius_km, exclude=center, scan=True)
+            scan_us.append((time.perf_counter() - start) * 1e6)
+        candidates.append(result.candidates)
+        capped += result.capped
+        dropped += len(result.dropped)
+    return {
+        "accounts": len(index),
+        "grid_p50_us": statistics.median(grid_us),
+        "grid_p95_us": _percentile(grid_us, 95),
+        "scan_p50_us": statistics.median(scan_us) if scan_us else None,
+        "mean_candidates": statistics.mean(candidates),
+        "capped_queries": capped / queries,
+        "dropped_per_query": dropped / queries,
+    }
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    """Load or generate accounts, then report radar query latency versus dataset size"""
+    parser = argparse.ArgumentParser(description="Benchmark AccountRadarController-style nearby-account queries")
+    parser.add_argument("files", nargs="*", default=["data/agriculture_farms.csv"],
+                        help="Account CSVs with Billing Latitude/Longitude columns")
+    parser.add_argument("--generate", type=int, default=None,
+                        help="generate this many farms in memory instead of reading CSVs")
+    parser.add_argument("--sizes", default=None,
+                        help="comma-separated dataset sizes to benchmark (default: all accounts)")
+    parser.add_argument("--radius", type=int, default=50, help="search radius in km (1-500)")
+    parser.add_argument("--queries", type=int, default=200, help="queries per dataset size")
+    parser.add_argument("--cell-degrees", type=float, default=DEFAULT_CELL_DEGREES,
+                        help="grid cell size in degrees")
+    parser.add_argument("--seed", type=int, default=42, help="seed for generated data and query centers")
+    args = parser.parse_args()
+    validate_radius(args.radius)
+
+    print("📡 Account Radar Benchmark")
+    if args.generate:
+        index = generate_index(args.generate, seed=args.seed, cell_degrees=args.cell_degrees)
+        print(f"🌾 Generated {len(index)} farm accounts")
+    else:
+        index = AccountIndex(args.cell_degrees)
+        for filename in args.files:
+            print(f"📁 {filename}: {index.load_csv(filename)} accounts")
+    if not len(index):
+        print("❌ No accounts with coordinates")
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",")] if args.sizes else [len(index)]
+    print(f"🎯 Radius: {args.radius}km, {args.queries} queries per size\n")
+    print(f"{'Accounts':>10} {'Grid p50':>10} {'Grid p95':>10} {'Scan p50':>10} "
+          f"{'In box':>8} {'Capped':>8} {'Dropped':>8}")
+    rng = random.Random(args.seed)
+    for size in sizes:
+        part = index if size >= len(index) else subset(index, size)
+        stats = benchmark(part, args.radius, args.queries, rng)
+        scan = f"{stats['scan_p50_us']:8.0f}us" if stats["scan_p50_us"] is not None else f"{'-':>10}"
+        print(f"{stats['accounts']:>10} {stats['grid_p50_us']:8.0f}us {stats['grid_p95_us']:8.0f}us {scan} "
+              f"{stats['mean_candidates']:8.1f} {stats['capped_queries']:7.1%} {stats['dropped_per_query']:8.2f}")
+
+    print(f"\nCapped: queries whose bounding box held more than {CANDIDATE_LIMIT} accounts (SOQL LIMIT)")
+    print(f"Dropped: true top-{RESULT_LIMIT} accounts per query the org would not return because of the cap")
+
+
+if __name__ == "__main__":
+    main()
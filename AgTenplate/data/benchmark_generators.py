@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Data Generators
+Runs every generator at several sizes and records rows/sec, peak RSS and bytes
+written, so optimizations can be measured instead of guessed.
+
+Each (generator, size) case runs in a fresh Python process, so its peak RSS
+is its own and not left over from an earlier, larger run; inputs such as the
+contacts' parent file are made beforehand in a process of their own. A case is
+timed in --repeats such processes, each repeating the run until MIN_SECONDS of
+CPU time (so small sizes run many times), and rows/sec is the median over the
+processes of their median run's CPU time, so neither one-off noise nor other
+load on the machine looks like a regression. Results can be saved as a JSON
+baseline and later runs compared against it.
+
+Usage:
+    python3 data/benchmark_generators.py --sizes 1000,100000 --save data/benchmark_baseline.json
+    python3 data/benchmark_generators.py --sizes 1000,100000 --compare data/benchmark_baseline.json
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from sharding import SEEDED_AS_OF
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+DEFAULT_REPEATS = 3  # Processes each case is timed in
+MIN_SECONDS = 1.0  # A process repeats its timed run until their CPU time adds up to this
+SEED = 42
+TOLERANCE = 0.10  # Relative slowdown or memory growth reported as a regression
+PARENTS_FILE = "parents.csv"  # Account file the contact benchmarks join to (input, not output)
+
+
+# Each benchmark prepares a run untimed (imports, loading inputs) and returns a
+# callable that generates size rows from row start_index into out and returns
+# the number of rows generated. Repeated runs start at fresh row indices, so
+# they don't just reuse what an earlier run cached (unique names).
+
+def _farms(size, out, batch=False):
+    from generate_farm_data import generate_shard
+
+    return lambda start_index: generate_shard(size, SEED, start_index, [os.path.join(out, "farms.csv")],
+                                              batch=batch, as_of=SEEDED_AS_OF).count
+
+
+def _distributors(size, out):
+    from generate_distributor_data import generate_shard
+
+    return lambda start_index: generate_shard(size, SEED, start_index, [os.path.join(out, "distributors.csv")],
+                                              as_of=SEEDED_AS_OF).count
+
+
+def _contacts(module, size, out):
+    """Contacts joined to the parent file made by _parents"""
+    from account_join import AccountSource
+
+    accounts = AccountSource(os.path.join(out, PARENTS_FILE))
+    len(accounts)  # Count the parent file before the clock starts
+    return lambda start_index: module.generate_shard(size, SEED, start_index, [os.path.join(out, "contacts.csv")],
+                                                     accounts=accounts, as_of=SEEDED_AS_OF).count
+
+
+def _farmer_contacts(size, out):
+    import generate_farmer_contacts
+
+    return _contacts(generate_farmer_contacts, size, out)
+
+
+def _distributor_contacts(size, out):
+    import generate_distributor_contacts
+
+    return _contacts(generate_distributor_contacts, size, out)
+
+
+def _parents(module_name):
+    """Setup writing a contact benchmark's parent file, one account per five contacts"""
+    def setup(size, out):
+        module = importlib.import_module(module_name)
+        module.generate_shard(max(1, size // 5), SEED + 1, 0, [os.path.join(out, PARENTS_FILE)], as_of=SEEDED_AS_OF)
+    return setup
+
+
+def _nearby_farms(size, out, batch=False):
+    from generate_nearby_farms import generate_shard
+
+    files = [os.path.join(out, "nearby_farms.csv"), os.path.join(out, "nearby_farmer_contacts.csv")]
+    return lambda start_index: generate_shard(size, SEED, start_index, files, batch=batch, as_of=SEEDED_AS_OF).count
+
+
+def _us_crops(size, out):
+    from generate_us_crops import generate_us_crops, write_crop_csv
+
+    def run(start_index):
+        crops = generate_us_crops()
+        write_crop_csv(crops, os.path.join(out, "us_crops.csv"))
+        return len(crops)
+    return run
+
+
+# name -> (prepare(size, out_dir) returning the timed run, whether the size is fixed,
+#          setup(size, out_dir) writing its inputs in a separate process, or None)
+GENERATORS = {
+    "farms": (_farms, False, None),
+    "farms-batch": (lambda size, out: _farms(size, out, batch=True), False, None),
+    "distributors": (_distributors, False, None),
+    "farmer-contacts": (_farmer_contacts, False, _parents("generate_farm_data")),
+    "distributor-contacts": (_distributor_contacts, False, _parents("generate_distributor_data")),
+    "nearby-farms": (_nearby_farms, False, None),
+    "nearby-farms-batch": (lambda size, out: _nearby_farms(size, out, batch=True), False, None),
+    "us-crops": (_us_crops, True, None),  # A fixed catalogue, run once whatever the size
+}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # Bytes on macOS, KB on Linux
+
+
+def run_case(name, size, out):
+    """Run one generator at one size in this process, writing into out, and return its measurements
+
+    The timed run is repeated until the runs add up to MIN_SECONDS of CPU
+    time; the medians of their wall and CPU times are reported, and rows/sec
+    is from the CPU time.
+    """
+    prepare = GENERATORS[name][0]
+    wall, cpu = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        run = prepare(size, out)
+        while sum(cpu) < MIN_SECONDS:
+            start, start_cpu = time.perf_counter(), time.process_time()
+            rows = run(len(cpu) * size)
+            cpu.append(time.process_time() - start_cpu)
+            wall.append(time.perf_counter() - start)
+    # Parent files of the contact benchmarks are inputs, not output
+    written = sum(os.path.getsize(os.path.join(out, f)) for f in os.listdir(out) if f != PARENTS_FILE)
+    cpu_seconds = statistics.median(cpu)
+    return {
+        "generator": name,
+        "size": size,
+        "rows": rows,
+        "runs": len(cpu),
+        "seconds": round(statistics.median(wall), 4),
+        "cpu_seconds": round(cpu_seconds, 4),
+        "rows_per_sec": round(rows / cpu_seconds, 1) if cpu_seconds else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "bytes_written": written,
+    }
+
+
+def measure(name, size, repeats=DEFAULT_REPEATS):
+    """Run one case in repeats fresh interpreters, after its setup in another, and combine them
+
+    Each process's peak RSS is its own; times and rows/sec are the medians
+    over the processes, peak RSS the largest.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    command = [sys.executable, os.path.abspath(__file__), "--size", str(size)]
+    cases = []
+    with tempfile.TemporaryDirectory(prefix="agbench-") as out:
+        if GENERATORS[name][2] is not None:
+            subprocess.run(command + ["--setup", name, "--out", out], cwd=here, check=True, capture_output=True)
+        for _ in range(max(1, repeats)):
+            output = subprocess.run(command + ["--case", name, "--out", out],
+                                    cwd=here, check=True, capture_output=True, text=True).stdout
+            cases.append(json.loads(output.splitlines()[-1]))
+    entry = dict(cases[0])
+    entry.update({key: statistics.median(case[key] for case in cases)
+                  for key in ("seconds", "cpu_seconds", "rows_per_sec")})
+    entry.update(runs=sum(case["runs"] for case in cases), processes=len(cases),
+                 peak_rss_mb=max(case["peak_rss_mb"] for case in cases))
+    return entry
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Regressions of results against a baseline, as human-readable lines
+
+    A case regresses when its rows/sec drops, or its peak RSS grows, by more
+    than tolerance relative to the baseline case of the same generator and size.
+    """
+    previous = {(entry["generator"], entry["size"]): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry["generator"], entry["size"]))
+        if old is None:
+            continue
+        label = f"{entry['generator']} @ {entry['size']}"
+        if old["rows_per_sec"] and entry["rows_per_sec"] < old["rows_per_sec"] * (1 - tolerance):
+            regressions.append(f"{label}: {entry['rows_per_sec']:,.0f} rows/s vs {old['rows_per_sec']:,.0f} "
+                               f"({entry['rows_per_sec'] / old['rows_per_sec'] - 1:+.0%})")
+        if old["peak_rss_mb"] and entry["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{label}: {entry['peak_rss_mb']:.1f} MB peak RSS vs {old['peak_rss_mb']:.1f} MB "
+                               f"({entry['peak_rss_mb'] / old['peak_rss_mb'] - 1:+.0%})")
+    return regressions
+
+
+def main():
+    """Benchmark the selected generators, then save and/or compare a JSON baseline"""
+    parser = argparse.ArgumentParser(description="Benchmark the agriculture data generators")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated record counts to run each generator at")
+    parser.add_argument("--generators", default=",".join(GENERATORS),
+                        help=f"comma-separated generators to run (default: all of {', '.join(GENERATORS)})")
+    parser.add_argument("--save", default=None, help="write the results to this JSON baseline file")
+    parser.add_argument("--compare", default=None, help="report regressions against this JSON baseline file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="relative slowdown or memory growth counted as a regression")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                        help="processes each case is timed in (each repeating its run until "
+                             f"{MIN_SECONDS:g}s of CPU); their median is reported")
+    parser.add_argument("--case", default=None, help=argparse.SUPPRESS)  # Internal: one case, JSON to stdout
+    parser.add_argument("--setup", default=None, help=argparse.SUPPRESS)  # Internal: write a case's inputs
+    parser.add_argument("--size", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.setup:
+        with contextlib.redirect_stdout(io.StringIO()):
+            GENERATORS[args.setup][2](args.size, args.out)
+        return
+    if args.case:
+        print(json.dumps(run_case(args.case, args.size, args.out)))
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    names = args.generators.split(",")
+    unknown = [name for name in names if name not in GENERATORS]
+    if unknown:
+        parser.error(f"unknown generators: {', '.join(unknown)}")
+
+    print("⏱️  Data Generator Benchmark")
+    print(f"{'Generator':<22} {'Size':>9} {'Rows':>9} {'Runs':>5} {'Rows/sec':>11} {'Peak RSS':>10} {'Written':>10}")
+    results = []
+    for name in names:
+        fixed = GENERATORS[name][1]
+        for size in sizes[:1] if fixed else sizes:
+            entry = measure(name, size, args.repeats)
+            results.append(entry)
+            print(f"{name:<22} {size:>9} {entry['rows']:>9} {entry['runs']:>5} {entry['rows_per_sec']:>11,.0f} "
+                  f"{entry['peak_rss_mb']:>7.1f} MB {entry['bytes_written'] / 1e6:>7.1f} MB")
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"\n💾 Baseline saved to: {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"\n📊 Compared with {args.compare} ({baseline.get('created', 'unknown date')}, "
+              f"tolerance {args.tolerance:.0%})")
+        if regressions:
+            for line in regressions:
+                print(f"   ❌ {line}")
+            sys.exit(1)
+        print("   ✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Columnar Binary Storage for Generated Datasets
+Writes generated rows as typed, compressed columns next to their CSV, so the
+downstream joins, stats and import splitting can load just the columns they
+need without parsing every number from text again.
+
+A file (data/agriculture_farms.agcol next to data/agriculture_farms.csv) is a
+sequence of row groups, one per written chunk, followed by a JSON footer that
+lists each group's column buffers. Integer and float columns are stored as raw
+64-bit values, text columns as UTF-8 with either string lengths or, when few
+values repeat many times, a dictionary and small integer codes. Each buffer is
+zlib compressed only if that makes it noticeably smaller. Files are read through
+mmap, so only the pages of the selected columns are ever touched:
+
+    with ColumnarReader("data/agriculture_farms.agcol") as farms:
+        acres = farms.column("Farm Size (Acres)")           # array('q'), no text parsing
+        iowa = farms.read(["Account Name", "Billing State"])  # RecordTable of two columns
+        farms.to_csv("data/agriculture_farms.csv")           # Same bytes as the generated CSV
+
+Values read back as what the CSV holds: ints and floats as numbers, anything
+else (None, bools, mixed columns) as its CSV text.
+
+Usage:
+    python3 data/columnar.py info data/agriculture_farms.agcol
+    python3 data/columnar.py export data/agriculture_farms.agcol farms.csv --columns "Account Name,Phone"
+    python3 data/columnar.py convert data/agriculture_farms.csv data/agriculture_farms.agcol
+"""
+
+import argparse
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate, islice
+
+from csv_stream import DEFAULT_CHUNK_SIZE, CsvRowWriter
+from records import RecordTable, _extend
+
+EXTENSION = ".agcol"
+MAGIC = b"AGCOL1\n"
+VERSION = 1
+_TRAILER = struct.Struct("<Q")  # Footer length, written just before the closing MAGIC
+
+# A compressed buffer is kept only if it is at most this fraction of the raw size
+MIN_COMPRESSION_GAIN = 0.9
+ZLIB_LEVEL = 1  # Fast; the higher levels buy little on generated data
+
+# Text columns with at most this share of distinct values are dictionary encoded
+DICTIONARY_RATIO = 0.5
+
+
+def columnar_filename(filename):
+    """The columnar file written next to a CSV, e.g. data/farms.csv -> data/farms.agcol"""
+    return os.path.splitext(filename)[0] + EXTENSION
+
+
+def _text(value):
+    """A value as its CSV field text before quoting (None is empty)"""
+    if value is None:
+        return ''
+    return value if type(value) is str else str(value)
+
+
+def _code_type(size):
+    """Smallest unsigned array typecode holding codes below size"""
+    for typecode in "BHI":
+        if size <= 1 << (8 * array(typecode).itemsize):
+            return typecode
+    return "Q"
+
+
+def encode_column(values):
+    """(type, [raw buffers]) for one column of a chunk
+
+    Types are int64, float64, str (string lengths + UTF-8 text) and dict
+    (codes + dictionary string lengths + dictionary text).
+    """
+    kinds = set(map(type, values))
+    try:
+        if kinds == {int}:
+            return "int64", [array("q", values).tobytes()]
+        if kinds == {float}:
+            return "float64", [array("d", values).tobytes()]
+    except OverflowError:
+        pass  # Ints too large for 64 bits are kept as text
+    if kinds != {str}:
+        values = list(map(_text, values))
+    distinct = dict.fromkeys(values)
+    if len(distinct) <= len(values) * DICTIONARY_RATIO:
+        codes = {value: code for code, value in enumerate(distinct)}
+        typecode = _code_type(len(codes))
+        return "dict:" + typecode, [array(typecode, map(codes.__getitem__, values)).tobytes(),
+                                    array("q", map(len, distinct)).tobytes(),
+                                    "".join(distinct).encode("utf-8")]
+    return "str", [array("q", map(len, values)).tobytes(), "".join(values).encode("utf-8")]
+
+
+def _split(text, lengths):
+    """Cut text into consecutive strings of the given lengths"""
+    bounds = list(accumulate(lengths, initial=0))
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def _numbers(typecode, data, swap):
+    """A typed array from raw buffer bytes written with the given byte order"""
+    values = array(typecode)
+    values.frombytes(data)
+    if swap:
+        values.byteswap()
+    return values
+
+
+def decode_column(kind, buffers, swap=False, shared=None):
+    """The values of one column of a row group, from its raw buffers
+
+    Dictionary values are taken from shared (string -> the one copy kept), if
+    given, so equal strings of different row groups are one object.
+    """
+    if kind == "int64":
+        return _numbers("q", buffers[0], swap)
+    if kind == "float64":
+        return _numbers("d", buffers[0], swap)
+    if kind == "str":
+        return _split(buffers[1].decode("utf-8"), _numbers("q", buffers[0], swap))
+    if kind.startswith("dict:"):
+        dictionary = _split(buffers[2].decode("utf-8"), _numbers("q", buffers[1], swap))
+        if shared is not None:
+            dictionary = [shared.setdefault(value, value) for value in dictionary]
+        return [dictionary[code] for code in _numbers(kind[5:], buffers[0], swap)]
+    raise ValueError(f"unknown column type {kind!r}")
+
+
+class ColumnarWriter:
+    """Write chunks of columns to a columnar file, one row group per chunk
+
+    Like ChunkedCsvWriter, the file is only created with the first chunk, so an
+    empty stream leaves no file behind.
+    """
+
+    def __init__(self, filename, fieldnames, compress=True):
+        self.filename = filename
+        self.fieldnames = list(fieldnames)
+        self.compress = compress
+        self.rows_written = 0
+        self._groups = []
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write_buffer(self, data):
+        """Write one buffer, compressed if worth it, and return its [offset, length, codec]"""
+        codec = "none"
+        if self.compress and data:
+            packed = zlib.compress(data, ZLIB_LEVEL)
+            if len(packed) <= len(data) * MIN_COMPRESSION_GAIN:
+                data, codec = packed, "zlib"
+        offset = self._file.tell()
+        self._file.write(data)
+        return [offset, len(data), codec]
+
+    def write_columns(self, columns):
+        """Write one chunk given as one sequence of values per field"""
+        count = len(columns[0]) if columns else 0
+        if not count:
+            return
+        if self._file is None:
+            self._file = open(self.filename, "wb")
+            self._file.write(MAGIC)
+        group = {"rows": count, "columns": []}
+        for values in columns:
+            kind, buffers = encode_column(values)
+            group["columns"].append({"type": kind, "buffers": [self._write_buffer(data) for data in buffers]})
+        self._groups.append(group)
+        self.rows_written += count
+
+    def write_rows(self, rows):
+        """Write one chunk of dict rows (missing fields are empty)"""
+        rows = list(rows)
+        self.write_columns([[row.get(name, '') for row in rows] for name in self.fieldnames])
+
+    def close(self):
+        """Write the footer and close the file"""
+        if self._file is None:
+            return
+        _write_footer(self._file, self.fieldnames, self._groups)
+        self._file.close()
+        self._file = None
+
+
+def _write_footer(file, fieldnames, groups):
+    """Write the JSON footer, its length and the closing magic"""
+    footer = json.dumps({"version": VERSION, "byteorder": sys.byteorder, "fieldnames": fieldnames,
+                         "rows": sum(group["rows"] for group in groups), "groups": groups},
+                        separators=(",", ":")).encode("utf-8")
+    file.write(footer)
+    file.write(_TRAILER.pack(len(footer)))
+    file.write(MAGIC)
+
+
+def _read_footer(data, filename):
+    """The parsed footer of a columnar file's bytes (or mmap)"""
+    tail = len(MAGIC) + _TRAILER.size
+    if len(data) < len(MAGIC) + tail or data[:len(MAGIC)] != MAGIC or data[-len(MAGIC):] != MAGIC:
+        raise ValueError(f"{filename} is not a columnar data file")
+    (length,) = _TRAILER.unpack(data[-tail:-len(MAGIC)])
+    footer = json.loads(bytes(data[-tail - length:-tail]))
+    if footer["version"] != VERSION:
+        raise ValueError(f"{filename} has unsupported columnar version {footer['version']}")
+    return footer, len(data) - tail - length
+
+
+class ColumnarReader:
+    """Memory-mapped reader of a columnar file that decodes only the columns asked for"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        footer, _ = _read_footer(self._map, filename)
+        self.fieldnames = footer["fieldnames"]
+        self.groups = footer["groups"]
+        self._positions = {name: k for k, name in enumerate(self.fieldnames)}
+        self._swap = footer["byteorder"] != sys.byteorder
+        self._rows = footer["rows"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self._rows
+
+    def close(self):
+        """Release the memory map"""
+        self._map.close()
+
+    def _buffer(self, offset, length, codec):
+        """One stored buffer's raw bytes"""
+        data = self._map[offset:offset + length]
+        return zlib.decompress(data) if codec == "zlib" else data
+
+    def _names(self, columns):
+        """Validated field names to read (all of them by default)"""
+        names = list(self.fieldnames if columns is None else columns)
+        unknown = [name for name in names if name not in self._positions]
+        if unknown:
+            raise KeyError(f"{self.filename} has no column(s) {', '.join(map(repr, unknown))}")
+        return names
+
+    def iter_chunks(self, columns=None):
+        """Yield each row group as a list of column values, in the order of columns"""
+        positions = [self._positions[name] for name in self._names(columns)]
+        shared = [{} for _ in positions]  # Per column: dictionary string -> the one copy kept
+        for group in self.groups:
+            chunk = []
+            for position, strings in zip(positions, shared):
+                column = group["columns"][position]
+                chunk.append(decode_column(column["type"], [self._buffer(*buffer) for buffer in column["buffers"]],
+                                           self._swap, strings))
+            yield chunk
+
+    def read(self, columns=None):
+        """A RecordTable of the given columns (all by default)"""
+        names = self._names(columns)
+        merged = None
+        for chunk in self.iter_chunks(names):
+            merged = chunk if merged is None else [_extend(column, values) for column, values in zip(merged, chunk)]
+        return RecordTable.from_columns(names, merged or [[] for _ in names])
+
+    def column(self, name):
+        """The values of one field: a typed array for numbers, otherwise a list"""
+        return self.read([name]).column(name)
+
+    def iter_rows(self, columns=None):
+        """Yield the rows (of the given columns) as dicts"""
+        names = self._names(columns)
+        for chunk in self.iter_chunks(names):
+            for values in zip(*chunk):
+                yield dict(zip(names, values))
+
+    def to_csv(self, filename, columns=None):
+        """Export to CSV, byte-identical to the generated CSV for the same columns, and return the row count"""
+        names = self._names(columns)
+        with open(filename, "w", newline="", encoding="utf-8") as file:
+            writer = CsvRowWriter(file, names)
+            writer.writeheader()
+            for chunk in self.iter_chunks(names):
+                writer.writecolumns(chunk)
+        return self._rows
+
+
+def merge_files(part_files, filename):
+    """Concatenate columnar part files into filename, removing the parts
+
+    Row groups are copied as stored and only the footer is rewritten, so no
+    column is decoded. Missing parts (empty shards) are skipped.
+    """
+    fieldnames, groups = None, []
+    with open(filename, "wb") as out:
+        out.write(MAGIC)
+        for part in part_files:
+            if not os.path.exists(part):
+                continue
+            with open(part, "rb") as src:
+                data = src.read()
+            footer, body_end = _read_footer(data, part)
+            if footer["byteorder"] != sys.byteorder:
+                raise ValueError(f"{part} was written with a different byte order")
+            if fieldnames is None:
+                fieldnames = footer["fieldnames"]
+            elif footer["fieldnames"] != fieldnames:
+                raise ValueError(f"{part} has different columns than the other parts")
+            shift = out.tell() - len(MAGIC)
+            out.write(data[len(MAGIC):body_end])
+            for group in footer["groups"]:
+                for column in group["columns"]:
+                    for buffer in column["buffers"]:
+                        buffer[0] += shift
+                groups.append(group)
+            os.remove(part)
+        if fieldnames is not None:
+            _write_footer(out, fieldnames, groups)
+    if fieldnames is None:
+        os.remove(filename)
+
+
+def _parse_text(text):
+    """A CSV field as the number it was written from, if writing it back gives the same text"""
+    try:
+        value = int(text)
+        if str(value) == text:
+            return value
+    except ValueError:
+        pass
+    try:
+        value = float(text)
+        if repr(value) == text:
+            return value
+    except ValueError:
+        pass
+    return text
+
+
+def _typed_column(values):
+    """A column of CSV text as numbers, if every value round-trips as one type"""
+    parsed = list(map(_parse_text, values))
+    kinds = set(map(type, parsed))
+    return parsed if kinds in ({int}, {float}) else values
+
+
+def convert_csv(csv_file, filename, chunk_size=DEFAULT_CHUNK_SIZE, compress=True):
+    """Write a columnar copy of an existing CSV file and return the row count
+
+    Columns whose text round-trips exactly as ints (or floats) within a chunk
+    are stored as numbers, so exporting the copy gives the CSV back unchanged.
+    """
+    with open(csv_file, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        fieldnames = next(reader, None)
+        if fieldnames is None:
+            return 0
+        with ColumnarWriter(filename, fieldnames, compress=compress) as writer:
+            while True:
+                chunk = list(islice(reader, chunk_size))
+                if not chunk:
+                    break
+                columns = [list(column) for column in zip(*chunk)]
+                writer.write_columns([_typed_column(column) for column in columns])
+    return writer.rows_written
+
+
+def describe(filename):
+    """Print the columns, types and stored sizes of a columnar file"""
+    with ColumnarReader(filename) as reader:
+        print(f"📦 {filename}: {len(reader):,} rows, {len(reader.fieldnames)} columns, "
+              f"{len(reader.groups)} row groups, {os.path.getsize(filename) / 1e6:.1f} MB")
+        print(f"{'Column':<32} {'Types':<16} {'Stored':>10} {'Compressed':>11}")
+        for position, name in enumerate(reader.fieldnames):
+            columns = [group["columns"][position] for group in reader.groups]
+            kinds = sorted({column["type"] for column in columns})
+            buffers = [buffer for column in columns for buffer in column["buffers"]]
+            stored = sum(buffer[1] for buffer in buffers)
+            compressed = sum(buffer[2] == "zlib" for buffer in buffers) / len(buffers) if buffers else 0
+            print(f"{name[:32]:<32} {','.join(kinds)[:16]:<16} {stored / 1e3:>7.1f} kB {compressed:>11.0%}")
+
+
+def main():
+    """Inspect, export or create columnar files from the command line"""
+    parser = argparse.ArgumentParser(description="Columnar data files for the generated datasets")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="show the columns and sizes of a columnar file")
+    info.add_argument("file")
+    export = commands.add_parser("export", help="export a columnar file to CSV (e.g. for Data Loader)")
+    export.add_argument("file")
+    export.add_argument("csv")
+    export.add_argument("--columns", default=None, help="comma-separated columns to export (default: all)")
+    convert = commands.add_parser("convert", help="write a columnar copy of an existing CSV")
+    convert.add_argument("csv")
+    convert.add_argument("file", nargs="?", default=None, help="output file (default: next to the CSV)")
+    convert.add_argument("--no-compress", action="store_true", help="store every column uncompressed")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        describe(args.file)
+    elif args.command == "export":
+        columns = args.columns.split(",") if args.columns else None
+        with ColumnarReader(args.file) as reader:
+            count = reader.to_csv(args.csv, columns)
+        print(f"✅ Exported {count:,} rows to: {args.csv}")
+    else:
+        filename = args.file or columnar_filename(args.csv)
+        count = convert_csv(args.csv, filename, compress=not args.no_compress)
+        print(f"✅ Wrote {count:,} rows to: {filename} "
+              f"({os.path.getsize(filename) / 1e6:.1f} MB vs {os.path.getsize(args.csv) / 1e6:.1f} MB CSV)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Constant-Memory CSV Streaming for the Data Generators
+Writes generated rows to CSV in fixed-size chunks and keeps running summary
+statistics, so no generator has to hold its whole dataset in memory
+"""
+
+import csv
+from itertools import islice
+from operator import itemgetter
+from time import perf_counter
+
+import profiling
+
+# Rows buffered between writes; peak memory is bounded by this, not by record count
+DEFAULT_CHUNK_SIZE = 10000
+
+# Output buffer of the CSV files; whole chunks are written in one call anyway
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+# Whether ChunkedCsvWriters also write a columnar copy of their CSV by default
+_write_columnar = False
+
+# Characters that make csv.QUOTE_MINIMAL quote a field
+_SPECIAL_CHARACTERS = (',', '"', '\r', '\n')
+
+
+def _quote(field):
+    """A string field as the excel dialect writes it: quoted only if it must be"""
+    if ',' in field or '"' in field or '\r' in field or '\n' in field:
+        return '"' + field.replace('"', '""') + '"'
+    return field
+
+
+def _field(value):
+    """Any value as the excel dialect writes it (None is an empty field)"""
+    if value is None:
+        return ''
+    return _quote(value if type(value) is str else str(value))
+
+
+def format_column(values):
+    """The CSV fields of one column of a chunk, exactly as csv.writer would write them
+
+    This is the per-column quoting plan: numbers are never quoted, a column of
+    strings free of separators and quotes (checked once for the whole chunk)
+    is written as is, and only other columns are quoted field by field.
+    """
+    kinds = set(map(type, values))
+    if kinds <= {int, float}:
+        return list(map(str, values))  # str(float) is the repr csv uses
+    if kinds == {str}:
+        joined = ''.join(values)
+        if not any(character in joined for character in _SPECIAL_CHARACTERS):
+            return values
+        return list(map(_quote, values))
+    return list(map(_field, values))
+
+
+class CsvRowWriter:
+    """A faster csv.DictWriter for generated rows, with byte-identical output
+
+    Writes the excel dialect (comma separated, minimal quoting, CRLF line
+    ends) like csv.DictWriter with its defaults, but formats each chunk column
+    by column with format_column() and writes it as one block of lines. Rows
+    missing a field get an empty field, as with DictWriter's default restval.
+    With extrasaction="raise" (DictWriter's default) a row with fields not in
+    fieldnames raises ValueError.
+    """
+
+    def __init__(self, file, fieldnames, extrasaction="raise"):
+        if extrasaction not in ("raise", "ignore"):
+            raise ValueError(f"extrasaction ({extrasaction}) must be 'raise' or 'ignore'")
+        self.file = file
+        self.fieldnames = list(fieldnames)
+        self.extrasaction = extrasaction
+        self._fields = set(self.fieldnames)
+        self._getter = itemgetter(*self.fieldnames)
+        # A lone empty field has to be quoted to tell it from an empty line; leave that to csv
+        self._fallback = csv.DictWriter(file, fieldnames=self.fieldnames, extrasaction=extrasaction) \
+            if len(self.fieldnames) == 1 else None
+
+    def writeheader(self):
+        """Write the header line"""
+        self.writerows([dict(zip(self.fieldnames, self.fieldnames))])
+
+    def _check_fields(self, rows):
+        """Raise DictWriter's ValueError for the first row with fields not in fieldnames"""
+        for row in rows:
+            wrong = row.keys() - self._fields
+            if wrong:
+                raise ValueError("dict contains fields not in fieldnames: " + ", ".join(map(repr, sorted(wrong))))
+
+    def columns(self, rows):
+        """A chunk of dict rows as one sequence of values per field"""
+        raising = self.extrasaction == "raise"
+        if self._fallback is None:  # itemgetter of one field returns bare values
+            # A row with more keys than fieldnames has extra ones; one with as many
+            # has none if the getter finds every field
+            if raising and any(len(row) > len(self._fields) for row in rows):
+                self._check_fields(rows)
+            try:
+                return list(zip(*map(self._getter, rows)))
+            except KeyError:
+                pass  # A row misses a field, maybe with an extra one in its place
+        if raising:
+            self._check_fields(rows)
+        return [[row.get(name, '') for row in rows] for name in self.fieldnames]
+
+    def writerows(self, rows):
+        """Write a chunk of dict rows"""
+        rows = list(rows)
+        if not rows:
+            return
+        if self._fallback is not None:
+            self._fallback.writerows(rows)
+            return
+        self.writecolumns(self.columns(rows))
+
+    def writecolumns(self, columns):
+        """Write a chunk given as one sequence of values per field"""
+        if not columns or not len(columns[0]):
+            return
+        if self._fallback is not None:
+            self._fallback.writerows({self.fieldnames[0]: value} for value in columns[0])
+            return
+        lines = map(','.join, zip(*map(format_column, columns)))
+        self.file.write('\r\n'.join(lines))
+        self.file.write('\r\n')
+
+
+def write_columnar(enabled):
+    """Make every ChunkedCsvWriter also write a columnar copy (columnar.py) of its CSV"""
+    global _write_columnar
+    _write_columnar = enabled
+
+
+def writing_columnar():
+    """Whether ChunkedCsvWriters currently write columnar copies by default"""
+    return _write_columnar
+
+
+class ChunkedCsvWriter:
+    """Write dict rows to a CSV file in fixed-size chunks
+
+    The header is taken from the keys of the first row, like the original
+    save_to_csv functions did with data[0].keys(). The file is only created once
+    the first chunk is flushed, so an empty stream leaves no file behind.
+
+    With columnar (by default, whatever write_columnar() set), every chunk is
+    also written as a row group of a columnar file next to the CSV.
+    """
+
+    def __init__(self, filename, fieldnames=None, chunk_size=DEFAULT_CHUNK_SIZE, columnar=None):
+        self.filename = filename
+        self.fieldnames = list(fieldnames) if fieldnames is not None else None
+        self.chunk_size = chunk_size
+        self.columnar = _write_columnar if columnar is None else columnar
+        self.rows_written = 0
+        self._buffer = []
+        self._file = None
+        self._writer = None
+        self._columnar_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, row):
+        """Buffer one row, flushing when the chunk is full"""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def write_all(self, rows):
+        """Consume an iterable of rows chunk by chunk"""
+        rows = iter(rows)
+        while True:
+            self._buffer.extend(islice(rows, self.chunk_size - len(self._buffer)))
+            if len(self._buffer) < self.chunk_size:
+                break
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Write out the buffered chunk"""
+        if not self._buffer:
+            return
+        profile = profiling.active()
+        start = perf_counter() if profile is not None else None
+        if self._writer is None:
+            if self.fieldnames is None:
+                self.fieldnames = list(self._buffer[0].keys())
+            self._file = open(self.filename, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_BYTES)
+            self._writer = CsvRowWriter(self._file, fieldnames=self.fieldnames)
+            self._writer.writeheader()
+            if self.columnar:
+                from columnar import ColumnarWriter, columnar_filename
+
+                self._columnar_writer = ColumnarWriter(columnar_filename(self.filename), self.fieldnames)
+        if self._columnar_writer is not None:
+            columns = self._writer.columns(self._buffer)  # Transposed once for both files
+            self._writer.writecolumns(columns)
+            self._columnar_writer.write_columns(columns)
+        else:
+            self._writer.writerows(self._buffer)
+        self.rows_written += len(self._buffer)
+        if profile is not None:
+            profile.add(profiling.WRITER, self.filename, perf_counter() - start, len(self._buffer))
+        self._buffer = []
+
+    def close(self):
+        """Flush any remaining rows and close the file"""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._columnar_writer is not None:
+            self._columnar_writer.close()
+            self._columnar_writer = None
+
+
+def stream_to_csv(rows, filename, chunk_size=DEFAULT_CHUNK_SIZE, fieldnames=None, columnar=None):
+    """Stream an iterable of dict rows to CSV and return the number of rows written"""
+    with ChunkedCsvWriter(filename, fieldnames=fieldnames, chunk_size=chunk_size, columnar=columnar) as writer:
+        writer.write_all(rows)
+    return writer.rows_written
+
+
+class RunningStats:
+    """Summary statistics collected while rows stream past
+
+    Tracks the row count, distinct values of low-cardinality columns,
+    sum/min/max of numeric columns and the first few rows as samples.
+    """
+
+    def __init__(self, distinct=(), numeric=(), samples=3):
+        self.count = 0
+        self.samples = []
+        self.max_samples = samples
+        self._distinct = {column: set() for column in distinct}
+        self._sum = {column: 0 for column in numeric}
+        self._min = {column: None for column in numeric}
+        self._max = {column: None for column in numeric}
+
+    def observe(self, rows):
+        """Yield rows unchanged while updating the statistics"""
+        distinct = list(self._distinct.items())
+        numeric = list(self._sum)
+        for row in rows:
+            self.count += 1
+            if len(self.samples) < self.max_samples:
+                self.samples.append(row)
+            for column, seen in distinct:
+                seen.add(row[column])
+            for column in numeric:
+                value = row[column]
+                self._sum[column] += value
+                if self._min[column] is None or value < self._min[column]:
+                    self._min[column] = value
+                if self._max[column] is None or value > self._max[column]:
+                    self._max[column] = value
+            yield row
+
+    def merge(self, other):
+        """Fold another RunningStats (e.g. from a later shard) into this one"""
+        self.count += other.count
+        self.samples.extend(other.samples[:self.max_samples - len(self.samples)])
+        for column, seen in other._distinct.items():
+            self._distinct[column] |= seen
+        for column, total in other._sum.items():
+            self._sum[column] += total
+            for mine, theirs, better in ((self._min, other._min, min), (self._max, other._max, max)):
+                if theirs[column] is not None:
+                    mine[column] = theirs[column] if mine[column] is None else better(mine[column], theirs[column])
+        return self
+
+    def distinct(self, column):
+        """Number of distinct values seen in a column"""
+        return len(self._distinct[column])
+
+    def mean(self, column):
+        """Mean of a numeric column, or 0 when no rows were seen"""
+        return self._sum[column] / self.count if self.count else 0
+
+    def min(self, column):
+        """Smallest value of a numeric column"""
+        return self._min[column]
+
+    def max(self, column):
+        """Largest value of a numeric column"""
+        return self._max[column]
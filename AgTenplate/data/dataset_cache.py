@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Cache of Generated Datasets
+CI jobs and developer machines keep regenerating the same datasets (same
+generator, record count and seed). Seeded generator runs look their output
+up here first and, on a hit, unpack the finished CSVs instead of generating
+them again.
+
+An entry is keyed by a hash of everything the output depends on: the source
+of the generator scripts, the object metadata their columns come from, the
+shard function and its arguments (count, seed, shards, output names, parent
+files' content, ...). Any edit to a generator simply makes new keys. Entries
+are stored gzipped under a size cap (AG_DATASET_CACHE_MB, default 2048), and
+the least recently used ones are evicted when a new one does not fit.
+
+    python3 data/dataset_cache.py info      # entries, sizes and last use
+    python3 data/dataset_cache.py clear
+
+The cache lives in AG_DATASET_CACHE (default ~/.cache/agtemplate/datasets).
+Generators skip it for unseeded runs, with --profile, and with --no-cache.
+"""
+
+import argparse
+import functools
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+import uuid
+from datetime import date, datetime
+
+DEFAULT_DIRECTORY = os.path.join("~", ".cache", "agtemplate", "datasets")
+DEFAULT_MAX_MB = 2048
+COMPRESS_LEVEL = 3  # Generated CSVs still shrink about 4x, at several times the speed of level 9
+MB = 1024 * 1024
+MANIFEST = "manifest.json"
+RESULTS = "results.pickle"
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OBJECTS_DIR = os.path.normpath(os.path.join(HERE, os.pardir, "force-app", "main", "default", "objects"))
+
+# Cache the generators use, if any
+_active = None
+_source_digest = None
+
+
+class Uncacheable(Exception):
+    """A shard argument has no stable description, so the run can't be keyed"""
+
+
+def source_digest():
+    """Hash of the generator scripts and the object metadata, computed once per process"""
+    global _source_digest
+    if _source_digest is None:
+        digest = hashlib.sha256()
+        paths = [os.path.join(HERE, name) for name in os.listdir(HERE) if name.endswith(".py")]
+        for root, _, names in os.walk(OBJECTS_DIR):
+            paths.extend(os.path.join(root, name) for name in names if name.endswith(".xml"))
+        for path in sorted(paths):
+            digest.update(os.path.relpath(path, HERE).encode("utf-8") + b"\0")
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        _source_digest = digest.hexdigest()
+    return _source_digest
+
+
+def file_digest(filename):
+    """sha256 of a file's content, read in blocks"""
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def describe(value):
+    """A JSON-able description of a shard argument that changes whenever the value does
+
+    Objects describe themselves with a cache_key property (AccountSource,
+    UniqueValues) and partials by their function and arguments; anything else
+    raises Uncacheable.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [describe(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): describe(item) for key, item in sorted(value.items())}
+    if isinstance(value, functools.partial):
+        return [f"{value.func.__module__}.{value.func.__qualname__}", describe(value.args), describe(value.keywords)]
+    cache_key = getattr(value, "cache_key", None)
+    if cache_key is None:
+        raise Uncacheable(type(value).__name__)
+    return [type(value).__name__, describe(cache_key)]
+
+
+class DatasetCache:
+    """Finished generator outputs on disk, one directory per key, evicted least recently used first"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        directory = directory or os.environ.get("AG_DATASET_CACHE") or DEFAULT_DIRECTORY
+        self.directory = os.path.expanduser(directory)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("AG_DATASET_CACHE_MB", DEFAULT_MAX_MB)) * MB)
+        self.max_bytes = max_bytes
+
+    def key(self, shard_fn, total, filenames, master_seed, shards, keep_parts, columnar, kwargs):
+        """The key of a run_sharded run, or None if one of its arguments can't be described"""
+        try:
+            run = {
+                "source": source_digest(),
+                "generator": f"{shard_fn.__module__}.{shard_fn.__qualname__}",
+                "total": total, "filenames": list(filenames), "seed": master_seed, "shards": shards,
+                "keep_parts": keep_parts, "columnar": columnar, "kwargs": describe(kwargs),
+            }
+        except Uncacheable:
+            return None
+        return hashlib.sha256(json.dumps(run, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def restore(self, key):
+        """Unpack an entry's files to where the run wrote them; the results stored with them, or None on a miss"""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+            for index, filename in enumerate(manifest["files"]):
+                if os.path.dirname(filename):
+                    os.makedirs(os.path.dirname(filename), exist_ok=True)
+                with gzip.open(os.path.join(entry, f"{index}.gz"), "rb") as src, open(filename, "wb") as out:
+                    shutil.copyfileobj(src, out, 1 << 20)
+            with open(os.path.join(entry, RESULTS), "rb") as f:
+                results = pickle.load(f)
+            os.utime(os.path.join(entry, MANIFEST))  # Last use, for LRU eviction
+        except (OSError, EOFError, ValueError, KeyError, pickle.UnpicklingError):
+            return None  # Missing, or evicted by another run while being read
+        return results
+
+    def store(self, key, filenames, results):
+        """Add the files a run wrote and its (picklable) results as an entry, evicting older ones to fit"""
+        os.makedirs(self.directory, exist_ok=True)
+        temp = os.path.join(self.directory, f"tmp-{uuid.uuid4().hex}")
+        os.makedirs(temp)
+        try:
+            size = 0
+            for index, filename in enumerate(filenames):
+                packed = os.path.join(temp, f"{index}.gz")
+                with open(filename, "rb") as src, gzip.open(packed, "wb", compresslevel=COMPRESS_LEVEL) as out:
+                    shutil.copyfileobj(src, out, 1 << 20)
+                size += os.path.getsize(packed)
+            with open(os.path.join(temp, RESULTS), "wb") as f:
+                pickle.dump(results, f, pickle.HIGHEST_PROTOCOL)
+            size += os.path.getsize(os.path.join(temp, RESULTS))
+            if size > self.max_bytes:
+                return False
+            with open(os.path.join(temp, MANIFEST), "w", encoding="utf-8") as f:
+                json.dump({"files": list(filenames), "bytes": size, "created": time.time()}, f)
+            self.evict(self.max_bytes - size)
+            try:
+                os.rename(temp, self._entry(key))
+            except OSError:
+                return False  # Another run stored the same key first
+            return True
+        finally:
+            shutil.rmtree(temp, ignore_errors=True)
+
+    def entries(self):
+        """(key, bytes, last used, manifest) of every entry, least recently used first"""
+        found = []
+        if not os.path.isdir(self.directory):
+            return found
+        for key in os.listdir(self.directory):
+            manifest_file = os.path.join(self.directory, key, MANIFEST)
+            try:
+                with open(manifest_file, encoding="utf-8") as f:
+                    manifest = json.load(f)
+                found.append((key, manifest["bytes"], os.path.getmtime(manifest_file), manifest))
+            except (OSError, ValueError, KeyError):
+                continue  # Being written or removed
+        return sorted(found, key=lambda entry: entry[2])
+
+    def evict(self, budget):
+        """Remove least recently used entries until the rest take at most budget bytes; returns how many"""
+        entries = self.entries()
+        total = sum(entry[1] for entry in entries)
+        removed = 0
+        for key, size, _, _ in entries:
+            if total <= budget:
+                break
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Remove every entry; returns how many"""
+        return self.evict(0)
+
+
+def enable(cache=None):
+    """Use cache (the default DatasetCache if not given) for the generator runs of this process"""
+    global _active
+    _active = cache if cache is not None else DatasetCache()
+    return _active
+
+
+def active():
+    """The DatasetCache generator runs read and fill, or None when caching is off"""
+    return _active
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the cache of generated datasets")
+    parser.add_argument("command", choices=["info", "clear"])
+    args = parser.parse_args()
+
+    cache = DatasetCache()
+    if args.command == "clear":
+        print(f"🧹 Removed {cache.clear()} entries from {cache.directory}")
+        raise SystemExit(0)
+    entries = cache.entries()
+    total = sum(entry[1] for entry in entries)
+    print(f"📦 {cache.directory}: {len(entries)} entries, {total / MB:,.1f} of {cache.max_bytes / MB:,.0f} MB")
+    for key, size, used, manifest in reversed(entries):
+        print(f"   {key[:12]}  {size / MB:>9,.1f} MB  used {time.strftime('%Y-%m-%d %H:%M', time.localtime(used))}  "
+              f"{', '.join(manifest['files'])}")
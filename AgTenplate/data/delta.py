@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Incremental Deltas Against an Existing Dataset
+Rerunning a generator replaces its whole CSV with a new random dataset, so
+every refresh is a full re-import. This stage changes an existing file in
+place instead and writes only the difference as delta files:
+
+    python3 data/delta.py data/agriculture_farms.csv --add 2000 --update 5000 --delete 500
+
+Next to the file it keeps a compact index (agriculture_farms.index.gz): each
+row's key (Account Name or Email) and a 64-bit hash of its content, as of
+the last run, which is what the org holds once that run's deltas are loaded.
+The first run only builds it. Later runs generate just the --add new rows,
+give --update random rows fresh values for their mutable columns (phone,
+revenue, rating, last activity, ...), drop --delete random rows, and write
+
+    agriculture_farms.delta-insert.csv   new rows
+    agriculture_farms.delta-update.csv   changed rows, in full
+    agriculture_farms.delta-delete.csv   keys of removed rows
+
+Edits made to the file outside this script (or a full regeneration) are
+found by comparing hashes with the index, and go into the same deltas.
+Each run overwrites the deltas of the one before, so load them first.
+Updates and deletes need the records' Ids to load: with --ids, an org export
+of Id and Name (or Email), update rows get an Id column and delete rows
+become Ids, ready for import_plan.py --operation update and --operation
+delete (scripts/check_delta_roundtrip.sh runs that against the mock org).
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import importlib
+import json
+import os
+import random
+import time
+from datetime import date
+from itertools import islice
+
+from account_join import count_rows
+from csv_stream import DEFAULT_CHUNK_SIZE
+from schema import load_schema
+from sharding import SEEDED_AS_OF, derive_seed
+from uniqueness import CONTACT_EMAIL_LANES, UniqueValues
+from validate_csv import guess_object
+
+# Columns a refresh may change: none of them feed another column's value
+ACCOUNT_MUTABLE = ["Phone", "Annual Revenue", "Number of Employees", "Rating", "Customer Priority",
+                   "Upsell Opportunity", "Last Activity Date"]
+CONTACT_MUTABLE = ["Title", "Department", "Phone", "Lead Source", "Last Activity Date"]
+
+HASH_BYTES = 8
+INDEX_VERSION = 1
+
+
+class Dataset:
+    """How to make more rows like a generated file: its generator module, key and mutable columns"""
+
+    def __init__(self, module, key, mutable, accounts=None):
+        self.module = module
+        self.key = key
+        self.mutable = mutable
+        self.accounts = accounts  # Name of the module function loading the parent AccountSource
+
+    def generate(self, count, seed, start_index, filename, as_of, emails=None):
+        """Write count new rows to filename with the generator's own generate_shard"""
+        generator = importlib.import_module(self.module)
+        options = {"as_of": as_of}
+        if self.accounts:
+            options.update(accounts=getattr(generator, self.accounts)(), total_records=count, emails=emails)
+        else:
+            options.update(name_seed=seed)  # Account generators order their unique names by it
+        generator.generate_shard(count, seed, start_index, [filename], **options)
+
+
+DATASETS = {
+    "agriculture_farms.csv": Dataset("generate_farm_data", "Account Name", ACCOUNT_MUTABLE),
+    "agriculture_distributors.csv": Dataset("generate_distributor_data", "Account Name", ACCOUNT_MUTABLE),
+    "farmer_contacts.csv": Dataset("generate_farmer_contacts", "Email", CONTACT_MUTABLE,
+                                   accounts="load_farm_accounts"),
+    "distributor_contacts.csv": Dataset("generate_distributor_contacts", "Email", CONTACT_MUTABLE,
+                                        accounts="load_distributor_accounts"),
+}
+
+
+def row_hash(row):
+    """64-bit content hash of a row's fields"""
+    return hashlib.blake2b("\x1f".join(row).encode("utf-8"), digest_size=HASH_BYTES).digest()
+
+
+def index_filename(filename):
+    """The index kept next to a dataset: data/farms.csv -> data/farms.index.gz"""
+    return f"{os.path.splitext(filename)[0]}.index.gz"
+
+
+def delta_filenames(filename, out_dir=None):
+    """(insert, update, delete) delta files for a dataset, next to it unless out_dir is given"""
+    root = os.path.splitext(filename)[0]
+    if out_dir:
+        root = os.path.join(out_dir, os.path.basename(root))
+    return tuple(f"{root}.delta-{kind}.csv" for kind in ("insert", "update", "delete"))
+
+
+def file_identity(filename):
+    stat = os.stat(filename)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class DeltaIndex:
+    """Key -> content hash of every row of a dataset, plus the identity of the file it describes
+
+    next_index counts the row indices the dataset has ever used, so rows
+    generated after deletes don't reuse a deleted row's index.
+    """
+
+    def __init__(self, key, hashes=None, next_index=0, identity=None):
+        self.key = key
+        self.hashes = hashes if hashes is not None else {}
+        self.next_index = next_index
+        self.identity = identity
+
+    def describes(self, filename):
+        """Whether the file is unchanged since the index was written"""
+        return self.identity == file_identity(filename)
+
+    @classmethod
+    def load(cls, filename):
+        """Read an index file, or None if there is none"""
+        if not os.path.exists(filename):
+            return None
+        with gzip.open(filename, "rt", encoding="utf-8", newline="\n") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != INDEX_VERSION:
+                return None
+            hashes = {}
+            for line in f:
+                digest, key = line.rstrip("\n").split("\t", 1)
+                hashes[key] = bytes.fromhex(digest)
+        return cls(header["key"], hashes, header["next_index"], header["identity"])
+
+    def save(self, filename):
+        header = {"version": INDEX_VERSION, "key": self.key, "next_index": self.next_index,
+                  "rows": len(self.hashes), "identity": self.identity}
+        with gzip.open(f"{filename}.tmp", "wt", encoding="utf-8", newline="\n", compresslevel=6) as f:
+            f.write(json.dumps(header) + "\n")
+            f.writelines(f"{digest.hex()}\t{key}\n" for key, digest in self.hashes.items())
+        os.replace(f"{filename}.tmp", filename)
+
+
+def load_org_ids(filename, object_name, key):
+    """Key value -> record Id from an org export (sf data query --result-format csv)"""
+    field = load_schema()[object_name].field_for(key)
+    names = {key, field.api_name} if field else {key}
+    with open(filename, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        id_at = next((i for i, name in enumerate(header) if name in ("Id", "ID")), None)
+        key_at = next((i for i, name in enumerate(header) if name in names), None)
+        if id_at is None or key_at is None:
+            raise ValueError(f"{filename} needs an Id and a {field.api_name if field else key} column")
+        return {row[key_at]: row[id_at] for row in reader if row}
+
+
+class DeltaSummary:
+    """Rows written to each delta file, and what made them"""
+
+    def __init__(self, files):
+        self.files = files
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.deleted = 0
+        self.outside = 0  # Of those, rows changed in the file since the last run
+        self.missing_ids = 0  # Update and delete rows left out for want of an Id in --ids
+        self.indexed = False  # There was no index yet: it was built from the file
+        self.seconds = 0.0
+
+
+class _DeltaWriters:
+    """The three open delta files, adding Ids to updates and deletes when an org export is given"""
+
+    def __init__(self, files, fieldnames, key, ids, summary):
+        self.handles = [open(name, "w", newline="", encoding="utf-8") for name in files]
+        self.inserts, self.updates, self.deletes = (csv.writer(handle) for handle in self.handles)
+        self.key_at = fieldnames.index(key)
+        self.ids = ids
+        self.summary = summary
+        self.inserts.writerow(fieldnames)
+        self.updates.writerow(["Id"] + fieldnames if ids is not None else fieldnames)
+        self.deletes.writerow(["Id"] if ids is not None else [key])
+
+    def _id(self, key):
+        record_id = self.ids.get(key)
+        if record_id is None:
+            self.summary.missing_ids += 1
+        return record_id
+
+    def insert(self, row):
+        self.summary.inserted += 1
+        self.inserts.writerow(row)
+
+    def update(self, row):
+        self.summary.updated += 1
+        if self.ids is None:
+            self.updates.writerow(row)
+        elif (record_id := self._id(row[self.key_at])) is not None:
+            self.updates.writerow([record_id] + row)
+
+    def delete(self, key):
+        self.summary.deleted += 1
+        if self.ids is None:
+            self.deletes.writerow([key])
+        elif (record_id := self._id(key)) is not None:
+            self.deletes.writerow([record_id])
+
+    def close(self):
+        for handle in self.handles:
+            handle.close()
+
+
+def _generated_rows(dataset, count, seed, start_index, scratch, as_of, fieldnames, emails=None):
+    """Generate count rows into a scratch CSV and return them as lists in fieldnames order"""
+    if not count:
+        return []
+    dataset.generate(count, seed, start_index, scratch, as_of, emails=emails)
+    try:
+        with open(scratch, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            if next(reader, []) != fieldnames:
+                raise ValueError(f"{dataset.module} no longer writes the columns of this dataset")
+            return list(reader)
+    finally:
+        os.remove(scratch)
+
+
+def make_delta(filename, dataset, add=0, update=0, delete=0, seed=None, as_of=None, ids=None,
+               out_dir=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Apply the requested changes to a dataset file, write its delta files and index; returns a DeltaSummary
+
+    ids is a key -> Id dict (load_org_ids) for update and delete rows.
+    Without an index the file as it is now is taken to be what the org
+    holds, so only the requested changes make deltas.
+    """
+    start = time.perf_counter()
+    index_file = index_filename(filename)
+    summary = DeltaSummary(delta_filenames(filename, out_dir))
+    old = DeltaIndex.load(index_file)
+    if old is not None and old.key != dataset.key:
+        raise ValueError(f"{index_file} is keyed on {old.key}, not {dataset.key}")
+    known = old.hashes if old is not None else None
+
+    with open(filename, newline="", encoding="utf-8") as f:
+        fieldnames = next(csv.reader(f), [])
+    if dataset.key not in fieldnames:
+        raise ValueError(f"{filename} has no {dataset.key} column")
+    key_at = fieldnames.index(dataset.key)
+    mutable_at = [fieldnames.index(name) for name in dataset.mutable if name in fieldnames]
+
+    rows = len(known) if old is not None and old.describes(filename) else count_rows(filename)
+    if update + delete > rows:
+        raise ValueError(f"cannot update {update:,} and delete {delete:,} of {rows:,} rows")
+    master_seed = seed if seed is not None else random.SystemRandom().getrandbits(63)
+    picked = random.Random(derive_seed(master_seed, "delta", "rows")).sample(range(rows), update + delete)
+    to_update = {position: at for at, position in enumerate(picked[:update])}  # Row -> its fresh values row
+    to_delete = set(picked[update:])
+    changing = bool(add or update or delete)
+
+    scratch = os.path.splitext(summary.files[0])[0]
+    fresh = _generated_rows(dataset, update, derive_seed(master_seed, "delta", "update"), 0,
+                            f"{scratch}.tmp.csv", as_of, fieldnames)
+
+    new = DeltaIndex(dataset.key, next_index=max(old.next_index if old is not None else 0, rows))
+    hashes, dropped = new.hashes, set()
+    writers = _DeltaWriters(summary.files, fieldnames, dataset.key, ids, summary)
+    temp_file = f"{filename}.tmp"
+    try:
+        # Without requested changes the file stays as it is and is only compared with the index
+        with open(filename, newline="", encoding="utf-8") as src, \
+                open(temp_file if changing else os.devnull, "w", newline="", encoding="utf-8") as out:
+            reader, writer = csv.reader(src), csv.writer(out)
+            writer.writerow(next(reader, []))
+            position = 0
+            while True:
+                chunk = [row for row in islice(reader, chunk_size) if row]
+                if not chunk:
+                    break
+                kept = []
+                for position, row in enumerate(chunk, position):
+                    key = row[key_at]
+                    digest = row_hash(row)
+                    was = known.get(key) if known is not None else digest  # None: not in the org
+                    if position in to_delete:
+                        dropped.add(key)
+                        if was is not None:
+                            writers.delete(key)
+                        continue
+                    if position in to_update:
+                        values = fresh[to_update[position]]
+                        for at in mutable_at:
+                            row[at] = values[at]
+                        digest = row_hash(row)
+                    elif digest != was:
+                        summary.outside += 1
+                    if was is None:
+                        writers.insert(row)
+                    elif digest != was:
+                        writers.update(row)
+                    hashes[key] = digest
+                    kept.append(row)
+                position += 1
+                summary.rows += len(chunk)
+                if changing:
+                    writer.writerows(kept)
+
+            # Rows taken out of the file since the last run
+            if known is not None:
+                for key in known.keys() - hashes.keys() - dropped:
+                    writers.delete(key)
+                    summary.outside += 1
+
+            emails = None
+            if dataset.key == "Email":  # Claim every email the org has seen so new contacts get others
+                emails = UniqueValues(len(hashes) + len(dropped) + add, seed=derive_seed(master_seed, "delta", "emails"),
+                                      lane=importlib.import_module(dataset.module).EMAIL_LANE,
+                                      lanes=CONTACT_EMAIL_LANES)
+                for key in (hashes.keys() | known.keys()) if known is not None else hashes.keys() | dropped:
+                    emails.claim(key)
+            # The file's names came from its generator run's seed, which this run doesn't know, so a new
+            # row may get a name already in use; those are skipped and made up for from further indices
+            needed, attempt = add, 0
+            while needed:
+                rows = _generated_rows(dataset, needed, derive_seed(master_seed, "delta", "insert", attempt),
+                                       new.next_index, f"{scratch}.tmp.csv", as_of, fieldnames, emails=emails)
+                new.next_index += needed
+                attempt += 1
+                for row in rows:
+                    key = row[key_at]
+                    if key in hashes or key in dropped or (known is not None and key in known):
+                        continue
+                    hashes[key] = row_hash(row)
+                    writers.insert(row)
+                    writer.writerow(row)
+                    needed -= 1
+    except BaseException:
+        if changing and os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    finally:
+        writers.close()
+
+    if changing:
+        os.replace(temp_file, filename)
+    summary.indexed = old is None
+    new.identity = file_identity(filename)
+    new.save(index_file)
+    summary.seconds = time.perf_counter() - start
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Change a generated dataset in place and write insert/update/delete deltas")
+    parser.add_argument("file", help="generated CSV file, e.g. data/agriculture_farms.csv")
+    parser.add_argument("--add", type=int, default=0, help="number of new rows to generate")
+    parser.add_argument("--update", type=int, default=0, help="number of random rows to give fresh values")
+    parser.add_argument("--delete", type=int, default=0, help="number of random rows to remove")
+    parser.add_argument("--dataset", choices=sorted(DATASETS), default=None,
+                        help="which generator's file this is (default: from the file name)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the rows picked and generated")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None,
+                        help="reference date (YYYY-MM-DD) that generated dates count back from")
+    parser.add_argument("--ids", default=None,
+                        help="org export with Id and the key column; adds Ids to update and delete rows")
+    parser.add_argument("--out", default=None, help="directory for the delta files (default: next to the file)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows read and written per chunk")
+    args = parser.parse_args()
+
+    name = args.dataset or os.path.basename(args.file)
+    if name not in DATASETS:
+        parser.error(f"no generator known for {name}; pass --dataset ({', '.join(sorted(DATASETS))})")
+    dataset = DATASETS[name]
+    # Like the generators: a seed alone reproduces a run, unseeded runs date from today
+    as_of = args.as_of or (SEEDED_AS_OF if args.seed is not None else date.today())
+    ids = None
+    if args.ids:
+        ids = load_org_ids(args.ids, guess_object(args.file), dataset.key)
+        print(f"🏢 {len(ids):,} Ids from {args.ids}")
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+
+    summary = make_delta(args.file, dataset, args.add, args.update, args.delete, seed=args.seed, as_of=as_of,
+                         ids=ids, out_dir=args.out, chunk_size=args.chunk_size)
+    if summary.indexed:
+        print(f"📇 No index yet: indexed {args.file} as the org's current data")
+    print(f"🔁 {args.file}: {summary.rows:,} rows compared in {summary.seconds:.1f}s")
+    print(f"   ➕ {summary.inserted:,} inserts  ✏️  {summary.updated:,} updates  🗑️  {summary.deleted:,} deletes")
+    if summary.outside:
+        print(f"   🔍 {summary.outside:,} of them changed in the file since the last run")
+    if summary.missing_ids:
+        print(f"   ⚠️  {summary.missing_ids:,} update/delete rows have no Id in {args.ids} and were left out")
+    for filename in summary.files:
+        print(f"   📁 {filename}")
+    print(f"   📇 {index_filename(args.file)}")
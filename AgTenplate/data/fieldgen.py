@@ -0,0 +1,1242 @@
+"""
+Shared Field Generators for the Data Generator Scripts
+Each generated entity (farm, distributor, contact, ...) is described once as a
+column spec built from the producers below. The spec is compiled into a single
+row-producing generator function, so generating a row runs straight-line code
+with no per-field spec or dict lookups. The same spec also drives the NumPy
+batch engine, which draws every column as an array in one pass.
+
+Producers are combined like this:
+
+    FARM = Entity("Farm", [
+        Var("state", Choice(US_STATES)),
+        Column("Account Name", Format("{} {}", Choice(PREFIXES), Choice(SUFFIXES))),
+        Column("Billing State", Ref("state")),
+        Column("Created Date", DaysAgo(1, 365 * 5)),
+    ])
+    for row in FARM.iter_rows(1000, rng=random.Random(42)):
+        ...
+
+Fields may reference each other in any order with Ref(); they are evaluated in
+dependency order and emitted in the order they are listed.
+"""
+
+import copy
+import hashlib
+import math
+import random
+import string
+import sys
+from array import array
+from bisect import bisect_right
+from datetime import date
+from itertools import repeat
+from time import perf_counter
+
+import profiling
+
+# Shared picklist values used by every Account generator
+US_STATES = [
+    "California", "Iowa", "Illinois", "Nebraska", "Minnesota", "Indiana",
+    "Kansas", "Ohio", "Texas", "Wisconsin", "Missouri", "North Dakota",
+    "South Dakota", "Michigan", "Kentucky", "Tennessee", "Arkansas",
+    "Georgia", "North Carolina", "South Carolina", "Florida", "Alabama",
+    "Mississippi", "Louisiana", "Oklahoma", "Colorado", "Washington",
+    "Oregon", "Idaho", "Montana", "Wyoming", "Utah", "Arizona", "New Mexico"
+]
+RATINGS = ["Hot", "Warm", "Cold"]
+CUSTOMER_PRIORITIES = ["High", "Medium", "Low"]
+SLAS = ["Gold", "Silver", "Bronze"]
+UPSELL_OPPORTUNITIES = ["Maybe", "No", "Yes"]
+CERTIFICATIONS = ["Organic", "Conventional", "GAP Certified", "None"]
+WATER_SOURCES = ["Well", "Irrigation District", "River", "Lake", "Municipal"]
+SOIL_TYPES = ["Loam", "Clay", "Sandy", "Silt", "Mixed"]
+EMAIL_DOMAINS = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com"]
+
+# Realistic weights of the picklists above, for Weighted(); any positive numbers
+# work, they need not add up to anything. States are weighted by their
+# approximate number of farms (USDA Census of Agriculture 2022, in thousands),
+# so Texas gets twenty times Wyoming's accounts rather than as many
+STATE_WEIGHTS = {
+    "California": 63, "Iowa": 87, "Illinois": 71, "Nebraska": 44, "Minnesota": 65, "Indiana": 53,
+    "Kansas": 56, "Ohio": 78, "Texas": 231, "Wisconsin": 58, "Missouri": 88, "North Dakota": 25,
+    "South Dakota": 29, "Michigan": 46, "Kentucky": 70, "Tennessee": 66, "Arkansas": 42,
+    "Georgia": 39, "North Carolina": 43, "South Carolina": 22, "Florida": 44, "Alabama": 37,
+    "Mississippi": 34, "Louisiana": 27, "Oklahoma": 70, "Colorado": 37, "Washington": 33,
+    "Oregon": 36, "Idaho": 23, "Montana": 26, "Wyoming": 11, "Utah": 17, "Arizona": 16, "New Mexico": 24,
+}
+RATING_WEIGHTS = {"Hot": 15, "Warm": 35, "Cold": 50}
+CUSTOMER_PRIORITY_WEIGHTS = {"High": 20, "Medium": 50, "Low": 30}
+SLA_WEIGHTS = {"Gold": 15, "Silver": 35, "Bronze": 50}
+UPSELL_OPPORTUNITY_WEIGHTS = {"Maybe": 45, "No": 35, "Yes": 20}
+CERTIFICATION_WEIGHTS = {"Organic": 5, "Conventional": 55, "GAP Certified": 10, "None": 30}
+WATER_SOURCE_WEIGHTS = {"Well": 45, "Irrigation District": 25, "River": 12, "Lake": 5, "Municipal": 13}
+SOIL_TYPE_WEIGHTS = {"Loam": 35, "Clay": 20, "Sandy": 15, "Silt": 20, "Mixed": 10}
+
+# Business-name endings that multiply the Account names UniqueName() can make
+ACCOUNT_NAME_MODIFIERS = ["LLC", "Inc.", "& Sons", "Partnership", "Holdings", "Co.", "Trust", "Land Co.",
+                          "Enterprises", "Brothers"]
+
+# Mean Earth radius used by every distance calculation (matches AccountRadarController)
+EARTH_RADIUS_KM = 6371
+
+# Special Call() arguments resolved per row
+RNG = object()
+ROW_INDEX = object()
+AS_OF = object()
+
+
+class Producer:
+    """Base class for column value producers
+
+    emit(gen) returns a Python expression computing one value inside the
+    compiled row function; batch(ctx) returns the values for a whole batch as a
+    list or NumPy array.
+    """
+
+    def emit(self, gen):
+        raise NotImplementedError
+
+    def batch(self, ctx):
+        raise NotImplementedError
+
+
+def _producer(value):
+    """Wrap plain values as Const so specs can pass literals"""
+    return value if isinstance(value, Producer) else Const(value)
+
+
+class Const(Producer):
+    """The same value on every row"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def emit(self, gen):
+        return gen.bind(self.value)
+
+    def batch(self, ctx):
+        return [self.value] * ctx.n
+
+
+_REQUIRED = object()
+
+
+class Param(Producer):
+    """A value supplied at generation time, e.g. the parent accounts list
+
+    Without a default, generating without the value is an error.
+    """
+
+    def __init__(self, name, default=_REQUIRED):
+        self.name = name
+        self.default = default
+
+    def emit(self, gen):
+        return gen.param(self.name, self.default)
+
+    def batch(self, ctx):
+        return [ctx.param(self.name, self.default)] * ctx.n
+
+
+class Ref(Producer):
+    """The value of another field of the same row"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def emit(self, gen):
+        return gen.ref(self.name)
+
+    def batch(self, ctx):
+        return ctx.column(self.name)
+
+
+class Parent(Producer):
+    """A column of the parent row a child row is generated for"""
+
+    def __init__(self, column):
+        self.column = column
+
+    def emit(self, gen):
+        return f"_parent[{gen.bind(self.column)}]"
+
+    def batch(self, ctx):
+        return [parent[self.column] for parent in ctx.parents]
+
+
+class RowNumber(Producer):
+    """The 1-based row number (offset by the shard's start index)"""
+
+    def emit(self, gen):
+        return "(_i + 1)"
+
+    def batch(self, ctx):
+        return ctx.index + 1
+
+
+class Choice(Producer):
+    """A uniformly random element of a list (or of a Param list)"""
+
+    def __init__(self, options):
+        self.options = options
+
+    def emit(self, gen):
+        options = self.options.emit(gen) if isinstance(self.options, Producer) else gen.bind(self.options)
+        return f"_choice({options})"
+
+    def batch(self, ctx):
+        options = ctx.param(self.options.name, self.options.default) if isinstance(self.options, Param) \
+            else self.options
+        table = ctx.np.empty(len(options), dtype=object)
+        table[:] = options
+        return table[ctx.rng.integers(0, len(options), ctx.n)]
+
+
+class AliasTable:
+    """Weighted categorical distribution sampled in O(1) (Vose's alias method)
+
+    weights maps each option to its weight (or is a list of (option, weight)
+    pairs). Building the table takes O(n); every draw then takes one uniform
+    number and one comparison, however many options there are. sample() draws
+    one option from a random.random-like function, sample_many() a NumPy array
+    of them from a numpy Generator.
+    """
+
+    def __init__(self, weights):
+        items = list(weights.items()) if isinstance(weights, dict) else list(weights)
+        if not items or any(weight < 0 for _, weight in items) or not sum(weight for _, weight in items) > 0:
+            raise ValueError("weights must be non-negative with a positive total")
+        self.options = [option for option, _ in items]
+        self.weights = [weight for _, weight in items]
+        n = len(items)
+        total = sum(self.weights)
+        scaled = [weight * n / total for weight in self.weights]
+        self.probability = [1.0] * n  # Chance of keeping slot k rather than taking its alias
+        self.alias = list(range(n))
+        small = [k for k, p in enumerate(scaled) if p < 1.0]
+        large = [k for k, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            short, tall = small.pop(), large.pop()
+            self.probability[short] = scaled[short]
+            self.alias[short] = tall
+            scaled[tall] += scaled[short] - 1.0
+            (small if scaled[tall] < 1.0 else large).append(tall)
+        # Whatever is left is 1.0 up to rounding error and keeps probability 1
+        self._aliased = [self.options[k] for k in self.alias]
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.options)
+
+    def sample(self, random=random.random):
+        """One option, drawn with one call to random()"""
+        u = random() * len(self.options)
+        k = int(u)
+        return self.options[k] if u - k < self.probability[k] else self._aliased[k]
+
+    def sample_many(self, np_rng, size):
+        """size options as a NumPy object array, drawn from a numpy Generator"""
+        import numpy as np  # Only the batch engine needs NumPy
+
+        if self._arrays is None:
+            options = np.empty(len(self.options), dtype=object)
+            options[:] = self.options
+            self._arrays = (np.array(self.probability), np.array(self.alias, dtype=np.int64), options)
+        probability, alias, options = self._arrays
+        u = np_rng.random(size) * len(self.options)
+        k = u.astype(np.int64)
+        return options[np.where(u - k < probability[k], k, alias[k])]
+
+
+class Weighted(Producer):
+    """A random option of a {option: weight} distribution (see AliasTable)"""
+
+    def __init__(self, weights):
+        self.table = weights if isinstance(weights, AliasTable) else AliasTable(weights)
+
+    def emit(self, gen):
+        # AliasTable.sample inlined, saving a call per row
+        table, u, k = self.table, gen.temp("u"), gen.temp("slot")
+        return (f"({gen.bind(table.options)}[{k}] if ({u} := _random() * {len(table.options)}) - ({k} := int({u})) "
+                f"< {gen.bind(table.probability)}[{k}] else {gen.bind(table._aliased)}[{k}])")
+
+    def batch(self, ctx):
+        return self.table.sample_many(ctx.rng, ctx.n)
+
+
+class WeightedBy(Producer):
+    """A random option whose distribution depends on another value of the row
+
+    tables maps each value of key (e.g. the row's state) to the {option:
+    weight} distribution for it; other values use default. In batches each
+    distinct key value is sampled as one vectorized draw.
+    """
+
+    def __init__(self, key, tables, default):
+        self.key = _producer(key)
+        self.tables = {value: AliasTable(weights) for value, weights in tables.items()}
+        self.default = AliasTable(default)
+
+    def emit(self, gen):
+        samplers = {value: table.sample for value, table in self.tables.items()}
+        return f"{gen.bind(samplers.get)}({self.key.emit(gen)}, {gen.bind(self.default.sample)})(_random)"
+
+    def batch(self, ctx):
+        groups = {}  # Key value -> its row positions, in order of first appearance
+        for position, value in enumerate(ctx.as_list(self.key.batch(ctx))):
+            groups.setdefault(value, []).append(position)
+        out = ctx.np.empty(ctx.n, dtype=object)
+        for value, positions in groups.items():
+            out[positions] = self.tables.get(value, self.default).sample_many(ctx.rng, len(positions))
+        return out
+
+
+def emphasize(weights, favored, factor):
+    """A copy of weights with the favored options' weights multiplied by factor"""
+    return {option: weight * factor if option in favored else weight for option, weight in weights.items()}
+
+
+class RandInt(Producer):
+    """A random integer in [low, high], both inclusive like random.randint"""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def emit(self, gen):
+        return f"_randint({self.low!r}, {self.high!r})"
+
+    def batch(self, ctx):
+        return ctx.rng.integers(self.low, self.high + 1, ctx.n)
+
+
+class Uniform(Producer):
+    """A random float in [low, high]"""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def emit(self, gen):
+        return f"_uniform({self.low!r}, {self.high!r})"
+
+    def batch(self, ctx):
+        return ctx.rng.uniform(self.low, self.high, ctx.n)
+
+
+class Chance(Producer):
+    """`then` with probability p, otherwise `otherwise`; only one side is drawn"""
+
+    def __init__(self, p, then, otherwise):
+        self.p = p
+        self.then = _producer(then)
+        self.otherwise = _producer(otherwise)
+
+    def emit(self, gen):
+        return f"({self.then.emit(gen)} if _random() < {self.p!r} else {self.otherwise.emit(gen)})"
+
+    def batch(self, ctx):
+        hit = ctx.rng.random(ctx.n) < self.p
+        return ctx.select(ctx.np.where(hit, 0, 1), [self.then, self.otherwise])
+
+
+class OneOf(Producer):
+    """One of several producers picked uniformly per row; only that one is drawn"""
+
+    def __init__(self, *options):
+        self.options = [_producer(option) for option in options]
+
+    def emit(self, gen):
+        if len(self.options) == 1:
+            return self.options[0].emit(gen)
+        pick = gen.temp("pick")
+        branches = [self.options[0].emit(gen) + f" if ({pick} := _randrange({len(self.options)})) == 0"]
+        for k, option in enumerate(self.options[1:-1], 1):
+            branches.append(f"{option.emit(gen)} if {pick} == {k}")
+        branches.append(self.options[-1].emit(gen))
+        return "(" + " else ".join(branches) + ")"
+
+    def batch(self, ctx):
+        return ctx.select(ctx.rng.integers(0, len(self.options), ctx.n), self.options)
+
+
+class Format(Producer):
+    """str.format of a template with positional producers, e.g. Format("{} {}", a, b)"""
+
+    def __init__(self, template, *parts):
+        self.template = template
+        self.parts = [_producer(part) for part in parts]
+
+    def emit(self, gen):
+        args = ", ".join(part.emit(gen) for part in self.parts)
+        return f"{gen.bind(self.template.format)}({args})"
+
+    def batch(self, ctx):
+        return list(map(self.template.format, *(ctx.as_list(part.batch(ctx)) for part in self.parts)))
+
+
+class Lower(Producer):
+    """Lower-cased string"""
+
+    def __init__(self, value):
+        self.value = _producer(value)
+
+    def emit(self, gen):
+        return f"{self.value.emit(gen)}.lower()"
+
+    def batch(self, ctx):
+        return [value.lower() for value in ctx.as_list(self.value.batch(ctx))]
+
+
+def slugify(name):
+    """Company name squashed for use in a domain name ("Farm Supply Co." -> "farmsupplyco")"""
+    return name.replace(" ", "").replace(",", "").replace(".", "").lower()
+
+
+class Slug(Producer):
+    """A name squashed with slugify()"""
+
+    def __init__(self, value):
+        self.value = _producer(value)
+
+    def emit(self, gen):
+        return f"{gen.bind(slugify)}({self.value.emit(gen)})"
+
+    def batch(self, ctx):
+        return [slugify(value) for value in ctx.as_list(self.value.batch(ctx))]
+
+
+class Item(Producer):
+    """Element k of a tuple-valued field (or column k of a 2-D array in batches)"""
+
+    def __init__(self, value, k):
+        self.value = _producer(value)
+        self.k = k
+
+    def emit(self, gen):
+        return f"{self.value.emit(gen)}[{self.k!r}]"
+
+    def batch(self, ctx):
+        values = self.value.batch(ctx)
+        if isinstance(values, ctx.np.ndarray) and values.ndim == 2:
+            return values[:, self.k]  # Columns of a point array, e.g. from DiscPoint
+        return [value[self.k] for value in ctx.as_list(values)]
+
+
+class Round(Producer):
+    """A number rounded to ndigits"""
+
+    def __init__(self, value, ndigits):
+        self.value = _producer(value)
+        self.ndigits = ndigits
+
+    def emit(self, gen):
+        return f"round({self.value.emit(gen)}, {self.ndigits!r})"
+
+    def batch(self, ctx):
+        return ctx.np.round(ctx.np.asarray(self.value.batch(ctx), dtype=float), self.ndigits)
+
+
+class Jitter(Producer):
+    """A coordinate moved by up to +/- delta degrees and rounded to ndigits
+
+    The base may be a number or a numeric string, e.g. a coordinate read back
+    from a parent CSV.
+    """
+
+    def __init__(self, base, delta, ndigits=6):
+        self.base = _producer(base)
+        self.delta = delta
+        self.ndigits = ndigits
+
+    def emit(self, gen):
+        return f"round(float({self.base.emit(gen)}) + _uniform({-self.delta!r}, {self.delta!r}), {self.ndigits!r})"
+
+    def batch(self, ctx):
+        base = ctx.np.asarray(self.base.batch(ctx), dtype=float)
+        return ctx.np.round(base + ctx.rng.uniform(-self.delta, self.delta, ctx.n), self.ndigits)
+
+
+class DaysAgo(Producer):
+    """An ISO date a random number of days in [low, high] before the run's as-of date"""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def emit(self, gen):
+        return f"_fromordinal(_as_of - _randint({self.low!r}, {self.high!r})).isoformat()"
+
+    def batch(self, ctx):
+        days = ctx.rng.integers(self.low, self.high + 1, ctx.n)
+        return (ctx.np.datetime64(ctx.as_of, "D") - days).astype(str).tolist()
+
+
+class Place(Producer):
+    """A (name, latitude, longitude) tuple for a state
+
+    Picks one of the known places listed for the state in table; states not in
+    the table get a numbered fallback name and uniform coordinates in the given
+    ranges.
+    """
+
+    def __init__(self, state, table, fallback_name, lat_range, lng_range):
+        self.state = _producer(state)
+        self.table = table
+        self.fallback_name = fallback_name
+        self.lat_range = lat_range
+        self.lng_range = lng_range
+
+    def emit(self, gen):
+        places = gen.temp("places")
+        fallback = (f"({gen.bind(self.fallback_name.format)}(_i + 1), "
+                    f"_uniform({self.lat_range[0]!r}, {self.lat_range[1]!r}), "
+                    f"_uniform({self.lng_range[0]!r}, {self.lng_range[1]!r}))")
+        return (f"(_choice({places}) if ({places} := {gen.bind(self.table.get)}({self.state.emit(gen)})) "
+                f"else {fallback})")
+
+    def batch(self, ctx):
+        np = ctx.np
+        states = ctx.as_list(self.state.batch(ctx))
+        known = [self.table.get(state) for state in states]
+        picks = (ctx.rng.random(ctx.n) * np.array([len(places or ()) for places in known])).astype(np.int64)
+        lats = ctx.rng.uniform(*self.lat_range, ctx.n).tolist()
+        lngs = ctx.rng.uniform(*self.lng_range, ctx.n).tolist()
+        numbers = (ctx.index + 1).tolist()
+        return [
+            places[k] if places else (self.fallback_name.format(number), lat, lng)
+            for places, k, lat, lng, number in zip(known, picks.tolist(), lats, lngs, numbers)
+        ]
+
+
+class Call(Producer):
+    """A plain Python function of other producers, for logic that has no producer
+
+    Arguments may be producers, literals, or the RNG, ROW_INDEX and AS_OF
+    markers. The batch engine calls the function row by row.
+    """
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = [arg if arg in (RNG, ROW_INDEX, AS_OF) else _producer(arg) for arg in args]
+
+    def emit(self, gen):
+        args = []
+        for arg in self.args:
+            if arg is RNG:
+                args.append("rng")
+            elif arg is ROW_INDEX:
+                args.append("_i")
+            elif arg is AS_OF:
+                args.append("as_of")
+            else:
+                args.append(arg.emit(gen))
+        return f"{gen.bind(self.func)}({', '.join(args)})"
+
+    def batch(self, ctx):
+        rng = random.Random(int(ctx.rng.integers(0, 2**63)))
+        columns = []
+        for arg in self.args:
+            if arg is RNG:
+                columns.append(repeat(rng))
+            elif arg is ROW_INDEX:
+                columns.append(ctx.index.tolist())
+            elif arg is AS_OF:
+                columns.append(repeat(ctx.as_of))
+            else:
+                columns.append(ctx.as_list(arg.batch(ctx)))
+        return list(map(self.func, *columns)) if columns else [self.func() for _ in range(ctx.n)]
+
+
+def Phone(area_codes):
+    """A US phone number "(AAA) PPP-SSSS" with one of the given area codes"""
+    return Format("({}) {}-{}", Choice(area_codes), RandInt(200, 999), RandInt(1000, 9999))
+
+
+def ZipCode(low=10000, high=99999):
+    """A five-digit ZIP code string in [low, high]"""
+    return Format("{}", RandInt(low, high))
+
+
+class IndexShuffle:
+    """A keyed bijective shuffle of range(size), computed per index in O(1)
+
+    A small Feistel network permutes the smallest even-bit range covering
+    size, and indices that land outside range(size) are permuted again (cycle
+    walking), which takes fewer than four rounds on average. Equal size and
+    key always give the same shuffle. Shuffles of up to TABLE_SIZE indices
+    keep a lookup table (8 bytes an index), filled in as indices are asked
+    for, and all at once by many().
+    """
+
+    ROUNDS = 4
+    TABLE_SIZE = 1 << 16
+
+    def __init__(self, size, key=""):
+        if not 0 < size <= 1 << 64:
+            raise ValueError("size must be between 1 and 2**64")
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        self.half = (bits + 1) // 2
+        self.mask = (1 << self.half) - 1
+        digest = hashlib.sha256(str(key).encode("utf-8")).digest()
+        self.keys = [int.from_bytes(digest[4 * k:4 * k + 4], "big") for k in range(self.ROUNDS)]
+        self._table = array("q", [-1]) * size if size <= self.TABLE_SIZE else None  # -1: not computed yet
+        self._complete = False
+
+    def _lookup(self):
+        """The complete lookup table of a small shuffle, or None"""
+        if self._table is not None and not self._complete:
+            table = self._table
+            for index in range(self.size):
+                if table[index] < 0:
+                    table[index] = self._permute(index)
+            self._complete = True
+        return self._table
+
+    def __call__(self, index):
+        """Position of index in the shuffled order"""
+        table = self._table
+        if table is None:
+            return self._permute(index)
+        position = table[index]
+        if position < 0:
+            position = table[index] = self._permute(index)
+        return position
+
+    def _permute(self, index):
+        half, mask = self.half, self.mask
+        while True:
+            left, right = index >> half, index & mask
+            for key in self.keys:
+                mixed = ((right ^ key) * 0x9E3779B1) & 0xFFFFFFFF
+                mixed = ((mixed ^ (mixed >> 16)) * 0x85EBCA6B) & 0xFFFFFFFF
+                left, right = right, left ^ ((mixed ^ (mixed >> 13)) & mask)
+            index = (left << half) | right
+            if index < self.size:
+                return index
+
+    def many(self, indices):
+        """__call__ for a NumPy array of indices, as uint64"""
+        import numpy as np  # Only the batch engine needs NumPy
+
+        table = self._lookup()
+        if table is not None:
+            return np.frombuffer(table, dtype=np.int64)[np.asarray(indices, dtype=np.int64)].astype(np.uint64)
+        indices = np.asarray(indices, dtype=np.uint64).copy()
+        half, mask, low32 = np.uint64(self.half), np.uint64(self.mask), np.uint64(0xFFFFFFFF)
+        todo = np.arange(len(indices))
+        while len(todo):
+            values = indices[todo]
+            left, right = values >> half, values & mask
+            for key in self.keys:
+                mixed = ((right ^ np.uint64(key)) * np.uint64(0x9E3779B1)) & low32
+                mixed = ((mixed ^ (mixed >> np.uint64(16))) * np.uint64(0x85EBCA6B)) & low32
+                left, right = right, left ^ ((mixed ^ (mixed >> np.uint64(13))) & mask)
+            indices[todo] = (left << half) | right
+            todo = todo[indices[todo] >= self.size]
+        return indices
+
+
+class UniqueName(Producer):
+    """A different name on every row, from combinations of word lists
+
+    tiers lists the name shapes, each a list of word lists (e.g. [[prefixes,
+    suffixes], [families, prefixes, suffixes]]); a name joins one word of each
+    list of its shape with spaces. All shapes' combinations form one index
+    space, which is shuffled, so every shape shows up in proportion to its
+    size even in short runs. Row k (by its 0-based row index, so shards never
+    overlap) gets the k-th name of the shuffled order; once all are used the
+    sequence repeats with " #2", " #3", ... appended.
+
+    The shuffle is keyed by key and the run's name_seed parameter (the
+    generators pass their master seed), so each seed names rows differently.
+    Names are a pure function of row index, key and seed, with no set of names
+    seen so far; the word lists must not spell one name two ways.
+
+    With lanes > 1 the names are split between that many entities that must
+    not share one (farms, nearby and anchored farms): lane(k) is a producer
+    whose names are all at positions k, k + lanes, ... of the space, whatever
+    the seeds of the runs that use the lanes.
+    """
+
+    SEED = "name_seed"  # The Param the shuffle seed comes from
+    LISTED = 1 << 17  # Name spaces up to this size keep every name they spell
+
+    def __init__(self, tiers, key="names", lanes=1):
+        self.tiers = [[list(dict.fromkeys(words)) for words in tier] for tier in tiers]
+        sizes = [math.prod(len(words) for words in tier) for tier in self.tiers]
+        self.starts = [sum(sizes[:k]) for k in range(len(sizes))]  # First position of each shape
+        self.total = sum(sizes)
+        self.key = key
+        self.lanes = lanes
+        self.lane_index = 0
+        self.lane_size = self.total // lanes  # Names of one lane before they repeat with " #2"
+        if not self.lane_size:
+            raise ValueError("UniqueName needs at least one name per lane")
+        self._shuffles = {}  # Seed -> IndexShuffle of one lane's positions
+        # Names by position, spelled out as they are first used
+        self._names = [None] * self.total if self.total <= self.LISTED else None
+
+    def lane(self, index):
+        """A producer of this name space's lane index (0 <= index < lanes)"""
+        if not 0 <= index < self.lanes:
+            raise ValueError(f"lane {index} of {self.lanes}")
+        view = copy.copy(self)  # Shares the word lists, shuffles and spelled names
+        view.lane_index = index
+        return view
+
+    def shuffle(self, seed=None):
+        """The IndexShuffle of lane positions for a seed"""
+        shuffle = self._shuffles.get(seed)
+        if shuffle is None:
+            key = self.key if seed is None else f"{self.key}:{seed}"
+            shuffle = self._shuffles[seed] = IndexShuffle(self.lane_size, key)
+        return shuffle
+
+    def spell(self, position):
+        """The name at a position of the (unshuffled) name space"""
+        k = bisect_right(self.starts, position) - 1
+        index = position - self.starts[k]
+        words = []
+        for options in reversed(self.tiers[k]):  # Mixed-radix digits, last word fastest
+            index, digit = divmod(index, len(options))
+            words.append(options[digit])
+        return " ".join(reversed(words))
+
+    def name(self, index, seed=None):
+        """The name of the row with the given 0-based index"""
+        cycle, index = divmod(index, self.lane_size)
+        position = (self._shuffles.get(seed) or self.shuffle(seed))(index) * self.lanes + self.lane_index
+        names = self._names
+        if names is None:
+            name = self.spell(position)
+        else:
+            name = names[position]
+            if name is None:
+                name = names[position] = self.spell(position)
+        return f"{name} #{cycle + 1}" if cycle else name
+
+    def emit(self, gen):
+        return f"{gen.bind(self.name)}(_i, {gen.param(self.SEED, None)})"
+
+    def batch(self, ctx):
+        np = ctx.np
+        cycles, offsets = np.divmod(ctx.index, self.lane_size)
+        positions = self.shuffle(ctx.param(self.SEED, None)).many(offsets).astype(np.int64) * self.lanes \
+            + self.lane_index
+        shapes = np.searchsorted(np.asarray(self.starts, dtype=np.int64), positions, side="right") - 1
+        names = np.empty(ctx.n, dtype=object)
+        for k, (tier, start) in enumerate(zip(self.tiers, self.starts)):
+            rows = np.nonzero(shapes == k)[0]
+            if not len(rows):
+                continue
+            digits = positions[rows] - start
+            columns = []
+            for options in reversed(tier):
+                digits, digit = np.divmod(digits, len(options))
+                column = np.empty(len(options), dtype=object)
+                column[:] = options
+                columns.append(column[digit].tolist())
+            names[rows] = [" ".join(words) for words in zip(*reversed(columns))]
+        repeats = np.nonzero(cycles)[0]
+        if len(repeats):
+            names[repeats] = [f"{name} #{cycle + 1}" for name, cycle in zip(names[repeats], cycles[repeats].tolist())]
+        return names
+
+
+def Website(name):
+    """A www.<slug>.com website for a company name"""
+    return Format("www.{}.com", Slug(name))
+
+
+def Email(first_name, last_name, company, patterns, domains=EMAIL_DOMAINS):
+    """An email address built from one of several patterns picked per row
+
+    Patterns are str.format templates over {first}, {last}, {domain},
+    {company} (the slugified company name) and {n} (a number 1-99).
+    """
+    parts = {
+        "first": Lower(first_name),
+        "last": Lower(last_name),
+        "domain": Choice(domains),
+        "company": Slug(company),
+        "n": RandInt(1, 99),
+    }
+    options = []
+    for pattern in patterns:
+        names = []
+        template = _positional(pattern, names)
+        options.append(Format(template, *(parts[name] for name in names)))
+    return OneOf(*options)
+
+
+def _positional(template, names):
+    """Turn "{first}.{last}" into "{}.{}", collecting the field names in order"""
+    out = []
+    for literal, name, spec, conversion in string.Formatter().parse(template):
+        out.append(literal.replace("{", "{{").replace("}", "}}"))
+        if name is not None:
+            names.append(name)
+            out.append("{" + ("!" + conversion if conversion else "") + (":" + spec if spec else "") + "}")
+    return "".join(out)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometers"""
+    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
+    c = 2 * math.asin(math.sqrt(a))
+
+    return EARTH_RADIUS_KM * c
+
+
+# Density profiles for points scattered around an anchor: uniform over the
+# disc, a gaussian bump at the anchor, or zipf-weighted hot spots
+DENSITY_PROFILES = ["uniform", "gaussian", "zipf"]
+GAUSSIAN_SPREAD = 0.4  # Standard deviation of the gaussian profile, as a fraction of the radius
+HOT_SPOT_COUNT = 8
+HOT_SPOT_SIZE = 0.15  # Radius of one zipf hot spot, as a fraction of the radius
+ZIPF_EXPONENT = 1.2  # Hot spot k draws points in proportion to 1 / k ** ZIPF_EXPONENT
+
+
+def hot_spots(rng=random, count=HOT_SPOT_COUNT):
+    """Centers of the zipf profile's hot spots around one anchor, most popular first
+
+    Each is a (north, east) offset as a fraction of the radius, placed so the
+    whole spot stays inside the disc.
+    """
+    return [_disc_offset(1 - HOT_SPOT_SIZE, rng) for _ in range(count)]
+
+
+def _zipf_cumulative(count):
+    weights, total = [], 0.0
+    for rank in range(1, count + 1):
+        total += 1 / rank ** ZIPF_EXPONENT
+        weights.append(total)
+    return weights
+
+
+def _gaussian_distance(max_distance, u, log1p=math.log1p, exp=math.exp, sqrt=math.sqrt):
+    """Inverse CDF of a 2-D gaussian's distance from its center, cut off at max_distance"""
+    sigma = GAUSSIAN_SPREAD * max_distance
+    mass = 1 - exp(-1 / (2 * GAUSSIAN_SPREAD ** 2))  # Share of the gaussian inside the disc
+    return sigma * sqrt(-2 * log1p(-u * mass))
+
+
+def _disc_offset(max_distance, rng=random, profile="uniform", spots=None):
+    """A random (north, east) offset within max_distance of the origin"""
+    if profile == "zipf":
+        north, east = rng.choices(spots, cum_weights=_zipf_cumulative(len(spots)))[0]
+        spot_north, spot_east = _disc_offset(max_distance * HOT_SPOT_SIZE, rng)
+        return north * max_distance + spot_north, east * max_distance + spot_east
+    angle = rng.uniform(0, 2 * math.pi)
+    if profile == "uniform":
+        # sqrt makes the density uniform per unit area instead of clustering at the center
+        distance = max_distance * math.sqrt(rng.random())
+    elif profile == "gaussian":
+        distance = _gaussian_distance(max_distance, rng.random())
+    else:
+        raise ValueError(f"Unknown density profile {profile!r}, expected one of {DENSITY_PROFILES}")
+    return distance * math.cos(angle), distance * math.sin(angle)
+
+
+def point_within(base_lat, base_lng, max_distance_km=10, rng=random, profile="uniform", spots=None):
+    """A random (lat, lng) within max_distance_km of a base point
+
+    profile is one of DENSITY_PROFILES (uniform over the disc by default);
+    "zipf" also needs the anchor's hot_spots().
+    """
+    # Convert km to degrees (approximate)
+    # 1 degree latitude ≈ 111 km
+    # 1 degree longitude ≈ 111 km * cos(latitude)
+    north, east = _disc_offset(max_distance_km, rng, profile, spots)
+
+    lat_offset = north / 111.0
+    lng_offset = east / (111.0 * math.cos(math.radians(base_lat)))
+
+    return base_lat + lat_offset, base_lng + lng_offset
+
+
+def haversine_km_many(lats1, lngs1, lats2, lngs2):
+    """haversine_km over NumPy arrays, broadcasting like any NumPy operation
+
+    Pass points as shape (n, 1) and centers as shape (1, m) for the full n x m
+    distance matrix, or equal-length arrays for pairwise distances.
+    """
+    import numpy as np  # Only the batch engine needs NumPy
+
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=float)) for v in (lats1, lngs1, lats2, lngs2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _disc_offsets_many(np_rng, max_distance, profile="uniform", spots=None):
+    """_disc_offset for an array of radii: (north, east) arrays
+
+    spots is a (k, 2) array of hot spots shared by every point or an (n, k, 2)
+    array with each point's own.
+    """
+    import numpy as np  # Only the batch engine needs NumPy
+
+    n = max_distance.size
+    if profile == "zipf":
+        spots = np.asarray(spots, dtype=float)
+        cumulative = np.array(_zipf_cumulative(spots.shape[-2]))
+        ranks = np.searchsorted(cumulative, np_rng.random(n) * cumulative[-1], side="right")
+        centers = spots[ranks] if spots.ndim == 2 else spots[np.arange(n), ranks]
+        spot_north, spot_east = _disc_offsets_many(np_rng, max_distance * HOT_SPOT_SIZE)
+        return centers[:, 0] * max_distance + spot_north, centers[:, 1] * max_distance + spot_east
+    angle = np_rng.uniform(0, 2 * math.pi, n)
+    if profile == "uniform":
+        distance = max_distance * np.sqrt(np_rng.random(n))
+    elif profile == "gaussian":
+        distance = _gaussian_distance(max_distance, np_rng.random(n), np.log1p, np.exp, np.sqrt)
+    else:
+        raise ValueError(f"Unknown density profile {profile!r}, expected one of {DENSITY_PROFILES}")
+    return distance * np.cos(angle), distance * np.sin(angle)
+
+
+def points_within_many(np_rng, base_lats, base_lngs, max_distance_km, profile="uniform", spots=None):
+    """point_within for a batch of base points: an (n, 2) array of (lat, lng)
+
+    base_lats, base_lngs and max_distance_km may be arrays (one disc per point)
+    or scalars broadcast against the others.
+    """
+    import numpy as np  # Only the batch engine needs NumPy
+
+    base_lats, base_lngs, max_distance_km = (
+        array.ravel() for array in np.broadcast_arrays(
+            np.asarray(base_lats, dtype=float), np.asarray(base_lngs, dtype=float),
+            np.asarray(max_distance_km, dtype=float)))
+    north, east = _disc_offsets_many(np_rng, max_distance_km, profile, spots)
+    points = np.empty((base_lats.size, 2))
+    points[:, 0] = base_lats + north / 111.0
+    points[:, 1] = base_lngs + east / (111.0 * np.cos(np.radians(base_lats)))
+    return points
+
+
+class DiscPoint(Producer):
+    """A (lat, lng) within max_distance_km of a base point, spread by a density profile
+
+    profile (a literal or Param, the same for every row) is one of
+    DENSITY_PROFILES; "zipf" needs spots, the base point's hot_spots().
+    """
+
+    def __init__(self, base_lat, base_lng, max_distance_km, profile="uniform", spots=None):
+        self.base_lat = _producer(base_lat)
+        self.base_lng = _producer(base_lng)
+        self.max_distance_km = _producer(max_distance_km)
+        self.profile = _producer(profile)
+        self.spots = _producer(spots)
+
+    def emit(self, gen):
+        return (f"{gen.bind(point_within)}({self.base_lat.emit(gen)}, {self.base_lng.emit(gen)}, "
+                f"{self.max_distance_km.emit(gen)}, rng, {self.profile.emit(gen)}, {self.spots.emit(gen)})")
+
+    def batch(self, ctx):
+        profile = ctx.as_list(self.profile.batch(ctx))[0]
+        spots = self.spots.batch(ctx) if profile == "zipf" else None
+        return points_within_many(ctx.rng, self.base_lat.batch(ctx), self.base_lng.batch(ctx),
+                                  self.max_distance_km.batch(ctx), profile, spots)
+
+
+class Distance(Producer):
+    """Great-circle distance in km between two (lat, lng) points"""
+
+    def __init__(self, lat1, lng1, lat2, lng2):
+        self.coordinates = [_producer(value) for value in (lat1, lng1, lat2, lng2)]
+
+    def emit(self, gen):
+        return f"{gen.bind(haversine_km)}({', '.join(value.emit(gen) for value in self.coordinates)})"
+
+    def batch(self, ctx):
+        return haversine_km_many(*(value.batch(ctx) for value in self.coordinates))
+
+
+class Column:
+    """An output column of an entity"""
+
+    def __init__(self, name, producer):
+        self.name = name
+        self.producer = _producer(producer)
+
+
+class Var(Column):
+    """A helper value other fields can Ref() but that is not written out"""
+
+
+class _CodeGen:
+    """State for compiling one entity into Python source"""
+
+    def __init__(self, fields, profiled=False):
+        self.fields = {field.name: field for field in fields}
+        self.profiled = profiled
+        self.namespace = {}
+        self.lines = []
+        self.params = {}
+        self.param_defaults = {}  # Param name -> bound default, for optional params
+        self.costs = {}  # Field name -> local accumulating its time, when profiled
+        self._locals = {}
+        self._pending = set()
+        self._counter = 0
+
+    def _name(self, hint):
+        self._counter += 1
+        return f"_{hint}{self._counter}"
+
+    def bind(self, value):
+        """Make a constant available to the compiled function and return its name"""
+        name = self._name("k")
+        self.namespace[name] = value
+        return name
+
+    def temp(self, hint):
+        """A fresh local variable name"""
+        return self._name(hint)
+
+    def param(self, name, default=_REQUIRED):
+        """Local variable holding a generation-time parameter"""
+        if name not in self.params:
+            self.params[name] = self._name("p")
+            if default is not _REQUIRED:
+                self.param_defaults[name] = self.bind(default)
+        return self.params[name]
+
+    def ref(self, name):
+        """Local variable holding a field's value, emitting the field first if needed"""
+        if name not in self._locals:
+            if name in self._pending:
+                raise ValueError(f"Field {name!r} depends on itself")
+            if name not in self.fields:
+                raise KeyError(f"Unknown field {name!r}")
+            self._pending.add(name)
+            expression = self.fields[name].producer.emit(self)
+            local = self._name("v")
+            self.lines.append(f"        {local} = {expression}")
+            if self.profiled:
+                # Dependencies are emitted as earlier lines, so this is the field's self time
+                cost = self.costs[name] = self._name("c")
+                self.lines.append(f"        _now = _clock(); {cost} += _now - _last; _last = _now")
+            self._pending.discard(name)
+            self._locals[name] = local
+        return self._locals[name]
+
+
+class _BatchContext:
+    """Columns of one batch while the batch engine evaluates an entity"""
+
+    def __init__(self, np, fields, rng, index, as_of, parents, params, root=None, positions=None,
+                 entity=None, profile=None):
+        self.np = np
+        self.fields = fields
+        self.rng = rng
+        self.index = index
+        self.n = len(index)
+        self.as_of = as_of
+        self.parents = parents
+        self.params = params
+        self.columns = {}
+        self._root = root
+        self._positions = positions
+        self.entity = entity
+        self.profile = profile
+        self._inner = 0.0  # Time spent in the fields the field being timed depends on
+
+    def param(self, name, default=_REQUIRED):
+        """A generation-time parameter, or default when it was not given"""
+        if default is _REQUIRED or name in self.params:
+            return self.params[name]
+        return default
+
+    def column(self, name):
+        """Values of a field for this batch, evaluating it on first use
+
+        Sub-batches evaluate fields on the full batch and slice, so a field has
+        the same value whichever branch first asks for it.
+        """
+        if name not in self.columns and self._root is not None:
+            self.columns[name] = self._slice(self._root.column(name), self._positions)
+        elif name not in self.columns:
+            self.columns[name] = None
+            if self.profile is None:
+                self.columns[name] = self.fields[name].producer.batch(self)
+            else:
+                outer, self._inner = self._inner, 0.0
+                start = perf_counter()
+                self.columns[name] = self.fields[name].producer.batch(self)
+                elapsed = perf_counter() - start
+                self.profile.add(self.entity, name, elapsed - self._inner, self.n)
+                self._inner = outer + elapsed
+        elif self.columns[name] is None:
+            raise ValueError(f"Field {name!r} depends on itself")
+        return self.columns[name]
+
+    def as_list(self, values):
+        """Values as a plain Python list (NumPy arrays converted to native types)"""
+        return values.tolist() if isinstance(values, self.np.ndarray) else values
+
+    def _slice(self, values, positions):
+        if isinstance(values, self.np.ndarray):
+            return values[positions]
+        return [values[p] for p in positions.tolist()]
+
+    def take(self, positions):
+        """A sub-batch holding only the given row positions"""
+        parents = self._slice(self.parents, positions) if self.parents is not None else None
+        return _BatchContext(self.np, self.fields, self.rng, self.index[positions], self.as_of,
+                             parents, self.params, root=self, positions=positions)
+
+    def select(self, picks, options):
+        """Row i gets options[picks[i]], drawing each option only for its own rows"""
+        out = [None] * self.n
+        for k, option in enumerate(options):
+            positions = self.np.nonzero(picks == k)[0]
+            if not len(positions):
+                continue
+            values = self.as_list(option.batch(self.take(positions)))
+            for position, value in zip(positions.tolist(), values):
+                out[position] = value
+        return out
+
+
+class Entity:
+    """A generated record type: an ordered list of columns and helper vars"""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = list(fields)
+        self.fieldnames = [field.name for field in self.fields if not isinstance(field, Var)]
+        self._compiled = None
+        self._profiled = None
+        self.source = None
+
+    def compile(self, profiled=False):
+        """Compile the spec into a row generator function (cached)
+
+        The profiled variant takes a profiling.Profile as an extra argument and
+        charges each field the time spent computing it.
+        """
+        if self._compiled is None and not profiled:
+            self.source, self._compiled = self._compile()
+        elif self._profiled is None and profiled:
+            self._profiled = self._compile(profiled=True)[1]
+        return self._profiled if profiled else self._compiled
+
+    def _compile(self, profiled=False):
+        gen = _CodeGen(self.fields, profiled=profiled)
+        outputs = [(name, gen.ref(name)) for name in self.fieldnames]
+        row = ", ".join(f"{name!r}: {local}" for name, local in outputs)
+        params = [f"    {local} = params.get({name!r}, {gen.param_defaults[name]})" if name in gen.param_defaults
+                  else f"    {local} = params[{name!r}]" for name, local in gen.params.items()]
+        header = [
+            "    _choice = rng.choice",
+            "    _randint = rng.randint",
+            "    _uniform = rng.uniform",
+            "    _random = rng.random",
+            "    _randrange = rng.randrange",
+            "    _as_of = as_of.toordinal()",
+            *params,
+        ]
+        loop = "    for _i, _parent in zip(range(start_index, start_index + count), parents):"
+        if not profiled:
+            lines = [
+                "def _rows(rng, count, start_index, as_of, parents, params):",
+                *header,
+                loop,
+                *gen.lines,
+                f"        yield {{{row}}}",
+            ]
+        else:
+            # The clock restarts at the top of each row, so time spent by the
+            # consumer between rows is not charged to any field
+            costs = list(gen.costs.items()) + [("(row)", "_crow")]
+            lines = [
+                "def _rows(rng, count, start_index, as_of, parents, params, _profile):",
+                *header,
+                f"    {' = '.join(local for _, local in costs)} = 0.0",
+                "    _n = 0",
+                "    try:",
+                "    " + loop,
+                "            _last = _clock()",
+                *("    " + line for line in gen.lines),
+                f"            _row = {{{row}}}",
+                "            _crow += _clock() - _last",
+                "            _n += 1",
+                "            yield _row",
+                "    finally:",
+                *(f"        _profile.add({self.name!r}, {name!r}, {local}, _n)" for name, local in costs),
+            ]
+        source = "\n".join(lines)
+        namespace = dict(gen.namespace, _fromordinal=date.fromordinal, _clock=perf_counter)
+        exec(compile(source, f"<fieldgen {self.name}>", "exec"), namespace)
+        return source, namespace["_rows"]
+
+    def iter_rows(self, count, rng=random, start_index=0, as_of=None, parents=None, **params):
+        """Yield count rows, or one row per parent row when parents is given
+
+        parents may be any iterable of dict rows (count=None consumes them all);
+        rng is any random.Random-compatible source and params supplies Param values.
+        """
+        if parents is None:
+            parents = repeat(None)
+        elif count is None:
+            count = sys.maxsize
+        profile = profiling.active()
+        if profile is not None:
+            return self.compile(profiled=True)(rng, count, start_index, as_of or date.today(), parents, params,
+                                               profile)
+        return self.compile()(rng, count, start_index, as_of or date.today(), parents, params)
+
+    def iter_batches(self, count, seed=None, chunk_size=10000, start_index=0, as_of=None,
+                     parents=None, **params):
+        """Yield rows from the NumPy batch engine, one chunk of columns at a time
+
+        seed may be an int or an existing numpy Generator. parents must be a list
+        (or other sliceable sequence) when given.
+        """
+        profile = profiling.active()
+        fieldnames = self.fieldnames
+        for ctx, columns in self._iter_batch_columns(count, seed, chunk_size, start_index, as_of, parents,
+                                                     params):
+            start = perf_counter()
+            columns = [ctx.as_list(values) for values in columns]
+            rows = [dict(zip(fieldnames, values)) for values in zip(*columns)]
+            if profile is not None:
+                profile.add(ctx.entity, "(row)", perf_counter() - start, ctx.n)
+            yield from rows
+
+    def table(self, count, seed=None, chunk_size=10000, start_index=0, as_of=None, parents=None, **params):
+        """count rows from the NumPy batch engine as a records.RecordTable
+
+        The batch columns go straight into the table's typed columns, without
+        building a dict per row. Arguments are as for iter_batches().
+        """
+        from records import RecordTable
+
+        table = RecordTable(self.fieldnames)
+        for _, columns in self._iter_batch_columns(count, seed, chunk_size, start_index, as_of, parents, params):
+            table.extend_columns(columns)
+        return table
+
+    def _iter_batch_columns(self, count, seed, chunk_size, start_index, as_of, parents, params):
+        """Yield (context, output columns) for each chunk of the batch engine"""
+        import numpy as np  # Only the batch engine needs NumPy
+
+        rng = np.random.default_rng(seed)
+        as_of = as_of or date.today()
+        if parents is not None:
+            count = len(parents)
+        fields = {field.name: field for field in self.fields}
+        profile = profiling.active()
+        for offset in range(0, count, chunk_size):
+            size = min(chunk_size, count - offset)
+            index = np.arange(start_index + offset, start_index + offset + size)
+            chunk_parents = list(parents[offset:offset + size]) if parents is not None else None
+            ctx = _BatchContext(np, fields, rng, index, as_of, chunk_parents, params,
+                                entity=f"{self.name} (batch)", profile=profile)
+            yield ctx, [ctx.column(name) for name in self.fieldnames]
@@ -4,10 +4,16 @@ Generate Distributor Contact Data for Distributor Accounts
 This script creates realistic distributor contact information to be associated with distributor accounts
 """
 
-import csv
+import argparse
 import random
-from datetime import datetime, timedelta
-import os
+from functools import partial, reduce
+
+from account_join import ACCOUNT_ID, AccountSource, iter_children
+from csv_stream import DEFAULT_CHUNK_SIZE, RunningStats, stream_to_csv
+from fieldgen import Choice, Column, DaysAgo, Email, Entity, Jitter, Parent, Phone, Ref
+from records import RecordTable
+from sharding import add_sharding_arguments, derive_seed, output_files, resolve_run, run_sharded, saved_label
+from uniqueness import CONTACT_EMAIL_LANES, UniqueValues, unique_column_in_files
 
 # Distributor-specific data
 DISTRIBUTOR_FIRST_NAMES = [
@@ -61,151 +67,162 @@ DISTRIBUTOR_DESCRIPTIONS = [
     "Customer success manager focused on long-term client partnerships"
 ]
 
-def generate_phone():
-    """Generate a realistic phone number"""
-    area_codes = ["319", "515", "641", "712", "563"]
-    area_code = random.choice(area_codes)
-    prefix = str(random.randint(200, 999))
-    suffix = str(random.randint(1000, 9999))
-    return f"({area_code}) {prefix}-{suffix}"
-
-def generate_email(first_name, last_name, company_name):
-    """Generate a realistic email address"""
-    email_domains = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com"]
-    domain = random.choice(email_domains)
-    
-    # Clean company name for email
-    clean_company = company_name.replace(" ", "").replace(",", "").replace(".", "").lower()
-    
-    email_patterns = [
-        f"{first_name.lower()}.{last_name.lower()}@{domain}",
-        f"{first_name.lower()}{last_name.lower()}@{domain}",
-        f"{first_name.lower()}_{last_name.lower()}@{domain}",
-        f"{first_name.lower()}{random.randint(1, 99)}@{domain}",
-        f"{first_name.lower()}.{last_name.lower()}@{clean_company}.com",
-        f"{first_name.lower()}.{last_name.lower()}@company.com"
-    ]
-    
-    return random.choice(email_patterns)
+# Email address patterns; {company} is the account name squashed into a domain
+EMAIL_PATTERNS = [
+    "{first}.{last}@{domain}", "{first}{last}@{domain}", "{first}_{last}@{domain}",
+    "{first}{n}@{domain}", "{first}.{last}@{company}.com", "{first}.{last}@company.com"
+]
+
+# Lane of the contact email space this file keeps to, so no email is also in farmer_contacts.csv
+EMAIL_LANE = 1
+
+# The distributor Contact record; it takes its account, address and location from
+# the parent distributor Account row it is joined to
+DISTRIBUTOR_CONTACT = Entity("Distributor Contact", [
+    Column("Account Name", Parent("Account Name")),
+    Column("Account ID", Parent(ACCOUNT_ID)),
+    Column("First Name", Choice(DISTRIBUTOR_FIRST_NAMES)),
+    Column("Last Name", Choice(DISTRIBUTOR_LAST_NAMES)),
+    Column("Title", Choice(DISTRIBUTOR_TITLES)),
+    Column("Department", Choice(DISTRIBUTOR_DEPARTMENTS)),
+    Column("Phone", Phone(["319", "515", "641", "712", "563"])),
+    Column("Email", Email(Ref("First Name"), Ref("Last Name"), Parent("Account Name"), EMAIL_PATTERNS)),
+    Column("Mailing Street", Parent("Billing Street")),
+    Column("Mailing City", Parent("Billing City")),
+    Column("Mailing State", Parent("Billing State")),
+    Column("Mailing Postal Code", Parent("Billing Postal Code")),
+    Column("Mailing Country", "United States"),
+    # Same coordinates as the account with slight variation
+    Column("Mailing Latitude", Jitter(Parent("Billing Latitude"), 0.01)),
+    Column("Mailing Longitude", Jitter(Parent("Billing Longitude"), 0.01)),
+    Column("Description", Choice(DISTRIBUTOR_DESCRIPTIONS)),
+    Column("Lead Source", Choice(["Web", "Phone Inquiry", "Referral", "Trade Show", "Cold Call", "Partner"])),
+    Column("Status", "Active"),
+    Column("Created Date", DaysAgo(30, 1000)),
+    Column("Last Activity Date", DaysAgo(1, 90)),
+])
+
+# Sample distributor accounts used if data/agriculture_distributors.csv doesn't exist
+SAMPLE_DISTRIBUTOR_ACCOUNTS = [
+    {'Account Name': 'Plains Enterprises', 'Account ID': '001KY00000E1Q82YAF', 'Billing Street': '1200 Main St',
+     'Billing City': 'Des Moines', 'Billing State': 'Iowa', 'Billing Postal Code': '50309',
+     'Billing Latitude': 41.5868, 'Billing Longitude': -93.625},
+    {'Account Name': 'Southern Inc', 'Account ID': '001KY00000E1Q83YAF', 'Billing Street': '845 Oak Ave',
+     'Billing City': 'Dallas', 'Billing State': 'Texas', 'Billing Postal Code': '75201',
+     'Billing Latitude': 32.7767, 'Billing Longitude': -96.797},
+    {'Account Name': 'Harvest Enterprises', 'Account ID': '001KY00000E1Q84YAF', 'Billing Street': '310 Maple Dr',
+     'Billing City': 'Fresno', 'Billing State': 'California', 'Billing Postal Code': '93721',
+     'Billing Latitude': 36.7378, 'Billing Longitude': -119.7871},
+    {'Account Name': 'Farm Supply Co', 'Account ID': '001KY00000E1Q89YAF', 'Billing Street': '5510 Lincoln Blvd',
+     'Billing City': 'Springfield', 'Billing State': 'Illinois', 'Billing Postal Code': '62701',
+     'Billing Latitude': 39.7817, 'Billing Longitude': -89.6501},
+    {'Account Name': 'Grain Solutions', 'Account ID': '001KY00000E1Q8AYAV', 'Billing Street': '77 Jefferson Way',
+     'Billing City': 'Orlando', 'Billing State': 'Florida', 'Billing Postal Code': '32801',
+     'Billing Latitude': 28.5383, 'Billing Longitude': -81.3792}
+]
+
+def load_distributor_accounts():
+    """Open the distributor accounts that contacts are associated with
+
+    Returns an AccountSource that streams data/agriculture_distributors.csv (falling back to
+    SAMPLE_DISTRIBUTOR_ACCOUNTS), giving each account a stable ID.
+    """
+    return AccountSource('data/agriculture_distributors.csv', SAMPLE_DISTRIBUTOR_ACCOUNTS)
 
 def generate_distributor_contact_data(num_records=50):
-    """Generate distributor contact data"""
-    contacts = []
-    
-    # Get existing distributor accounts to associate with
-    distributor_accounts = []
-    try:
-        with open('data/agriculture_distributors.csv', 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                distributor_accounts.append({
-                    'Account Name': row['Account Name'],
-                    'Account ID': f"001{random.randint(100000000, 999999999)}"  # Mock ID
-                })
-    except FileNotFoundError:
-        # Create sample distributor accounts if file doesn't exist
-        distributor_accounts = [
-            {'Account Name': 'Plains Enterprises', 'Account ID': '001KY00000E1Q82YAF'},
-            {'Account Name': 'Southern Inc', 'Account ID': '001KY00000E1Q83YAF'},
-            {'Account Name': 'Harvest Enterprises', 'Account ID': '001KY00000E1Q84YAF'},
-            {'Account Name': 'Farm Supply Co', 'Account ID': '001KY00000E1Q89YAF'},
-            {'Account Name': 'Grain Solutions', 'Account ID': '001KY00000E1Q8AYAV'}
-        ]
-    
-    for i in range(num_records):
-        # Select a distributor account
-        distributor_account = random.choice(distributor_accounts)
-        
-        # Generate contact details
-        first_name = random.choice(DISTRIBUTOR_FIRST_NAMES)
-        last_name = random.choice(DISTRIBUTOR_LAST_NAMES)
-        title = random.choice(DISTRIBUTOR_TITLES)
-        department = random.choice(DISTRIBUTOR_DEPARTMENTS)
-        
-        # Generate contact info
-        phone = generate_phone()
-        email = generate_email(first_name, last_name, distributor_account['Account Name'])
-        
-        # Generate dates
-        created_date = datetime.now() - timedelta(days=random.randint(30, 1000))
-        last_activity = datetime.now() - timedelta(days=random.randint(1, 90))
-        
-        # Generate mailing address (same as distributor address with slight variations)
-        states = ["California", "Texas", "Iowa", "Nebraska", "Minnesota", "Illinois", "Wisconsin", "Indiana", "Ohio", "Michigan"]
-        state = random.choice(states)
-        
-        street_numbers = [str(random.randint(100, 9999)), str(random.randint(10000, 99999))]
-        street_names = ["Main St", "Oak Ave", "Pine Blvd", "Maple Dr", "Cedar Ln", "Elm Way", "Washington St", "Jefferson Ave"]
-        
-        street_address = f"{random.choice(street_numbers)} {random.choice(street_names)}"
-        city = f"City{random.randint(1, 50)}"
-        zip_code = str(random.randint(10000, 99999))
-        
-        # Generate coordinates (slightly different from distributor coordinates)
-        base_lat = random.uniform(25.0, 50.0)
-        base_lng = random.uniform(-125.0, -65.0)
-        
-        contact = {
-            "Account Name": distributor_account['Account Name'],
-            "Account ID": distributor_account['Account ID'],
-            "First Name": first_name,
-            "Last Name": last_name,
-            "Title": title,
-            "Department": department,
-            "Phone": phone,
-            "Email": email,
-            "Mailing Street": street_address,
-            "Mailing City": city,
-            "Mailing State": state,
-            "Mailing Postal Code": zip_code,
-            "Mailing Country": "United States",
-            "Mailing Latitude": round(base_lat + random.uniform(-0.1, 0.1), 6),
-            "Mailing Longitude": round(base_lng + random.uniform(-0.1, 0.1), 6),
-            "Description": random.choice(DISTRIBUTOR_DESCRIPTIONS),
-            "Lead Source": random.choice(["Web", "Phone Inquiry", "Referral", "Trade Show", "Cold Call", "Partner"]),
-            "Status": "Active",
-            "Created Date": created_date.strftime("%Y-%m-%d"),
-            "Last Activity Date": last_activity.strftime("%Y-%m-%d")
-        }
-        
-        contacts.append(contact)
-    
-    return contacts
+    """Generate distributor contact data, as a column-backed RecordTable"""
+    return RecordTable.from_rows(iter_distributor_contact_data(num_records), DISTRIBUTOR_CONTACT.fieldnames)
+
+def iter_distributor_contact_data(num_records=50, rng=random, accounts=None, as_of=None,
+                                  start_index=0, total_records=None):
+    """Yield distributor contact rows one at a time so callers can stream them to disk
 
-def save_to_csv(data, filename):
-    """Save data to CSV file"""
-    if not data:
+    Contacts come out grouped by account, in account file order. rng is any
+    random.Random-compatible source, accounts defaults to load_distributor_accounts(),
+    and generated dates count back from as_of (default today). A shard passes its
+    start_index and the run's total_records so it only joins to its share of the
+    accounts.
+    """
+    if accounts is None:
+        accounts = load_distributor_accounts()
+    return iter_children(DISTRIBUTOR_CONTACT, accounts, num_records, rng=rng, as_of=as_of,
+                         start_index=start_index, total_records=total_records)
+
+def save_to_csv(data, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Save data (a list or any iterable of rows) to CSV file in fixed-size chunks"""
+    count = stream_to_csv(data, filename, chunk_size=chunk_size)
+    if not count:
         print("❌ No data to save")
-        return
+        return count
     
-    fieldnames = data[0].keys()
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
-    
-    print(f"✅ Generated {len(data)} distributor contact records")
+    print(f"✅ Generated {count} distributor contact records")
     print(f"📁 Saved to: {filename}")
+    return count
+
+def generate_shard(count, seed, start_index, filenames, accounts=None, total_records=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE, as_of=None, emails=None):
+    """Generate one shard of distributor contacts into its CSV and return its summary stats
+
+    emails, a uniqueness.UniqueValues, makes the Email column unique as rows stream past.
+    """
+    stats = RunningStats(distinct=["Mailing State", "Account Name", "Title"])
+    contacts = iter_distributor_contact_data(count, rng=random.Random(seed), accounts=accounts, as_of=as_of,
+                                             start_index=start_index, total_records=total_records)
+    if emails is not None:
+        contacts = emails.unique_rows(contacts, "Email")
+    stream_to_csv(stats.observe(contacts), filenames[0], chunk_size=chunk_size)
+    return stats
 
 def main():
     """Main function to generate distributor contact data"""
+    parser = argparse.ArgumentParser(description="Generate distributor Contact data")
+    parser.add_argument("--records", type=int, default=50, help="number of contact records to generate")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows generated and written per chunk")
+    add_sharding_arguments(parser)
+    args = parser.parse_args()
+    master_seed, as_of = resolve_run(args)
+    
     print("🏢 Generating Distributor Contact Data...")
     
-    # Generate distributor contacts
-    distributor_contacts = generate_distributor_contact_data(50)
+    print(f"🎲 Master seed: {master_seed} (as of {as_of})")
+    
+    # Every shard joins to the same distributor accounts and stable IDs; count them once here
+    accounts = load_distributor_accounts()
+    print(f"🔗 Joining to {len(accounts)} distributor accounts")
     
-    # Save to CSV
-    save_to_csv(distributor_contacts, 'data/distributor_contacts.csv')
+    # One filter sized for the whole run keeps emails unique. A single shard
+    # checks them as they stream; separate processes can't share it, so
+    # sharded output is checked in one pass over the parts afterwards
+    emails = UniqueValues(args.records, seed=derive_seed(master_seed, "emails"), lane=EMAIL_LANE,
+                          lanes=CONTACT_EMAIL_LANES)
+    sharded = (args.shards or args.workers) > 1
+
+    # Stream distributor contacts straight to CSV (one part per shard), collecting summary stats on the way
+    filename = 'data/distributor_contacts.csv'
+    finish = partial(unique_column_in_files, output_files(filename, args), "Email", emails,
+                     chunk_size=args.chunk_size) if sharded else None
+    shard_stats = run_sharded(generate_shard, args.records, [filename], master_seed,
+                              workers=args.workers, shards=args.shards, keep_parts=args.keep_parts,
+                              accounts=accounts, total_records=args.records, chunk_size=args.chunk_size,
+                              as_of=as_of, emails=None if sharded else emails,
+                              finish=finish)
+    stats = reduce(RunningStats.merge, shard_stats)
+    if not stats.count:
+        print("❌ No data to save")
+        return
+    print(f"✅ Generated {stats.count} distributor contact records")
+    print(f"📁 Saved to: {saved_label(filename, args)}")
+    print(f"📧 Unique emails: {emails.report()}")
     
     # Display statistics
-    print(f"📍 States covered: {len(set(c['Mailing State'] for c in distributor_contacts))}")
-    print(f"🏢 Distributor accounts associated: {len(set(c['Account Name'] for c in distributor_contacts))}")
-    print(f"👔 Distributor titles: {len(set(c['Title'] for c in distributor_contacts))}")
+    print(f"📍 States covered: {stats.distinct('Mailing State')}")
+    print(f"🏢 Distributor accounts associated: {stats.distinct('Account Name')}")
+    print(f"👔 Distributor titles: {stats.distinct('Title')}")
     
     # Show sample data
     print("\n📋 Sample Distributor Contacts:")
-    for i, contact in enumerate(distributor_contacts[:3]):
+    for i, contact in enumerate(stats.samples):
         print(f"\n{i+1}. {contact['First Name']} {contact['Last Name']}")
         print(f"   🏢 Distributor: {contact['Account Name']}")
         print(f"   💼 Title: {contact['Title']}")
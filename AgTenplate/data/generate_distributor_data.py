@@ -4,19 +4,22 @@ Generate Agriculture Company Distributor Data for Salesforce Account Object
 Creates realistic distributor data with US addresses and geo coordinates
 """
 
-import csv
+import argparse
 import random
-from datetime import datetime, timedelta
-
-# US States with major agriculture regions
-US_STATES = [
-    "California", "Iowa", "Illinois", "Nebraska", "Minnesota", "Indiana", 
-    "Kansas", "Ohio", "Texas", "Wisconsin", "Missouri", "North Dakota",
-    "South Dakota", "Michigan", "Kentucky", "Tennessee", "Arkansas",
-    "Georgia", "North Carolina", "South Carolina", "Florida", "Alabama",
-    "Mississippi", "Louisiana", "Oklahoma", "Colorado", "Washington",
-    "Oregon", "Idaho", "Montana", "Wyoming", "Utah", "Arizona", "New Mexico"
-]
+from functools import reduce
+
+from csv_stream import DEFAULT_CHUNK_SIZE, RunningStats, stream_to_csv
+from fieldgen import (
+    CUSTOMER_PRIORITY_WEIGHTS, RATING_WEIGHTS, SLA_WEIGHTS, STATE_WEIGHTS, UPSELL_OPPORTUNITY_WEIGHTS,
+    Choice, Column, DaysAgo, Entity, Format, Item, Jitter, Lower, Phone, Place, RandInt, Ref, Var,
+    UniqueName, Website, Weighted, ZipCode,
+)
+from records import RecordTable
+from schema import load_schema
+from sharding import add_sharding_arguments, resolve_run, run_sharded, saved_label
+
+# Account fields from the force-app metadata; custom field columns take their headers from it
+ACCOUNT = load_schema()["Account"]
 
 # Major cities in agriculture states with approximate coordinates
 CITIES_DATA = {
@@ -76,6 +79,18 @@ COMPANY_SUFFIXES = [
     "Enterprises", "Group", "Inc.", "LLC", "Corp.", "Company"
 ]
 
+# Regional names that set larger distributor sets apart (none is also a prefix)
+COMPANY_REGIONS = [
+    "Heartland", "Tri-State", "Central", "Northern", "Coastal", "Mountain", "Delta", "Gulf", "Lakes", "Pacific"
+]
+
+# Shapes of distributor names, mixed in proportion to their size: "Agri Supply Co.", "Agri Heartland Supply Co.", ...
+DISTRIBUTOR_NAME_TIERS = [
+    [COMPANY_PREFIXES, COMPANY_SUFFIXES],
+    [COMPANY_PREFIXES, COMPANY_REGIONS, COMPANY_SUFFIXES],
+    [COMPANY_REGIONS, COMPANY_PREFIXES, COMPANY_SUFFIXES],
+]
+
 # Street names
 STREET_NAMES = [
     "Main", "Oak", "Maple", "Pine", "Cedar", "Elm", "Washington", "Lincoln",
@@ -85,126 +100,98 @@ STREET_NAMES = [
 
 STREET_TYPES = ["St", "Ave", "Blvd", "Dr", "Ln", "Rd", "Way", "Pl", "Ct"]
 
-def generate_phone():
-    """Generate a realistic US phone number"""
-    area_codes = ["515", "319", "563", "712", "641", "319", "515", "712", "641", "319"]
-    area = random.choice(area_codes)
-    prefix = str(random.randint(200, 999))
-    suffix = str(random.randint(1000, 9999))
-    return f"({area}) {prefix}-{suffix}"
+AREA_CODES = ["515", "319", "563", "712", "641", "319", "515", "712", "641", "319"]
 
-def generate_website(company_name):
-    """Generate a website URL based on company name"""
-    clean_name = company_name.replace(" ", "").replace(".", "").replace(",", "").lower()
-    return f"www.{clean_name}.com"
+# The distributor Account record, one column per CSV column in agriculture_distributors.csv order
+DISTRIBUTOR = Entity("Distributor", [
+    Var("state", Weighted(STATE_WEIGHTS)),
+    # Known city of the state, or a numbered city anywhere in the US
+    Var("city", Place(Ref("state"), CITIES_DATA, "City{}", (25.0, 49.0), (-125.0, -66.0))),
+    Column("Account Name", UniqueName(DISTRIBUTOR_NAME_TIERS, key="distributor names")),
+    Column("Record Type", "Distributor"),
+    Column("Record Type ID", "012KY0000001OFdYAM"),
+    ACCOUNT.column("Agriculture_Type__c", Choice(COMPANY_TYPES)),
+    Column("Industry", "Agriculture"),
+    Column("Billing Street", Format("{} {} {}", RandInt(100, 9999), Choice(STREET_NAMES),
+                                    Choice(STREET_TYPES))),
+    Column("Billing City", Item(Ref("city"), 0)),
+    Column("Billing State", Ref("state")),
+    Column("Billing Postal Code", ZipCode()),
+    Column("Billing Country", "United States"),
+    Column("Phone", Phone(AREA_CODES)),
+    Column("Website", Website(Ref("Account Name"))),
+    Column("Annual Revenue", RandInt(1000000, 50000000)),
+    Column("Number of Employees", RandInt(10, 500)),
+    Column("Description", Format("Leading {} serving the {} region", Lower(Ref("Agriculture Type")),
+                                 Ref("state"))),
+    Column("Rating", Weighted(RATING_WEIGHTS)),
+    Column("Customer Priority", Weighted(CUSTOMER_PRIORITY_WEIGHTS)),
+    Column("SLA", Weighted(SLA_WEIGHTS)),
+    Column("Upsell Opportunity", Weighted(UPSELL_OPPORTUNITY_WEIGHTS)),
+    Column("Active", "Yes"),
+    Column("Created Date", DaysAgo(1, 365 * 3)),
+    Column("Last Activity Date", DaysAgo(1, 90)),
+    Column("Billing Latitude", Jitter(Item(Ref("city"), 1), 0.1)),
+    Column("Billing Longitude", Jitter(Item(Ref("city"), 2), 0.1)),
+])
 
 def generate_distributor_data(num_records=50):
-    """Generate distributor data for Salesforce Account object"""
-    
-    distributors = []
-    
-    for i in range(num_records):
-        # Generate company name
-        prefix = random.choice(COMPANY_PREFIXES)
-        suffix = random.choice(COMPANY_SUFFIXES)
-        company_name = f"{prefix} {suffix}"
-        
-        # Select state and city
-        state = random.choice(US_STATES)
-        if state in CITIES_DATA:
-            city, lat, lng = random.choice(CITIES_DATA[state])
-        else:
-            # Generate approximate coordinates for other states
-            lat = random.uniform(25.0, 49.0)  # US latitude range
-            lng = random.uniform(-125.0, -66.0)  # US longitude range
-            city = f"City{i+1}"
-        
-        # Generate address
-        street_num = random.randint(100, 9999)
-        street_name = random.choice(STREET_NAMES)
-        street_type = random.choice(STREET_TYPES)
-        street_address = f"{street_num} {street_name} {street_type}"
-        
-        # Generate zip code
-        zip_code = str(random.randint(10000, 99999))
-        
-        # Generate phone and website
-        phone = generate_phone()
-        website = generate_website(company_name)
-        
-        # Generate other fields
-        company_type = random.choice(COMPANY_TYPES)
-        annual_revenue = random.randint(1000000, 50000000)
-        employees = random.randint(10, 500)
-        
-        # Generate dates
-        created_date = datetime.now() - timedelta(days=random.randint(1, 365*3))
-        last_activity = datetime.now() - timedelta(days=random.randint(1, 90))
-        
-        distributor = {
-            "Account Name": company_name,
-            "Record Type": "Distributor",
-            "Record Type ID": "012KY0000001OFdYAM",
-            "Agriculture Type": company_type,
-            "Industry": "Agriculture",
-            "Billing Street": street_address,
-            "Billing City": city,
-            "Billing State": state,
-            "Billing Postal Code": zip_code,
-            "Billing Country": "United States",
-            "Phone": phone,
-            "Website": website,
-            "Annual Revenue": annual_revenue,
-            "Number of Employees": employees,
-            "Description": f"Leading {company_type.lower()} serving the {state} region",
-            "Rating": random.choice(["Hot", "Warm", "Cold"]),
-            "Customer Priority": random.choice(["High", "Medium", "Low"]),
-            "SLA": random.choice(["Gold", "Silver", "Bronze"]),
-            "Upsell Opportunity": random.choice(["Maybe", "No", "Yes"]),
-            "Active": "Yes",
-            "Created Date": created_date.strftime("%Y-%m-%d"),
-            "Last Activity Date": last_activity.strftime("%Y-%m-%d"),
-            "Billing Latitude": round(lat + random.uniform(-0.1, 0.1), 6),
-            "Billing Longitude": round(lng + random.uniform(-0.1, 0.1), 6)
-        }
-        
-        distributors.append(distributor)
-    
-    return distributors
+    """Generate distributor data for Salesforce Account object, as a column-backed RecordTable"""
+    return RecordTable.from_rows(iter_distributor_data(num_records), DISTRIBUTOR.fieldnames)
 
-def save_to_csv(data, filename):
-    """Save data to CSV file"""
-    if not data:
-        return
-    
-    fieldnames = data[0].keys()
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
+def iter_distributor_data(num_records=50, rng=random, start_index=0, as_of=None, name_seed=None):
+    """Yield distributor rows one at a time so callers can stream them to disk
+
+    rng is any random.Random-compatible source, start_index numbers rows when
+    generating a shard, name_seed (the run's master seed) picks the order of
+    distributor names, and generated dates count back from as_of (default today).
+    """
+    return DISTRIBUTOR.iter_rows(num_records, rng=rng, start_index=start_index, as_of=as_of,
+                                 name_seed=name_seed)
+
+def save_to_csv(data, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Save data (a list or any iterable of rows) to CSV file in fixed-size chunks"""
+    return stream_to_csv(data, filename, chunk_size=chunk_size)
+
+def generate_shard(count, seed, start_index, filenames, chunk_size=DEFAULT_CHUNK_SIZE, as_of=None,
+                   name_seed=None):
+    """Generate one shard of distributor rows into its CSV and return its summary stats"""
+    stats = RunningStats(distinct=["Billing State", "Agriculture Type"])
+    distributors = iter_distributor_data(count, rng=random.Random(seed), start_index=start_index,
+                                         as_of=as_of, name_seed=name_seed)
+    save_to_csv(stats.observe(distributors), filenames[0], chunk_size=chunk_size)
+    return stats
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate agriculture distributor Account data")
+    parser.add_argument("--records", type=int, default=50, help="number of distributor records to generate")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows generated and written per chunk")
+    add_sharding_arguments(parser)
+    args = parser.parse_args()
+    master_seed, as_of = resolve_run(args)
+
     print("Generating Agriculture Distributor Data...")
+    print(f"🎲 Master seed: {master_seed} (as of {as_of})")
     
-    # Generate 50 distributor records
-    distributors = generate_distributor_data(50)
-    
-    # Save to CSV
+    # Stream distributor records straight to CSV (one part per shard), collecting summary stats on the way
     filename = "data/agriculture_distributors.csv"
-    save_to_csv(distributors, filename)
+    shard_stats = run_sharded(generate_shard, args.records, [filename], master_seed,
+                              workers=args.workers, shards=args.shards, keep_parts=args.keep_parts,
+                              chunk_size=args.chunk_size, as_of=as_of, name_seed=master_seed)
+    stats = reduce(RunningStats.merge, shard_stats)
     
-    print(f"✅ Generated {len(distributors)} distributor records")
-    print(f"📁 Saved to: {filename}")
-    print(f"📍 States covered: {len(set(d['Billing State'] for d in distributors))}")
-    print(f"🏢 Company types: {len(set(d['Agriculture Type'] for d in distributors))}")
+    print(f"✅ Generated {stats.count} distributor records")
+    print(f"📁 Saved to: {saved_label(filename, args)}")
+    print(f"📍 States covered: {stats.distinct('Billing State')}")
+    print(f"🏢 Company types: {stats.distinct('Agriculture Type')}")
     
     # Show sample data
     print("\n📋 Sample Records:")
-    for i, dist in enumerate(distributors[:3]):
+    for i, dist in enumerate(stats.samples):
         print(f"\n{i+1}. {dist['Account Name']}")
         print(f"   📍 {dist['Billing City']}, {dist['Billing State']}")
         print(f"   🏢 {dist['Agriculture Type']}")
         print(f"   📞 {dist['Phone']}")
         print(f"   🌐 {dist['Website']}")
-        print(f"   📍 Coordinates: {dist['Billing Latitude']}, {dist['Billing Longitude']}") 
\ No newline at end of file
+        print(f"   📍 Coordinates: {dist['Billing Latitude']}, {dist['Billing Longitude']}")
@@ -4,19 +4,23 @@ Generate Agriculture Farm Data for Salesforce Account Object
 Creates realistic farm data with US addresses and geo coordinates
 """
 
-import csv
+import argparse
 import random
-from datetime import datetime, timedelta
+from functools import reduce
 
-# US States with major agriculture regions
-US_STATES = [
-    "California", "Iowa", "Illinois", "Nebraska", "Minnesota", "Indiana", 
-    "Kansas", "Ohio", "Texas", "Wisconsin", "Missouri", "North Dakota",
-    "South Dakota", "Michigan", "Kentucky", "Tennessee", "Arkansas",
-    "Georgia", "North Carolina", "South Carolina", "Florida", "Alabama",
-    "Mississippi", "Louisiana", "Oklahoma", "Colorado", "Washington",
-    "Oregon", "Idaho", "Montana", "Wyoming", "Utah", "Arizona", "New Mexico"
-]
+from csv_stream import DEFAULT_CHUNK_SIZE, RunningStats, stream_to_csv
+from fieldgen import (
+    ACCOUNT_NAME_MODIFIERS, CERTIFICATION_WEIGHTS, CUSTOMER_PRIORITY_WEIGHTS, RATING_WEIGHTS, SLA_WEIGHTS, SOIL_TYPE_WEIGHTS,
+    STATE_WEIGHTS, UPSELL_OPPORTUNITY_WEIGHTS, WATER_SOURCE_WEIGHTS, Chance, Choice, Column, DaysAgo,
+    Entity, Format, Item, Jitter, Lower, OneOf, Phone, Place, RandInt, Ref, RowNumber, Var, Website,
+    UniqueName, Weighted, WeightedBy, ZipCode, emphasize,
+)
+from records import RecordTable
+from schema import load_schema
+from sharding import add_sharding_arguments, resolve_run, run_sharded, saved_label
+
+# Account fields from the force-app metadata; custom field columns take their headers from it
+ACCOUNT = load_schema()["Account"]
 
 # Major farming regions with approximate coordinates
 FARM_REGIONS = {
@@ -64,6 +68,56 @@ FARM_TYPES = [
     "Poultry Farm", "Hog Farm", "Mixed Crop Farm", "Organic Farm", "Grain Farm"
 ]
 
+# Nationwide mix of farm types, led by beef cattle like the real one
+FARM_TYPE_WEIGHTS = {
+    "Dairy Farm": 4, "Cattle Ranch": 30, "Corn Farm": 10, "Soybean Farm": 8, "Wheat Farm": 5,
+    "Cotton Farm": 2, "Rice Farm": 1, "Vegetable Farm": 5, "Fruit Orchard": 4, "Vineyard": 2,
+    "Poultry Farm": 4, "Hog Farm": 3, "Mixed Crop Farm": 8, "Organic Farm": 2, "Grain Farm": 10,
+}
+
+# What each state is known for; its farms are SPECIALTY_FACTOR times likelier to be of these types
+STATE_SPECIALTIES = {
+    "California": ["Fruit Orchard", "Vineyard", "Vegetable Farm", "Dairy Farm"],
+    "Iowa": ["Corn Farm", "Soybean Farm", "Hog Farm"],
+    "Illinois": ["Corn Farm", "Soybean Farm"],
+    "Nebraska": ["Corn Farm", "Cattle Ranch"],
+    "Minnesota": ["Corn Farm", "Soybean Farm", "Dairy Farm", "Hog Farm"],
+    "Indiana": ["Corn Farm", "Soybean Farm", "Hog Farm"],
+    "Kansas": ["Wheat Farm", "Cattle Ranch"],
+    "Ohio": ["Corn Farm", "Soybean Farm", "Dairy Farm"],
+    "Texas": ["Cattle Ranch", "Cotton Farm"],
+    "Wisconsin": ["Dairy Farm"],
+    "Missouri": ["Cattle Ranch", "Soybean Farm"],
+    "North Dakota": ["Wheat Farm", "Soybean Farm", "Grain Farm"],
+    "South Dakota": ["Corn Farm", "Cattle Ranch", "Wheat Farm"],
+    "Michigan": ["Dairy Farm", "Fruit Orchard", "Vegetable Farm"],
+    "Kentucky": ["Cattle Ranch", "Poultry Farm"],
+    "Tennessee": ["Cattle Ranch", "Soybean Farm"],
+    "Arkansas": ["Rice Farm", "Poultry Farm", "Soybean Farm"],
+    "Georgia": ["Poultry Farm", "Cotton Farm", "Fruit Orchard"],
+    "North Carolina": ["Hog Farm", "Poultry Farm"],
+    "South Carolina": ["Poultry Farm", "Fruit Orchard"],
+    "Florida": ["Fruit Orchard", "Vegetable Farm", "Cattle Ranch"],
+    "Alabama": ["Poultry Farm", "Cattle Ranch"],
+    "Mississippi": ["Poultry Farm", "Cotton Farm", "Rice Farm"],
+    "Louisiana": ["Rice Farm", "Cotton Farm"],
+    "Oklahoma": ["Cattle Ranch", "Wheat Farm"],
+    "Colorado": ["Cattle Ranch", "Wheat Farm"],
+    "Washington": ["Fruit Orchard", "Wheat Farm", "Vineyard"],
+    "Oregon": ["Vineyard", "Fruit Orchard", "Vegetable Farm"],
+    "Idaho": ["Dairy Farm", "Vegetable Farm", "Wheat Farm"],
+    "Montana": ["Wheat Farm", "Cattle Ranch"],
+    "Wyoming": ["Cattle Ranch"],
+    "Utah": ["Cattle Ranch", "Dairy Farm"],
+    "Arizona": ["Vegetable Farm", "Cattle Ranch", "Cotton Farm"],
+    "New Mexico": ["Cattle Ranch", "Dairy Farm"],
+}
+SPECIALTY_FACTOR = 6
+
+# Farm type weights given the farm's state
+FARM_TYPES_BY_STATE = {state: emphasize(FARM_TYPE_WEIGHTS, specialties, SPECIALTY_FACTOR)
+                       for state, specialties in STATE_SPECIALTIES.items()}
+
 # Farm name components
 FARM_PREFIXES = [
     "Green", "Golden", "Sunny", "Happy", "Lucky", "Big", "Little", "Old", "New",
@@ -90,166 +144,155 @@ FARM_EQUIPMENT = [
     "Fertilizer Equipment", "Seed Drills", "Sprayers", "Hay Equipment"
 ]
 
-def generate_farm_name():
-    """Generate a realistic farm name"""
-    prefix = random.choice(FARM_PREFIXES)
-    suffix = random.choice(FARM_SUFFIXES)
-    
-    # Sometimes add a family name
-    if random.random() < 0.3:
-        family_names = ["Johnson", "Smith", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis"]
-        family = random.choice(family_names)
-        return f"{family} {prefix} {suffix}"
-    else:
-        return f"{prefix} {suffix}"
+FAMILY_NAMES = ["Johnson", "Smith", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis"]
 
-def generate_phone():
-    """Generate a realistic US phone number"""
-    area_codes = ["515", "319", "563", "712", "641", "319", "515", "712", "641", "319"]
-    area = random.choice(area_codes)
-    prefix = str(random.randint(200, 999))
-    suffix = str(random.randint(1000, 9999))
-    return f"({area}) {prefix}-{suffix}"
+DIRECTIONS = ["North", "South", "East", "West", "Northeast", "Northwest", "Southeast", "Southwest"]
 
-def generate_farm_address(state):
-    """Generate a realistic rural farm address"""
-    street_name = random.choice(RURAL_STREET_NAMES)
-    street_num = random.randint(1000, 99999)
-    
-    # Add directional or descriptive elements
-    directions = ["North", "South", "East", "West", "Northeast", "Northwest", "Southeast", "Southwest"]
-    if random.random() < 0.4:
-        direction = random.choice(directions)
-        street_address = f"{street_num} {direction} {street_name}"
-    else:
-        street_address = f"{street_num} {street_name}"
-    
-    return street_address
+# Shapes of farm names, mixed in proportion to their size: "Oak Ranch", "Miller Oak Ranch", "Oak Ranch LLC", ...
+FARM_NAME_TIERS = [
+    [FARM_PREFIXES, FARM_SUFFIXES],
+    [FAMILY_NAMES, FARM_PREFIXES, FARM_SUFFIXES],
+    [FARM_PREFIXES, FARM_SUFFIXES, ACCOUNT_NAME_MODIFIERS],
+    [FAMILY_NAMES, FARM_PREFIXES, FARM_SUFFIXES, ACCOUNT_NAME_MODIFIERS],
+]
 
-def generate_farm_data(num_records=50):
-    """Generate farm data for Salesforce Account object"""
-    
-    farms = []
-    
-    for i in range(num_records):
-        # Generate farm name
-        farm_name = generate_farm_name()
-        
-        # Select state and region
-        state = random.choice(US_STATES)
-        if state in FARM_REGIONS:
-            region, base_lat, base_lng = random.choice(FARM_REGIONS[state])
-        else:
-            # Generate approximate coordinates for other states
-            base_lat = random.uniform(25.0, 49.0)  # US latitude range
-            base_lng = random.uniform(-125.0, -66.0)  # US longitude range
-            region = f"Agricultural Region {i+1}"
-        
-        # Generate address
-        street_address = generate_farm_address(state)
-        
-        # Generate city name (often smaller towns in rural areas)
-        rural_cities = ["Farmville", "Rural Center", "Agri Town", "Farm City", "Rural Valley"]
-        city = random.choice(rural_cities) if random.random() < 0.3 else f"Rural City {i+1}"
-        
-        # Generate zip code
-        zip_code = str(random.randint(10000, 99999))
-        
-        # Generate phone and website
-        phone = generate_phone()
-        clean_name = farm_name.replace(" ", "").replace(".", "").replace(",", "").lower()
-        website = f"www.{clean_name}.com"
-        
-        # Generate farm-specific fields
-        farm_type = random.choice(FARM_TYPES)
-        acres = random.randint(50, 5000)
-        annual_revenue = random.randint(100000, 10000000)
-        employees = random.randint(1, 50)
-        
-        # Generate equipment and specialties
-        equipment = random.choice(FARM_EQUIPMENT)
-        
-        # Generate dates
-        created_date = datetime.now() - timedelta(days=random.randint(1, 365*5))
-        last_activity = datetime.now() - timedelta(days=random.randint(1, 180))
-        
-        # Generate description
-        descriptions = [
-            f"Family-owned {farm_type.lower()} specializing in {equipment.lower()}",
-            f"Multi-generational {farm_type.lower()} with {acres} acres",
-            f"Modern {farm_type.lower()} using sustainable practices",
-            f"Established {farm_type.lower()} serving the {state} region",
-            f"Premium {farm_type.lower()} with state-of-the-art {equipment.lower()}"
-        ]
-        description = random.choice(descriptions)
-        
-        farm = {
-            "Account Name": farm_name,
-            "Record Type": "Farm",
-            "Record Type ID": "012KY0000001OFfYAM",
-            "Agriculture Type": farm_type,
-            "Industry": "Agriculture",
-            "Billing Street": street_address,
-            "Billing City": city,
-            "Billing State": state,
-            "Billing Postal Code": zip_code,
-            "Billing Country": "United States",
-            "Phone": phone,
-            "Website": website,
-            "Annual Revenue": annual_revenue,
-            "Number of Employees": employees,
-            "Description": description,
-            "Rating": random.choice(["Hot", "Warm", "Cold"]),
-            "Customer Priority": random.choice(["High", "Medium", "Low"]),
-            "SLA": random.choice(["Gold", "Silver", "Bronze"]),
-            "Upsell Opportunity": random.choice(["Maybe", "No", "Yes"]),
-            "Active": "Yes",
-            "Created Date": created_date.strftime("%Y-%m-%d"),
-            "Last Activity Date": last_activity.strftime("%Y-%m-%d"),
-            "Billing Latitude": round(base_lat + random.uniform(-0.5, 0.5), 6),
-            "Billing Longitude": round(base_lng + random.uniform(-0.5, 0.5), 6),
-            "Farm Size (Acres)": acres,
-            "Primary Equipment": equipment,
-            "Farming Region": region,
-            "Certification": random.choice(["Organic", "Conventional", "GAP Certified", "None"]),
-            "Water Source": random.choice(["Well", "Irrigation District", "River", "Lake", "Municipal"]),
-            "Soil Type": random.choice(["Loam", "Clay", "Sandy", "Silt", "Mixed"])
-        }
-        
-        farms.append(farm)
-    
-    return farms
+# Farm names, in three lanes so farms (lane 0), nearby farms (lane 1) and anchored farms (lane 2) never share one
+FARM_NAMES = UniqueName(FARM_NAME_TIERS, key="farm names", lanes=3)
 
-def save_to_csv(data, filename):
-    """Save data to CSV file"""
-    if not data:
-        return
-    
-    fieldnames = data[0].keys()
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
+RURAL_CITIES = ["Farmville", "Rural Center", "Agri Town", "Farm City", "Rural Valley"]
+
+AREA_CODES = ["515", "319", "563", "712", "641", "319", "515", "712", "641", "319"]
+
+
+# The farm Account record, one column per CSV column in agriculture_farms.csv order
+FARM_TYPE = Lower(Ref("Agriculture Type"))
+EQUIPMENT = Lower(Ref("Primary Equipment"))
+FARM = Entity("Farm", [
+    Var("state", Weighted(STATE_WEIGHTS)),
+    # Known farming region of the state, or a numbered region anywhere in the US
+    Var("region", Place(Ref("state"), FARM_REGIONS, "Agricultural Region {}",
+                        (25.0, 49.0), (-125.0, -66.0))),
+    # Unique across the whole run, shards included
+    Column("Account Name", FARM_NAMES.lane(0)),
+    Column("Record Type", "Farm"),
+    Column("Record Type ID", "012KY0000001OFfYAM"),
+    ACCOUNT.column("Agriculture_Type__c", WeightedBy(Ref("state"), FARM_TYPES_BY_STATE, FARM_TYPE_WEIGHTS)),
+    Column("Industry", "Agriculture"),
+    # Rural address, sometimes with a directional element
+    Column("Billing Street", Chance(0.4, Format("{} {} {}", RandInt(1000, 99999), Choice(DIRECTIONS),
+                                                Choice(RURAL_STREET_NAMES)),
+                                    Format("{} {}", RandInt(1000, 99999), Choice(RURAL_STREET_NAMES)))),
+    Column("Billing City", Chance(0.3, Choice(RURAL_CITIES), Format("Rural City {}", RowNumber()))),
+    Column("Billing State", Ref("state")),
+    Column("Billing Postal Code", ZipCode()),
+    Column("Billing Country", "United States"),
+    Column("Phone", Phone(AREA_CODES)),
+    Column("Website", Website(Ref("Account Name"))),
+    Column("Annual Revenue", RandInt(100000, 10000000)),
+    Column("Number of Employees", RandInt(1, 50)),
+    Column("Description", OneOf(
+        Format("Family-owned {} specializing in {}", FARM_TYPE, EQUIPMENT),
+        Format("Multi-generational {} with {} acres", FARM_TYPE, Ref("Farm Size (Acres)")),
+        Format("Modern {} using sustainable practices", FARM_TYPE),
+        Format("Established {} serving the {} region", FARM_TYPE, Ref("state")),
+        Format("Premium {} with state-of-the-art {}", FARM_TYPE, EQUIPMENT),
+    )),
+    Column("Rating", Weighted(RATING_WEIGHTS)),
+    Column("Customer Priority", Weighted(CUSTOMER_PRIORITY_WEIGHTS)),
+    Column("SLA", Weighted(SLA_WEIGHTS)),
+    Column("Upsell Opportunity", Weighted(UPSELL_OPPORTUNITY_WEIGHTS)),
+    Column("Active", "Yes"),
+    Column("Created Date", DaysAgo(1, 365 * 5)),
+    Column("Last Activity Date", DaysAgo(1, 180)),
+    Column("Billing Latitude", Jitter(Item(Ref("region"), 1), 0.5)),
+    Column("Billing Longitude", Jitter(Item(Ref("region"), 2), 0.5)),
+    ACCOUNT.column("Farm_Size_Acres__c", RandInt(50, 5000)),
+    ACCOUNT.column("Primary_Equipment__c", Choice(FARM_EQUIPMENT)),
+    ACCOUNT.column("Farming_Region__c", Item(Ref("region"), 0)),
+    ACCOUNT.column("Certification__c", Weighted(CERTIFICATION_WEIGHTS)),
+    ACCOUNT.column("Water_Source__c", Weighted(WATER_SOURCE_WEIGHTS)),
+    ACCOUNT.column("Soil_Type__c", Weighted(SOIL_TYPE_WEIGHTS)),
+])
+
+# Column order of the generated farm rows (and of agriculture_farms.csv)
+FARM_FIELDNAMES = FARM.fieldnames
+
+def generate_farm_data(num_records=50, batch=False):
+    """Generate farm data for Salesforce Account object, as a column-backed RecordTable"""
+    if batch:
+        return generate_farm_data_batch(num_records)
+    return RecordTable.from_rows(iter_farm_data(num_records), FARM_FIELDNAMES)
+
+def iter_farm_data(num_records=50, batch=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                   rng=random, start_index=0, as_of=None, name_seed=None):
+    """Yield farm rows one at a time so callers can stream them to disk
+
+    With batch=True the NumPy engine runs one chunk of chunk_size rows at a time.
+    rng is any random.Random-compatible source, start_index numbers rows when
+    generating a shard, name_seed (the run's master seed) picks the order of
+    farm names, and generated dates count back from as_of (default today).
+    """
+    if batch:
+        return FARM.iter_batches(num_records, seed=rng.getrandbits(64), chunk_size=chunk_size,
+                                 start_index=start_index, as_of=as_of, name_seed=name_seed)
+    return FARM.iter_rows(num_records, rng=rng, start_index=start_index, as_of=as_of, name_seed=name_seed)
+
+def generate_farm_data_batch(num_records=50, seed=None, start_index=0, as_of=None, name_seed=None):
+    """Generate farm data by drawing every column as a NumPy array in one pass
+
+    Produces the same columns and value ranges as the per-row path, but makes
+    one vectorized draw per column instead of ~25 random calls per farm.
+    seed may be an int or an existing numpy Generator; start_index offsets the
+    numbered placeholder cities and regions, and generated dates count back
+    from as_of (default today).
+    """
+    return FARM.table(num_records, seed=seed, chunk_size=max(num_records, 1), start_index=start_index,
+                      as_of=as_of, name_seed=name_seed)
+
+
+def save_to_csv(data, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Save data (a list or any iterable of rows) to CSV file in fixed-size chunks"""
+    return stream_to_csv(data, filename, chunk_size=chunk_size)
+
+def generate_shard(count, seed, start_index, filenames, batch=False,
+                   chunk_size=DEFAULT_CHUNK_SIZE, as_of=None, name_seed=None):
+    """Generate one shard of farm rows into its CSV and return its summary stats"""
+    stats = RunningStats(distinct=["Billing State", "Agriculture Type"])
+    farms = iter_farm_data(count, batch=batch, chunk_size=chunk_size, rng=random.Random(seed),
+                           start_index=start_index, as_of=as_of, name_seed=name_seed)
+    save_to_csv(stats.observe(farms), filenames[0], chunk_size=chunk_size)
+    return stats
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate agriculture farm Account data")
+    parser.add_argument("--records", type=int, default=50, help="number of farm records to generate")
+    parser.add_argument("--batch", action="store_true",
+                        help="use the vectorized NumPy batch engine instead of the per-row path")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows generated and written per chunk")
+    add_sharding_arguments(parser)
+    args = parser.parse_args()
+    master_seed, as_of = resolve_run(args)
+
     print("Generating Agriculture Farm Data...")
+    print(f"🎲 Master seed: {master_seed} (as of {as_of})")
     
-    # Generate 50 farm records
-    farms = generate_farm_data(50)
-    
-    # Save to CSV
+    # Stream farm records straight to CSV (one part per shard), collecting summary stats on the way
     filename = "data/agriculture_farms.csv"
-    save_to_csv(farms, filename)
+    shard_stats = run_sharded(generate_shard, args.records, [filename], master_seed,
+                              workers=args.workers, shards=args.shards, keep_parts=args.keep_parts,
+                              batch=args.batch, chunk_size=args.chunk_size, as_of=as_of,
+                              name_seed=master_seed)
+    stats = reduce(RunningStats.merge, shard_stats)
     
-    print(f"✅ Generated {len(farms)} farm records")
-    print(f"📁 Saved to: {filename}")
-    print(f"📍 States covered: {len(set(f['Billing State'] for f in farms))}")
-    print(f"🏡 Farm types: {len(set(f['Agriculture Type'] for f in farms))}")
+    print(f"✅ Generated {stats.count} farm records")
+    print(f"📁 Saved to: {saved_label(filename, args)}")
+    print(f"📍 States covered: {stats.distinct('Billing State')}")
+    print(f"🏡 Farm types: {stats.distinct('Agriculture Type')}")
     
     # Show sample data
     print("\n📋 Sample Records:")
-    for i, farm in enumerate(farms[:3]):
+    for i, farm in enumerate(stats.samples):
         print(f"\n{i+1}. {farm['Account Name']}")
         print(f"   📍 {farm['Billing City']}, {farm['Billing State']}")
         print(f"   🏡 {farm['Agriculture Type']}")
@@ -257,4 +300,4 @@ if __name__ == "__main__":
         print(f"   🌐 {farm['Website']}")
         print(f"   📍 Coordinates: {farm['Billing Latitude']}, {farm['Billing Longitude']}")
         print(f"   🌾 Size: {farm['Farm Size (Acres)']} acres")
-        print(f"   🚜 Equipment: {farm['Primary Equipment']}") 
\ No newline at end of file
+        print(f"   🚜 Equipment: {farm['Primary Equipment']}")
@@ -4,10 +4,16 @@ Generate Farmer Contact Data for Farm Accounts
 This script creates realistic farmer contact information to be associated with farm accounts
 """
 
-import csv
+import argparse
 import random
-from datetime import datetime, timedelta
-import os
+from functools import partial, reduce
+
+from account_join import ACCOUNT_ID, AccountSource, iter_children
+from csv_stream import DEFAULT_CHUNK_SIZE, RunningStats, stream_to_csv
+from fieldgen import Choice, Column, DaysAgo, Email, Entity, Jitter, Parent, Phone, Ref
+from records import RecordTable
+from sharding import add_sharding_arguments, derive_seed, output_files, resolve_run, run_sharded, saved_label
+from uniqueness import CONTACT_EMAIL_LANES, UniqueValues, unique_column_in_files
 
 # Farmer-specific data
 FARMER_FIRST_NAMES = [
@@ -58,150 +64,162 @@ FARMER_DESCRIPTIONS = [
     "Agricultural professional with focus on soil management"
 ]
 
-def generate_phone():
-    """Generate a realistic phone number"""
-    area_codes = ["319", "515", "641", "712", "563"]
-    area_code = random.choice(area_codes)
-    prefix = str(random.randint(200, 999))
-    suffix = str(random.randint(1000, 9999))
-    return f"({area_code}) {prefix}-{suffix}"
-
-def generate_email(first_name, last_name, company_name):
-    """Generate a realistic email address"""
-    email_domains = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com"]
-    domain = random.choice(email_domains)
-    
-    # Clean company name for email
-    clean_company = company_name.replace(" ", "").replace(",", "").replace(".", "").lower()
-    
-    email_patterns = [
-        f"{first_name.lower()}.{last_name.lower()}@{domain}",
-        f"{first_name.lower()}{last_name.lower()}@{domain}",
-        f"{first_name.lower()}_{last_name.lower()}@{domain}",
-        f"{first_name.lower()}{random.randint(1, 99)}@{domain}",
-        f"{first_name.lower()}.{last_name.lower()}@{clean_company}.com"
-    ]
-    
-    return random.choice(email_patterns)
+# Email address patterns; {company} is the account name squashed into a domain
+EMAIL_PATTERNS = [
+    "{first}.{last}@{domain}", "{first}{last}@{domain}", "{first}_{last}@{domain}",
+    "{first}{n}@{domain}", "{first}.{last}@{company}.com"
+]
+
+# Lane of the contact email space this file keeps to, so no email is also in distributor_contacts.csv
+EMAIL_LANE = 0
+
+# The farmer Contact record; it takes its account, address and location from
+# the parent farm Account row it is joined to
+FARMER_CONTACT = Entity("Farmer Contact", [
+    Column("Account Name", Parent("Account Name")),
+    Column("Account ID", Parent(ACCOUNT_ID)),
+    Column("First Name", Choice(FARMER_FIRST_NAMES)),
+    Column("Last Name", Choice(FARMER_LAST_NAMES)),
+    Column("Title", Choice(FARMER_TITLES)),
+    Column("Department", Choice(FARMER_DEPARTMENTS)),
+    Column("Phone", Phone(["319", "515", "641", "712", "563"])),
+    Column("Email", Email(Ref("First Name"), Ref("Last Name"), Parent("Account Name"), EMAIL_PATTERNS)),
+    Column("Mailing Street", Parent("Billing Street")),
+    Column("Mailing City", Parent("Billing City")),
+    Column("Mailing State", Parent("Billing State")),
+    Column("Mailing Postal Code", Parent("Billing Postal Code")),
+    Column("Mailing Country", "United States"),
+    # Same coordinates as the account with slight variation
+    Column("Mailing Latitude", Jitter(Parent("Billing Latitude"), 0.01)),
+    Column("Mailing Longitude", Jitter(Parent("Billing Longitude"), 0.01)),
+    Column("Description", Choice(FARMER_DESCRIPTIONS)),
+    Column("Lead Source", Choice(["Web", "Phone Inquiry", "Referral", "Trade Show", "Cold Call"])),
+    Column("Status", "Active"),
+    Column("Created Date", DaysAgo(30, 1000)),
+    Column("Last Activity Date", DaysAgo(1, 90)),
+])
+
+# Sample farm accounts used if data/agriculture_farms.csv doesn't exist
+SAMPLE_FARM_ACCOUNTS = [
+    {'Account Name': 'Miller Big Valley', 'Account ID': '001KY00000E1Q8CYAV', 'Billing Street': '4521 County Road',
+     'Billing City': 'Farmville', 'Billing State': 'Iowa', 'Billing Postal Code': '50010',
+     'Billing Latitude': 41.5868, 'Billing Longitude': -93.625},
+    {'Account Name': 'Cedar Estates', 'Account ID': '001KY00000E1Q8DYAV', 'Billing Street': '18230 Farm Road',
+     'Billing City': 'Agri Town', 'Billing State': 'Illinois', 'Billing Postal Code': '61601',
+     'Billing Latitude': 40.6936, 'Billing Longitude': -89.589},
+    {'Account Name': 'Elm Fields', 'Account ID': '001KY00000E1Q8EYAV', 'Billing Street': '7702 North Rural Route',
+     'Billing City': 'Rural Center', 'Billing State': 'Nebraska', 'Billing Postal Code': '68801',
+     'Billing Latitude': 40.9264, 'Billing Longitude': -98.342},
+    {'Account Name': 'Mountain Hills', 'Account ID': '001KY00000E1Q8FYAV', 'Billing Street': '3119 Valley Road',
+     'Billing City': 'Farm City', 'Billing State': 'California', 'Billing Postal Code': '93721',
+     'Billing Latitude': 36.7378, 'Billing Longitude': -119.7871},
+    {'Account Name': 'Birch Produce', 'Account ID': '001KY00000E1Q8GYAV', 'Billing Street': '22045 Creek Road',
+     'Billing City': 'Rural Valley', 'Billing State': 'Texas', 'Billing Postal Code': '79401',
+     'Billing Latitude': 34.1848, 'Billing Longitude': -101.7068}
+]
+
+def load_farm_accounts():
+    """Open the farm accounts that contacts are associated with
+
+    Returns an AccountSource that streams data/agriculture_farms.csv (falling back to
+    SAMPLE_FARM_ACCOUNTS), giving each account a stable ID.
+    """
+    return AccountSource('data/agriculture_farms.csv', SAMPLE_FARM_ACCOUNTS)
 
 def generate_farmer_contact_data(num_records=50):
-    """Generate farmer contact data"""
-    contacts = []
-    
-    # Get existing farm accounts to associate with
-    farm_accounts = []
-    try:
-        with open('data/agriculture_farms.csv', 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                farm_accounts.append({
-                    'Account Name': row['Account Name'],
-                    'Account ID': f"001{random.randint(100000000, 999999999)}"  # Mock ID
-                })
-    except FileNotFoundError:
-        # Create sample farm accounts if file doesn't exist
-        farm_accounts = [
-            {'Account Name': 'Miller Big Valley', 'Account ID': '001KY00000E1Q8CYAV'},
-            {'Account Name': 'Cedar Estates', 'Account ID': '001KY00000E1Q8DYAV'},
-            {'Account Name': 'Elm Fields', 'Account ID': '001KY00000E1Q8EYAV'},
-            {'Account Name': 'Mountain Hills', 'Account ID': '001KY00000E1Q8FYAV'},
-            {'Account Name': 'Birch Produce', 'Account ID': '001KY00000E1Q8GYAV'}
-        ]
-    
-    for i in range(num_records):
-        # Select a farm account
-        farm_account = random.choice(farm_accounts)
-        
-        # Generate contact details
-        first_name = random.choice(FARMER_FIRST_NAMES)
-        last_name = random.choice(FARMER_LAST_NAMES)
-        title = random.choice(FARMER_TITLES)
-        department = random.choice(FARMER_DEPARTMENTS)
-        
-        # Generate contact info
-        phone = generate_phone()
-        email = generate_email(first_name, last_name, farm_account['Account Name'])
-        
-        # Generate dates
-        created_date = datetime.now() - timedelta(days=random.randint(30, 1000))
-        last_activity = datetime.now() - timedelta(days=random.randint(1, 90))
-        
-        # Generate mailing address (same as farm address with slight variations)
-        states = ["California", "Texas", "Iowa", "Nebraska", "Minnesota", "Illinois", "Wisconsin", "Indiana", "Ohio", "Michigan"]
-        state = random.choice(states)
-        
-        street_numbers = [str(random.randint(100, 9999)), str(random.randint(10000, 99999))]
-        street_names = ["Farm Road", "Rural Route", "County Road", "Dirt Road", "Spring Road", "Valley Road"]
-        
-        street_address = f"{random.choice(street_numbers)} {random.choice(street_names)}"
-        city = f"Rural City {random.randint(1, 50)}"
-        zip_code = str(random.randint(10000, 99999))
-        
-        # Generate coordinates (slightly different from farm coordinates)
-        base_lat = random.uniform(25.0, 50.0)
-        base_lng = random.uniform(-125.0, -65.0)
-        
-        contact = {
-            "Account Name": farm_account['Account Name'],
-            "Account ID": farm_account['Account ID'],
-            "First Name": first_name,
-            "Last Name": last_name,
-            "Title": title,
-            "Department": department,
-            "Phone": phone,
-            "Email": email,
-            "Mailing Street": street_address,
-            "Mailing City": city,
-            "Mailing State": state,
-            "Mailing Postal Code": zip_code,
-            "Mailing Country": "United States",
-            "Mailing Latitude": round(base_lat + random.uniform(-0.1, 0.1), 6),
-            "Mailing Longitude": round(base_lng + random.uniform(-0.1, 0.1), 6),
-            "Description": random.choice(FARMER_DESCRIPTIONS),
-            "Lead Source": random.choice(["Web", "Phone Inquiry", "Referral", "Trade Show", "Cold Call"]),
-            "Status": "Active",
-            "Created Date": created_date.strftime("%Y-%m-%d"),
-            "Last Activity Date": last_activity.strftime("%Y-%m-%d")
-        }
-        
-        contacts.append(contact)
-    
-    return contacts
+    """Generate farmer contact data, as a column-backed RecordTable"""
+    return RecordTable.from_rows(iter_farmer_contact_data(num_records), FARMER_CONTACT.fieldnames)
+
+def iter_farmer_contact_data(num_records=50, rng=random, accounts=None, as_of=None,
+                             start_index=0, total_records=None):
+    """Yield farmer contact rows one at a time so callers can stream them to disk
 
-def save_to_csv(data, filename):
-    """Save data to CSV file"""
-    if not data:
+    Contacts come out grouped by account, in account file order. rng is any
+    random.Random-compatible source, accounts defaults to load_farm_accounts(),
+    and generated dates count back from as_of (default today). A shard passes its
+    start_index and the run's total_records so it only joins to its share of the
+    accounts.
+    """
+    if accounts is None:
+        accounts = load_farm_accounts()
+    return iter_children(FARMER_CONTACT, accounts, num_records, rng=rng, as_of=as_of,
+                         start_index=start_index, total_records=total_records)
+
+def save_to_csv(data, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Save data (a list or any iterable of rows) to CSV file in fixed-size chunks"""
+    count = stream_to_csv(data, filename, chunk_size=chunk_size)
+    if not count:
         print("❌ No data to save")
-        return
+        return count
     
-    fieldnames = data[0].keys()
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
-    
-    print(f"✅ Generated {len(data)} farmer contact records")
+    print(f"✅ Generated {count} farmer contact records")
     print(f"📁 Saved to: {filename}")
+    return count
+
+def generate_shard(count, seed, start_index, filenames, accounts=None, total_records=None,
+                   chunk_size=DEFAULT_CHUNK_SIZE, as_of=None, emails=None):
+    """Generate one shard of farmer contacts into its CSV and return its summary stats
+
+    emails, a uniqueness.UniqueValues, makes the Email column unique as rows stream past.
+    """
+    stats = RunningStats(distinct=["Mailing State", "Account Name", "Title"])
+    contacts = iter_farmer_contact_data(count, rng=random.Random(seed), accounts=accounts, as_of=as_of,
+                                        start_index=start_index, total_records=total_records)
+    if emails is not None:
+        contacts = emails.unique_rows(contacts, "Email")
+    stream_to_csv(stats.observe(contacts), filenames[0], chunk_size=chunk_size)
+    return stats
 
 def main():
     """Main function to generate farmer contact data"""
+    parser = argparse.ArgumentParser(description="Generate farmer Contact data")
+    parser.add_argument("--records", type=int, default=50, help="number of contact records to generate")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows generated and written per chunk")
+    add_sharding_arguments(parser)
+    args = parser.parse_args()
+    master_seed, as_of = resolve_run(args)
+    
     print("🌾 Generating Farmer Contact Data...")
     
-    # Generate farmer contacts
-    farmer_contacts = generate_farmer_contact_data(50)
+    print(f"🎲 Master seed: {master_seed} (as of {as_of})")
+    
+    # Every shard joins to the same farm accounts and stable IDs; count them once here
+    accounts = load_farm_accounts()
+    print(f"🔗 Joining to {len(accounts)} farm accounts")
     
-    # Save to CSV
-    save_to_csv(farmer_contacts, 'data/farmer_contacts.csv')
+    # One filter sized for the whole run keeps emails unique. A single shard
+    # checks them as they stream; separate processes can't share it, so
+    # sharded output is checked in one pass over the parts afterwards
+    emails = UniqueValues(args.records, seed=derive_seed(master_seed, "emails"), lane=EMAIL_LANE,
+                          lanes=CONTACT_EMAIL_LANES)
+    sharded = (args.shards or args.workers) > 1
+
+    # Stream farmer contacts straight to CSV (one part per shard), collecting summary stats on the way
+    filename = 'data/farmer_contacts.csv'
+    finish = partial(unique_column_in_files, output_files(filename, args), "Email", emails,
+                     chunk_size=args.chunk_size) if sharded else None
+    shard_stats = run_sharded(generate_shard, args.records, [filename], master_seed,
+                              workers=args.workers, shards=args.shards, keep_parts=args.keep_parts,
+                              accounts=accounts, total_records=args.records, chunk_size=args.chunk_size,
+                              as_of=as_of, emails=None if sharded else emails,
+                              finish=finish)
+    stats = reduce(RunningStats.merge, shard_stats)
+    if not stats.count:
+        print("❌ No data to save")
+        return
+    print(f"✅ Generated {stats.count} farmer contact records")
+    print(f"📁 Saved to: {saved_label(filename, args)}")
+    print(f"📧 Unique emails: {emails.report()}")
     
     # Display statistics
-    print(f"📍 States covered: {len(set(c['Mailing State'] for c in farmer_contacts))}")
-    print(f"🏢 Farm accounts associated: {len(set(c['Account Name'] for c in farmer_contacts))}")
-    print(f"👨‍🌾 Farmer titles: {len(set(c['Title'] for c in farmer_contacts))}")
+    print(f"📍 States covered: {stats.distinct('Mailing State')}")
+    print(f"🏢 Farm accounts associated: {stats.distinct('Account Name')}")
+    print(f"👨‍🌾 Farmer titles: {stats.distinct('Title')}")
     
     # Show sample data
     print("\n📋 Sample Farmer Contacts:")
-    for i, contact in enumerate(farmer_contacts[:3]):
+    for i, contact in enumerate(stats.samples):
         print(f"\n{i+1}. {contact['First Name']} {contact['Last Name']}")
         print(f"   🏢 Farm: {contact['Account Name']}")
         print(f"   💼 Title: {contact['Title']}")
@@ -2,25 +2,38 @@
 """
 Generate Farm Records Near Sunny Estates
 This script creates farm records within 10km radius of Sunny Estates and associated farmer contacts
+
+With --anchors it instead reads anchor accounts from any Account CSV and
+scatters --per-anchor neighbor farms (each with a farmer contact) around every
+one of them, for load-testing the Account Radar across a whole org.
 """
 
-import csv
+import argparse
 import random
-import math
-from datetime import datetime, timedelta
-import os
+from functools import reduce
+from itertools import islice
+
+from account_join import ACCOUNT_ID, AccountSource, mock_account_id
+from csv_stream import DEFAULT_CHUNK_SIZE, ChunkedCsvWriter, RunningStats, stream_to_csv
+from fieldgen import (
+    CERTIFICATION_WEIGHTS, CUSTOMER_PRIORITY_WEIGHTS, DENSITY_PROFILES, RATING_WEIGHTS, RNG, ROW_INDEX, SLA_WEIGHTS,
+    SOIL_TYPE_WEIGHTS, UPSELL_OPPORTUNITY_WEIGHTS, WATER_SOURCE_WEIGHTS, Call, Chance, Choice, Column, DaysAgo,
+    DiscPoint, Distance, Email, Entity, Format, Item, Jitter, Lower, Param, Parent, Phone, RandInt, Ref, Round,
+    Var, Website, Weighted, WeightedBy, ZipCode, haversine_km, hot_spots, point_within,
+)
+from generate_farm_data import FARM_NAMES, FARM_TYPE_WEIGHTS, FARM_TYPES_BY_STATE
+from records import RecordTable
+from schema import load_schema
+from sharding import add_sharding_arguments, derive_seed, resolve_run, run_sharded, saved_label
+
+# Account fields from the force-app metadata; custom field columns take their headers from it
+ACCOUNT = load_schema()["Account"]
 
 # Sunny Estates coordinates
 SUNNY_ESTATES_LAT = 36.026995
 SUNNY_ESTATES_LNG = -100.695679
 
-# Farm names for nearby farms
-NEARBY_FARM_NAMES = [
-    "Sunny Valley Farm", "Golden Meadows", "Prairie View Ranch", "Sunset Fields", "Morning Star Farm",
-    "Green Valley Estates", "Blue Sky Ranch", "Silver Creek Farm", "Red River Valley", "Clear Water Farm",
-    "High Plains Ranch", "Windy Meadows", "Rocky Ridge Farm", "Sweet Grass Ranch", "Lone Star Farm",
-    "Texas Prairie Farm", "Oklahoma Valley", "Panhandle Ranch", "Wheat Field Farm", "Corn Belt Ranch"
-]
+DISTANCE_COLUMN = "Distance from Sunny Estates (km)"
 
 # Farmer names for nearby farms
 FARMER_FIRST_NAMES = [
@@ -35,10 +48,11 @@ FARMER_LAST_NAMES = [
     "Wright", "Lopez", "Hill", "Scott", "Green", "Adams", "Baker", "Gonzalez", "Nelson", "Carter"
 ]
 
-FARM_TYPES = [
-    "Cattle Ranch", "Grain Farm", "Corn Farm", "Wheat Farm", "Mixed Crop Farm", "Dairy Farm",
-    "Soybean Farm", "Cotton Farm", "Hay Farm", "Organic Farm"
-]
+# Panhandle farms are mostly cattle and dryland wheat
+FARM_TYPE_MIX = {
+    "Cattle Ranch": 30, "Grain Farm": 15, "Corn Farm": 10, "Wheat Farm": 20, "Mixed Crop Farm": 15,
+    "Dairy Farm": 3, "Soybean Farm": 2, "Cotton Farm": 4, "Organic Farm": 1,
+}
 
 EQUIPMENT_TYPES = [
     "Tractors", "Irrigation Systems", "Harvesters", "Planters", "Fertilizer Equipment", "Livestock Equipment",
@@ -50,228 +64,376 @@ FARMING_REGIONS = [
     "Central Plains", "Northern Plains", "Southern Plains", "Eastern Plains"
 ]
 
-def calculate_distance(lat1, lng1, lat2, lng2):
-    """Calculate distance between two points in kilometers"""
-    R = 6371  # Earth's radius in kilometers
-    
-    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
-    
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng/2)**2
-    c = 2 * math.asin(math.sqrt(a))
-    
-    return R * c
+# Distance and radius sampling are shared with the other generators
+calculate_distance = haversine_km
+generate_nearby_coordinates = point_within
 
-def generate_nearby_coordinates(base_lat, base_lng, max_distance_km=10):
-    """Generate coordinates within specified radius"""
-    # Convert km to degrees (approximate)
-    # 1 degree latitude ≈ 111 km
-    # 1 degree longitude ≈ 111 km * cos(latitude)
-    
-    max_lat_offset = max_distance_km / 111.0
-    max_lng_offset = max_distance_km / (111.0 * math.cos(math.radians(base_lat)))
-    
-    # Generate random offset within the circle
-    angle = random.uniform(0, 2 * math.pi)
-    distance = random.uniform(0, max_distance_km)
-    
-    lat_offset = (distance / 111.0) * math.cos(angle)
-    lng_offset = (distance / (111.0 * math.cos(math.radians(base_lat)))) * math.sin(angle)
-    
-    new_lat = base_lat + lat_offset
-    new_lng = base_lng + lng_offset
-    
-    return new_lat, new_lng
-
-def generate_phone():
-    """Generate a realistic phone number"""
-    area_codes = ["580", "405", "918"]  # Oklahoma area codes
-    area_code = random.choice(area_codes)
-    prefix = str(random.randint(200, 999))
-    suffix = str(random.randint(1000, 9999))
-    return f"({area_code}) {prefix}-{suffix}"
-
-def generate_email(first_name, last_name, farm_name):
-    """Generate a realistic email address"""
-    email_domains = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com"]
-    domain = random.choice(email_domains)
-    
-    clean_farm = farm_name.replace(" ", "").replace(",", "").replace(".", "").lower()
-    
-    email_patterns = [
-        f"{first_name.lower()}.{last_name.lower()}@{domain}",
-        f"{first_name.lower()}{last_name.lower()}@{domain}",
-        f"{first_name.lower()}_{last_name.lower()}@{domain}",
-        f"{first_name.lower()}.{last_name.lower()}@{clean_farm}.com"
-    ]
-    
-    return random.choice(email_patterns)
+AREA_CODES = ["580", "405", "918"]  # Oklahoma area codes
+
+STREET_NAMES = ["Farm Road", "Rural Route", "County Road", "Dirt Road", "Spring Road", "Valley Road"]
+
+# Oklahoma cities near the area
+CITIES = ["Guymon", "Hooker", "Goodwell", "Texhoma", "Turpin", "Hardesty", "Adams", "Balko", "Beaver"]
+
+# A farm Account within 10km of Sunny Estates, with its distance as an extra column
+NEARBY_FARM = Entity("Nearby Farm", [
+    Var("point", DiscPoint(SUNNY_ESTATES_LAT, SUNNY_ESTATES_LNG, 10)),
+    Var("distance", Distance(SUNNY_ESTATES_LAT, SUNNY_ESTATES_LNG, Item(Ref("point"), 0), Item(Ref("point"), 1))),
+    # The farm generator's other lane, so no name is in both files
+    Column("Account Name", FARM_NAMES.lane(1)),
+    Column("Record Type", "Farm"),
+    Column("Record Type ID", "012KY0000001OFfYAM"),
+    ACCOUNT.column("Agriculture_Type__c", Weighted(FARM_TYPE_MIX)),
+    Column("Industry", "Agriculture"),
+    Column("Billing Street", Format("{} {}", Chance(0.5, RandInt(100, 9999), RandInt(10000, 99999)),
+                                    Choice(STREET_NAMES))),
+    Column("Billing City", Choice(CITIES)),
+    Column("Billing State", "Oklahoma"),
+    Column("Billing Postal Code", ZipCode(73900, 73999)),  # Oklahoma panhandle zip codes
+    Column("Billing Country", "United States"),
+    Column("Phone", Phone(AREA_CODES)),
+    Column("Website", Website(Ref("Account Name"))),
+    Column("Annual Revenue", RandInt(500000, 5000000)),
+    Column("Number of Employees", RandInt(2, 25)),
+    Column("Description", Format("Family-owned {} located {:.1f}km from Sunny Estates",
+                                 Lower(Ref("Agriculture Type")), Ref("distance"))),
+    Column("Rating", Weighted(RATING_WEIGHTS)),
+    Column("Customer Priority", Weighted(CUSTOMER_PRIORITY_WEIGHTS)),
+    Column("SLA", Weighted(SLA_WEIGHTS)),
+    Column("Upsell Opportunity", Weighted(UPSELL_OPPORTUNITY_WEIGHTS)),
+    Column("Active", "Yes"),
+    Column("Created Date", DaysAgo(30, 1000)),
+    Column("Last Activity Date", DaysAgo(1, 90)),
+    Column("Billing Latitude", Round(Item(Ref("point"), 0), 6)),
+    Column("Billing Longitude", Round(Item(Ref("point"), 1), 6)),
+    ACCOUNT.column("Farm_Size_Acres__c", RandInt(500, 5000)),
+    ACCOUNT.column("Primary_Equipment__c", Choice(EQUIPMENT_TYPES)),
+    ACCOUNT.column("Farming_Region__c", Choice(FARMING_REGIONS)),
+    ACCOUNT.column("Certification__c", Weighted(CERTIFICATION_WEIGHTS)),
+    ACCOUNT.column("Water_Source__c", Weighted(WATER_SOURCE_WEIGHTS)),
+    ACCOUNT.column("Soil_Type__c", Weighted(SOIL_TYPE_WEIGHTS)),
+    Column(DISTANCE_COLUMN, Round(Ref("distance"), 2)),
+])
+
+# The farmer Contact of a nearby farm, at the farm's address
+NEARBY_FARMER_CONTACT = Entity("Nearby Farmer Contact", [
+    Column("Account Name", Parent("Account Name")),
+    Column("Account ID", Call(mock_account_id, ROW_INDEX)),  # The farm's stable mock ID
+    Column("First Name", Choice(FARMER_FIRST_NAMES)),
+    Column("Last Name", Choice(FARMER_LAST_NAMES)),
+    Column("Title", Choice(["Owner", "Farm Manager", "Operations Manager", "General Manager", "President"])),
+    Column("Department", Choice(["Operations", "Management", "Production", "Field Operations"])),
+    Column("Phone", Phone(AREA_CODES)),
+    Column("Email", Email(Ref("First Name"), Ref("Last Name"), Parent("Account Name"), [
+        "{first}.{last}@{domain}", "{first}{last}@{domain}", "{first}_{last}@{domain}",
+        "{first}.{last}@{company}.com",
+    ])),
+    Column("Mailing Street", Parent("Billing Street")),
+    Column("Mailing City", Parent("Billing City")),
+    Column("Mailing State", Parent("Billing State")),
+    Column("Mailing Postal Code", Parent("Billing Postal Code")),
+    Column("Mailing Country", "United States"),
+    # Same coordinates as the farm with slight variation
+    Column("Mailing Latitude", Jitter(Parent("Billing Latitude"), 0.01)),
+    Column("Mailing Longitude", Jitter(Parent("Billing Longitude"), 0.01)),
+    Column("Description", Format("Farmer at {}, {}km from Sunny Estates", Parent("Account Name"),
+                                 Parent(DISTANCE_COLUMN))),
+    Column("Lead Source", Choice(["Web", "Phone Inquiry", "Referral", "Trade Show", "Cold Call"])),
+    Column("Created Date", DaysAgo(30, 1000)),
+    Column("Last Activity Date", DaysAgo(1, 90)),
+])
+
+# Neighbor farms scattered around anchor accounts (--anchors) differ from the
+# Sunny Estates farms only in where they are and what they are measured from
+ANCHOR_DISTANCE_COLUMN = "Distance from Anchor (km)"
+HOT_SPOTS = "Hot Spots"  # Anchor row key holding the anchor's zipf hot spots
+
+
+def area_code(phone, rng=random):
+    """The "(AAA)" area code of a "(AAA) PPP-SSSS" phone number, so neighbors share their anchor's
+
+    Anchors without one get a local area code drawn from rng.
+    """
+    return phone[:5] if phone.startswith("(") else f"({rng.choice(AREA_CODES)})"
+
+
+_ANCHORED_FIELDS = {
+    # A lane of its own, so anchored farms share no name with farms or nearby farms
+    "Account Name": Column("Account Name", FARM_NAMES.lane(2)),
+    "point": Var("point", DiscPoint(Parent("Billing Latitude"), Parent("Billing Longitude"), Param("radius_km"),
+                                    profile=Param("density"), spots=Parent(HOT_SPOTS))),
+    "distance": Var("distance", Distance(Parent("Billing Latitude"), Parent("Billing Longitude"),
+                                         Item(Ref("point"), 0), Item(Ref("point"), 1))),
+    # Neighbors farm what their anchor's state is known for
+    "Agriculture Type": ACCOUNT.column("Agriculture_Type__c", WeightedBy(Parent("Billing State"),
+                                                                         FARM_TYPES_BY_STATE, FARM_TYPE_WEIGHTS)),
+    "Billing City": Column("Billing City", Parent("Billing City")),
+    "Billing State": Column("Billing State", Parent("Billing State")),
+    "Billing Postal Code": Column("Billing Postal Code", ZipCode()),
+    "Phone": Column("Phone", Format("{} {}-{}", Call(area_code, Parent("Phone"), RNG), RandInt(200, 999),
+                                    RandInt(1000, 9999))),
+    "Description": Column("Description", Format("Family-owned {} located {:.1f}km from {}",
+                                                Lower(Ref("Agriculture Type")), Ref("distance"),
+                                                Parent("Account Name"))),
+    DISTANCE_COLUMN: Column(ANCHOR_DISTANCE_COLUMN, Round(Ref("distance"), 2)),
+}
+
+# A neighbor farm Account of an anchor account, with the anchor it belongs to
+ANCHORED_FARM = Entity("Anchored Farm", [
+    *(_ANCHORED_FIELDS.get(field.name, field) for field in NEARBY_FARM.fields),
+    Column("Anchor Account ID", Parent(ACCOUNT_ID)),
+    Column("Anchor Account Name", Parent("Account Name")),
+])
+
+_ANCHORED_CONTACT_FIELDS = {
+    "Phone": Column("Phone", Format("{} {}-{}", Call(area_code, Parent("Phone"), RNG), RandInt(200, 999),
+                                    RandInt(1000, 9999))),
+    "Description": Column("Description", Format("Farmer at {}, {}km from {}", Parent("Account Name"),
+                                                Parent(ANCHOR_DISTANCE_COLUMN), Parent("Anchor Account Name"))),
+}
+
+# The farmer Contact of a neighbor farm
+ANCHORED_FARMER_CONTACT = Entity("Anchored Farmer Contact", [
+    _ANCHORED_CONTACT_FIELDS.get(field.name, field) for field in NEARBY_FARMER_CONTACT.fields
+])
 
 def generate_nearby_farm_data(num_farms=15):
-    """Generate farm data within 10km of Sunny Estates"""
-    farms = []
-    
-    for i in range(num_farms):
-        # Generate coordinates within 10km radius
-        lat, lng = generate_nearby_coordinates(SUNNY_ESTATES_LAT, SUNNY_ESTATES_LNG, 10)
-        
-        # Calculate actual distance
-        distance = calculate_distance(SUNNY_ESTATES_LAT, SUNNY_ESTATES_LNG, lat, lng)
-        
-        # Generate farm details
-        farm_name = random.choice(NEARBY_FARM_NAMES)
-        farm_type = random.choice(FARM_TYPES)
-        equipment = random.choice(EQUIPMENT_TYPES)
-        region = random.choice(FARMING_REGIONS)
-        
-        # Generate address
-        street_numbers = [str(random.randint(100, 9999)), str(random.randint(10000, 99999))]
-        street_names = ["Farm Road", "Rural Route", "County Road", "Dirt Road", "Spring Road", "Valley Road"]
-        street_address = f"{random.choice(street_numbers)} {random.choice(street_names)}"
-        
-        # Use Oklahoma cities near the area
-        cities = ["Guymon", "Hooker", "Goodwell", "Texhoma", "Turpin", "Hardesty", "Adams", "Balko", "Beaver"]
-        city = random.choice(cities)
-        
-        zip_code = str(random.randint(73900, 73999))  # Oklahoma panhandle zip codes
-        
-        # Generate business data
-        annual_revenue = random.randint(500000, 5000000)
-        employees = random.randint(2, 25)
-        
-        # Generate dates
-        created_date = datetime.now() - timedelta(days=random.randint(30, 1000))
-        last_activity = datetime.now() - timedelta(days=random.randint(1, 90))
-        
-        farm = {
-            "Account Name": farm_name,
-            "Record Type": "Farm",
-            "Record Type ID": "012KY0000001OFfYAM",
-            "Agriculture Type": farm_type,
-            "Industry": "Agriculture",
-            "Billing Street": street_address,
-            "Billing City": city,
-            "Billing State": "Oklahoma",
-            "Billing Postal Code": zip_code,
-            "Billing Country": "United States",
-            "Phone": generate_phone(),
-            "Website": f"www.{farm_name.lower().replace(' ', '')}.com",
-            "Annual Revenue": annual_revenue,
-            "Number of Employees": employees,
-            "Description": f"Family-owned {farm_type.lower()} located {distance:.1f}km from Sunny Estates",
-            "Rating": random.choice(["Hot", "Warm", "Cold"]),
-            "Customer Priority": random.choice(["High", "Medium", "Low"]),
-            "SLA": random.choice(["Gold", "Silver", "Bronze"]),
-            "Upsell Opportunity": random.choice(["Maybe", "No", "Yes"]),
-            "Active": "Yes",
-            "Created Date": created_date.strftime("%Y-%m-%d"),
-            "Last Activity Date": last_activity.strftime("%Y-%m-%d"),
-            "Billing Latitude": round(lat, 6),
-            "Billing Longitude": round(lng, 6),
-            "Farm Size (Acres)": random.randint(500, 5000),
-            "Primary Equipment": equipment,
-            "Farming Region": region,
-            "Certification": random.choice(["Organic", "Conventional", "GAP Certified", "None"]),
-            "Water Source": random.choice(["Well", "Irrigation District", "River", "Lake", "Municipal"]),
-            "Soil Type": random.choice(["Loam", "Clay", "Sandy", "Silt", "Mixed"]),
-            "Distance from Sunny Estates (km)": round(distance, 2)
-        }
-        
-        farms.append(farm)
-    
-    return farms
+    """Generate farm data within 10km of Sunny Estates, as a column-backed RecordTable"""
+    return RecordTable.from_rows(iter_nearby_farm_data(num_farms), NEARBY_FARM.fieldnames)
+
+def iter_nearby_farm_data(num_farms=15, rng=random, as_of=None, batch=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                          start_index=0, name_seed=None):
+    """Yield nearby farm rows one at a time so callers can stream them to disk
+
+    With batch=True the NumPy engine samples and measures a whole chunk of
+    coordinates at once. rng is any random.Random-compatible source,
+    start_index numbers rows when generating a shard, name_seed (the run's
+    master seed) picks the order of farm names, and generated dates count back
+    from as_of (default today).
+    """
+    if batch:
+        return NEARBY_FARM.iter_batches(num_farms, seed=rng.getrandbits(64), chunk_size=chunk_size,
+                                        start_index=start_index, as_of=as_of, name_seed=name_seed)
+    return NEARBY_FARM.iter_rows(num_farms, rng=rng, start_index=start_index, as_of=as_of, name_seed=name_seed)
 
 def generate_nearby_farmer_contacts(farms):
-    """Generate farmer contacts for the nearby farms"""
-    contacts = []
-    
+    """Generate farmer contacts for the nearby farms, as a column-backed RecordTable"""
+    return RecordTable.from_rows(NEARBY_FARMER_CONTACT.iter_rows(None, parents=farms),
+                                 NEARBY_FARMER_CONTACT.fieldnames)
+
+def iter_anchors(source, start_index, count, per_anchor, profile="uniform", seed=0):
+    """Yield the anchor row of neighbors start_index..start_index+count, per_anchor neighbors per anchor
+
+    Anchor rows are streamed from source in one pass, with their coordinates as
+    floats and, for the zipf profile, hot spots derived from seed and the
+    anchor's ID (so every shard agrees on them).
+    """
+    positions = (index // per_anchor for index in range(start_index, start_index + count))
+    row = anchor = None
+    for next_row in source.rows_at(positions):
+        if next_row is not row:  # rows_at repeats the same row object for the same anchor
+            row = next_row
+            if not row.get("Billing Latitude") or not row.get("Billing Longitude"):
+                raise ValueError(f"Anchor account {row[ACCOUNT_ID]} ({row.get('Account Name')}) has no coordinates")
+            anchor = dict(row, **{"Billing Latitude": float(row["Billing Latitude"]),
+                                  "Billing Longitude": float(row["Billing Longitude"])})
+            anchor.setdefault("Phone", "")
+            anchor[HOT_SPOTS] = (hot_spots(random.Random(derive_seed(seed, "hot spots", row[ACCOUNT_ID])))
+                                 if profile == "zipf" else None)
+        yield anchor
+
+def iter_farms_writing_contacts(farms, contact_writer, rng=random, as_of=None, start_index=0,
+                                contact_entity=NEARBY_FARMER_CONTACT):
+    """Yield farms unchanged while writing each farm's farmer contact to contact_writer
+
+    start_index is the position of the first farm in the farms file, which its
+    contact's stable mock Account ID is derived from.
+    """
+    # The contact generator pulls each farm from `pending` just after it is pushed
+    pending = []
+    contacts = contact_entity.iter_rows(None, rng=rng, start_index=start_index, as_of=as_of,
+                                        parents=iter(pending.pop, None))
     for farm in farms:
-        # Generate farmer details
-        first_name = random.choice(FARMER_FIRST_NAMES)
-        last_name = random.choice(FARMER_LAST_NAMES)
-        
-        # Generate contact info
-        phone = generate_phone()
-        email = generate_email(first_name, last_name, farm['Account Name'])
-        
-        # Generate dates
-        created_date = datetime.now() - timedelta(days=random.randint(30, 1000))
-        last_activity = datetime.now() - timedelta(days=random.randint(1, 90))
-        
-        # Use same coordinates as farm with slight variation
-        lat = farm['Billing Latitude'] + random.uniform(-0.01, 0.01)
-        lng = farm['Billing Longitude'] + random.uniform(-0.01, 0.01)
-        
-        contact = {
-            "Account Name": farm['Account Name'],
-            "Account ID": f"001{random.randint(100000000, 999999999)}",  # Mock ID
-            "First Name": first_name,
-            "Last Name": last_name,
-            "Title": random.choice(["Owner", "Farm Manager", "Operations Manager", "General Manager", "President"]),
-            "Department": random.choice(["Operations", "Management", "Production", "Field Operations"]),
-            "Phone": phone,
-            "Email": email,
-            "Mailing Street": farm['Billing Street'],
-            "Mailing City": farm['Billing City'],
-            "Mailing State": farm['Billing State'],
-            "Mailing Postal Code": farm['Billing Postal Code'],
-            "Mailing Country": "United States",
-            "Mailing Latitude": round(lat, 6),
-            "Mailing Longitude": round(lng, 6),
-            "Description": f"Farmer at {farm['Account Name']}, {farm['Distance from Sunny Estates (km)']}km from Sunny Estates",
-            "Lead Source": random.choice(["Web", "Phone Inquiry", "Referral", "Trade Show", "Cold Call"]),
-            "Created Date": created_date.strftime("%Y-%m-%d"),
-            "Last Activity Date": last_activity.strftime("%Y-%m-%d")
-        }
-        
-        contacts.append(contact)
-    
-    return contacts
+        pending.append(farm)
+        contact_writer.write(next(contacts))
+        yield farm
 
-def save_to_csv(data, filename):
-    """Save data to CSV file"""
-    if not data:
+def iter_farm_batches_writing_contacts(num_farms, contact_writer, rng=random, as_of=None, start_index=0,
+                                       chunk_size=DEFAULT_CHUNK_SIZE, anchors=None, **params):
+    """Batch-engine version of iter_farms_writing_contacts that also generates the farms
+
+    Each chunk of farms is drawn with the NumPy engine (every farm's point and
+    distance to its anchor in one block), then their contacts in one more batch
+    with the chunk as parents. With anchors (an iterator of anchor rows, one per
+    farm) the farms are neighbors of those anchors; params feeds their Params.
+    """
+    import numpy as np  # Only the batch engine needs NumPy
+
+    farm_entity, contact_entity = (NEARBY_FARM, NEARBY_FARMER_CONTACT) if anchors is None else \
+        (ANCHORED_FARM, ANCHORED_FARMER_CONTACT)
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+    for offset in range(0, num_farms, chunk_size):
+        size = min(chunk_size, num_farms - offset)
+        parents = list(islice(anchors, size)) if anchors is not None else None
+        farms = list(farm_entity.iter_batches(size, seed=np_rng, chunk_size=size, start_index=start_index + offset,
+                                              as_of=as_of, parents=parents, **params))
+        contact_writer.write_all(contact_entity.iter_batches(
+            size, seed=np_rng, chunk_size=size, start_index=start_index + offset, as_of=as_of, parents=farms))
+        yield from farms
+
+def generate_nearby_farmer_contact(farm, rng=random, as_of=None, position=0):
+    """Generate the farmer contact for the nearby farm at position in the farms file"""
+    return next(NEARBY_FARMER_CONTACT.iter_rows(None, rng=rng, start_index=position, as_of=as_of,
+                                                parents=[farm]))
+
+def save_to_csv(data, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Save data (a list or any iterable of rows) to CSV file in fixed-size chunks"""
+    count = stream_to_csv(data, filename, chunk_size=chunk_size)
+    report_saved(count, filename)
+    return count
+
+def report_saved(count, filename):
+    """Print the outcome of writing a CSV file"""
+    if not count:
         print("❌ No data to save")
         return
     
-    fieldnames = data[0].keys()
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
-    
-    print(f"✅ Generated {len(data)} records")
+    print(f"✅ Generated {count} records")
     print(f"📁 Saved to: {filename}")
 
+def generate_shard(count, seed, start_index, filenames, batch=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                   as_of=None, name_seed=None):
+    """Generate one shard of nearby farms and their contacts and return the farm summary stats"""
+    rng = random.Random(seed)
+    farms_file, contacts_file = filenames
+    stats = RunningStats(numeric=[DISTANCE_COLUMN])
+    with ChunkedCsvWriter(contacts_file, chunk_size=chunk_size) as contact_writer:
+        if batch:
+            farms = iter_farm_batches_writing_contacts(count, contact_writer, rng=rng, as_of=as_of,
+                                                       start_index=start_index, chunk_size=chunk_size,
+                                                       name_seed=name_seed)
+        else:
+            farms = iter_nearby_farm_data(count, rng=rng, as_of=as_of, start_index=start_index, name_seed=name_seed)
+            farms = iter_farms_writing_contacts(farms, contact_writer, rng=rng, as_of=as_of, start_index=start_index)
+        stream_to_csv(stats.observe(farms), farms_file, chunk_size=chunk_size)
+    return stats
+
+def generate_anchored_shard(count, seed, start_index, filenames, source, per_anchor, radius_km=10,
+                            density="uniform", anchor_seed=0, batch=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                            as_of=None, name_seed=None):
+    """Generate one shard of neighbor farms around anchor accounts and their contacts
+
+    The shard's farms start at neighbor start_index of the whole run, so it
+    only reads the anchors those neighbors belong to. Returns the farm summary stats.
+    """
+    rng = random.Random(seed)
+    farms_file, contacts_file = filenames
+    stats = RunningStats(numeric=[ANCHOR_DISTANCE_COLUMN])
+    anchors = iter_anchors(source, start_index, count, per_anchor, profile=density, seed=anchor_seed)
+    with ChunkedCsvWriter(contacts_file, chunk_size=chunk_size) as contact_writer:
+        if batch:
+            farms = iter_farm_batches_writing_contacts(count, contact_writer, rng=rng, as_of=as_of,
+                                                       start_index=start_index, chunk_size=chunk_size,
+                                                       anchors=anchors, radius_km=radius_km, density=density,
+                                                       name_seed=name_seed)
+        else:
+            farms = ANCHORED_FARM.iter_rows(None, rng=rng, start_index=start_index, as_of=as_of, parents=anchors,
+                                            radius_km=radius_km, density=density, name_seed=name_seed)
+            farms = iter_farms_writing_contacts(farms, contact_writer, rng=rng, as_of=as_of,
+                                                start_index=start_index, contact_entity=ANCHORED_FARMER_CONTACT)
+        stream_to_csv(stats.observe(farms), farms_file, chunk_size=chunk_size)
+    return stats
+
+def generate_anchored(args, master_seed, as_of):
+    """Scatter --per-anchor neighbor farms around every account of the --anchors CSV"""
+    source = AccountSource(args.anchors)
+    if not source.exists:
+        print(f"❌ Anchor file not found: {args.anchors}")
+        return
+    total = len(source) * args.per_anchor
+
+    print("🌾 Generating Neighbor Farms Around Anchor Accounts...")
+    print(f"📍 Anchors: {len(source)} accounts from {args.anchors}")
+    print(f"🎯 {args.per_anchor} neighbors each within {args.radius}km ({args.density} density)")
+    print(f"🎲 Master seed: {master_seed} (as of {as_of})")
+
+    farms_file = 'data/anchored_farms.csv'
+    contacts_file = 'data/anchored_farmer_contacts.csv'
+    shard_stats = run_sharded(generate_anchored_shard, total, [farms_file, contacts_file], master_seed,
+                              workers=args.workers, shards=args.shards, keep_parts=args.keep_parts,
+                              source=source, per_anchor=args.per_anchor, radius_km=args.radius,
+                              density=args.density, anchor_seed=master_seed, batch=args.batch,
+                              chunk_size=args.chunk_size, as_of=as_of, name_seed=master_seed)
+    stats = reduce(RunningStats.merge, shard_stats)
+
+    for filename in (farms_file, contacts_file):
+        report_saved(stats.count, saved_label(filename, args))
+    if not stats.count:
+        return
+
+    print(f"\n📊 STATISTICS:")
+    print(f"   🏢 Neighbor farms: {stats.count} ({args.per_anchor} per anchor)")
+    print(f"   📍 Average distance to anchor: {stats.mean(ANCHOR_DISTANCE_COLUMN):.1f}km")
+    print(f"   🗺️  Max distance: {stats.max(ANCHOR_DISTANCE_COLUMN):.1f}km")
+    print(f"\n📋 SAMPLE FARMS:")
+    for i, farm in enumerate(stats.samples):
+        print(f"{i+1}. {farm['Account Name']} - {farm[ANCHOR_DISTANCE_COLUMN]}km from {farm['Anchor Account Name']}")
+
 def main():
     """Main function to generate nearby farm data"""
+    parser = argparse.ArgumentParser(description="Generate farms near Sunny Estates with farmer contacts")
+    parser.add_argument("--records", type=int, default=15, help="number of nearby farms to generate")
+    parser.add_argument("--batch", action="store_true",
+                        help="use the vectorized NumPy batch engine instead of the per-row path")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="rows generated and written per chunk")
+    parser.add_argument("--anchors", default=None,
+                        help="Account CSV whose rows become anchors with their own neighbor farms")
+    parser.add_argument("--per-anchor", type=int, default=10, help="neighbor farms per anchor (with --anchors)")
+    parser.add_argument("--radius", type=float, default=10, help="neighbor radius in km (with --anchors)")
+    parser.add_argument("--density", choices=DENSITY_PROFILES, default="uniform",
+                        help="how neighbors are spread around their anchor (with --anchors)")
+    add_sharding_arguments(parser)
+    args = parser.parse_args()
+    master_seed, as_of = resolve_run(args)
+    if args.anchors:
+        generate_anchored(args, master_seed, as_of)
+        return
+    
     print("🌾 Generating Farm Records Near Sunny Estates...")
     print(f"📍 Sunny Estates Location: {SUNNY_ESTATES_LAT}, {SUNNY_ESTATES_LNG}")
     print(f"🎯 Target Radius: 10km")
     
-    # Generate farm data
-    farms = generate_nearby_farm_data(15)
+    print(f"🎲 Master seed: {master_seed} (as of {as_of})")
+    
+    # Stream farms and their farmer contacts to CSV side by side (one part
+    # per shard), collecting summary stats on the way
+    farms_file = 'data/nearby_farms.csv'
+    contacts_file = 'data/nearby_farmer_contacts.csv'
+    shard_stats = run_sharded(generate_shard, args.records, [farms_file, contacts_file], master_seed,
+                              workers=args.workers, shards=args.shards, keep_parts=args.keep_parts,
+                              batch=args.batch, chunk_size=args.chunk_size, as_of=as_of,
+                              name_seed=master_seed)
+    stats = reduce(RunningStats.merge, shard_stats)
     
-    # Generate farmer contacts
-    farmer_contacts = generate_nearby_farmer_contacts(farms)
+    # Every farm gets exactly one farmer contact
+    for filename in (farms_file, contacts_file):
+        report_saved(stats.count, saved_label(filename, args))
     
-    # Save to CSV files
-    save_to_csv(farms, 'data/nearby_farms.csv')
-    save_to_csv(farmer_contacts, 'data/nearby_farmer_contacts.csv')
+    if not stats.count:
+        return
     
     # Display statistics
     print(f"\n📊 STATISTICS:")
-    print(f"   🏢 Farms generated: {len(farms)}")
-    print(f"   👨‍🌾 Farmer contacts: {len(farmer_contacts)}")
-    print(f"   📍 Average distance: {sum(f['Distance from Sunny Estates (km)'] for f in farms) / len(farms):.1f}km")
-    print(f"   🗺️  Max distance: {max(f['Distance from Sunny Estates (km)'] for f in farms):.1f}km")
-    print(f"   🗺️  Min distance: {min(f['Distance from Sunny Estates (km)'] for f in farms):.1f}km")
+    print(f"   🏢 Farms generated: {stats.count}")
+    print(f"   👨‍🌾 Farmer contacts: {stats.count}")
+    print(f"   📍 Average distance: {stats.mean(DISTANCE_COLUMN):.1f}km")
+    print(f"   🗺️  Max distance: {stats.max(DISTANCE_COLUMN):.1f}km")
+    print(f"   🗺️  Min distance: {stats.min(DISTANCE_COLUMN):.1f}km")
     
     # Show sample data
     print(f"\n📋 SAMPLE FARMS:")
-    for i, farm in enumerate(farms[:3]):
+    for i, farm in enumerate(stats.samples):
         print(f"\n{i+1}. {farm['Account Name']}")
         print(f"   🏡 Type: {farm['Agriculture Type']}")
         print(f"   📍 Location: {farm['Billing City']}, {farm['Billing State']}")
@@ -7,6 +7,15 @@ Creates crop records for major crops harvested in the United States
 import csv
 import os
 
+from schema import load_schema
+
+# Crop__c fields from the force-app metadata, in us_crops.csv column order
+CROP = load_schema()["Crop__c"]
+CROP_FIELDNAMES = ["Name"] + CROP.api_names(first=[
+    "Type__c", "Climate__c", "Growing_Season__c", "Harvest_Time_Days__c", "Soil_Type__c",
+    "Water_Requirements__c", "Description__c", "Image_Name__c",
+])
+
 def generate_us_crops():
     """Generate crop records for major US crops"""
     
@@ -278,16 +287,14 @@ def generate_us_crops():
     return crops
 
 def write_crop_csv(crops, filename='us_crops.csv'):
-    """Write crop data to CSV file"""
+    """Write crop data to CSV file, after checking every value against the Crop__c metadata"""
     
-    fieldnames = [
-        'Name', 'Type__c', 'Climate__c', 'Growing_Season__c', 
-        'Harvest_Time_Days__c', 'Soil_Type__c', 'Water_Requirements__c',
-        'Description__c', 'Image_Name__c'
-    ]
+    problems = [f"{crop['Name']}: {problem}" for crop in crops for _, problem in CROP.check(crop)]
+    if problems:
+        raise ValueError("crops do not match the Crop__c fields:\n  " + "\n  ".join(problems))
     
     with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=CROP_FIELDNAMES)
         writer.writeheader()
         writer.writerows(crops)
     
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Bulk API 2.0 Import Plans for Generated CSVs
+Turns generated CSVs into upload-ready job files: display headers are mapped
+to API names through the object schema (Billing Street -> BillingStreet,
+Farm Size (Acres) -> Farm_Size_Acres__c), columns that name no field are
+dropped, and rows are split into job files within the Bulk API 2.0 limits.
+Updates and deletes match records by an Id column (deletes send only that),
+and upserts by the --external-id field.
+
+Each input is read once and streamed straight into its job files, a chunk of
+rows at a time. manifest.json lists the jobs in phases: objects that others
+look up (Account) load before the objects that reference them (Contact), and
+the jobs of one phase can run in parallel (scripts/import_planned.sh):
+
+    python3 data/import_plan.py data/agriculture_farms.csv data/farmer_contacts.csv --out data/import
+    ./scripts/import_planned.sh data/import/manifest.json
+"""
+
+import argparse
+import csv
+import json
+import os
+from itertools import islice
+from operator import itemgetter
+
+from csv_stream import DEFAULT_CHUNK_SIZE, format_column
+from schema import load_schema
+from validate_csv import guess_object
+
+# Bulk API 2.0 accepts up to 150 MB of CSV per job upload, counted after
+# base64 encoding grows it by a third, so jobs stop at 100 MB
+MAX_JOB_BYTES = 100 * 1000 * 1000
+
+# Not a platform limit: caps how many records one failed job has to redo
+MAX_JOB_RECORDS = 1000000
+
+# Per-record limits of Bulk API 2.0; longer rows are left out and counted
+MAX_FIELD_CHARACTERS = 131072
+MAX_RECORD_CHARACTERS = 400000
+
+LINE_ENDING = "CRLF"  # What CsvRowWriter writes, and the job files keep
+MANIFEST = "manifest.json"
+
+OPERATIONS = ("insert", "upsert", "update", "delete")
+
+# Every object's record Id, which the field metadata doesn't list
+RECORD_ID = "Id"
+RECORD_ID_HEADERS = ("Id", "ID")
+
+
+def map_headers(schema_object, fieldnames, keep_id=False):
+    """(positions, api_names, dropped) for the CSV columns that name a field of the object
+
+    Headers are matched by label or API name; of two headers naming the same
+    field (Record Type ID and RecordTypeId) the first is kept. An Id column is
+    kept only with keep_id, since inserts must not send one.
+    """
+    positions, api_names, dropped = [], [], []
+    for position, name in enumerate(fieldnames):
+        if keep_id and name in RECORD_ID_HEADERS:
+            api_name = RECORD_ID
+        else:
+            field = schema_object.field_for(name)
+            api_name = field.api_name if field is not None else None
+        if api_name is None or api_name in api_names:
+            dropped.append(name)
+        else:
+            positions.append(position)
+            api_names.append(api_name)
+    return positions, api_names, dropped
+
+
+def operation_columns(schema_object, fieldnames, operation="insert", external_id=None):
+    """map_headers for an operation: updates and deletes need an Id column, deletes send only it,
+    and upserts need the external_id column"""
+    positions, api_names, dropped = map_headers(schema_object, fieldnames, keep_id=operation != "insert")
+    if operation in ("update", "delete") and RECORD_ID not in api_names:
+        raise ValueError(f"an {operation} needs an Id column: {', '.join(fieldnames)}")
+    if operation == "delete":
+        at = api_names.index(RECORD_ID)
+        dropped += [fieldnames[position] for k, position in enumerate(positions) if k != at]
+        positions, api_names = [positions[at]], [RECORD_ID]
+    if operation == "upsert":
+        if not external_id:
+            raise ValueError("an upsert needs an external ID field")
+        if external_id not in api_names:
+            raise ValueError(f"no column names the external ID field {external_id}: {', '.join(fieldnames)}")
+    return positions, api_names, dropped
+
+
+class JobFiles:
+    """Writes CSV lines into numbered job files, starting a new one at either limit
+
+    With align > 1 a job file that fills up on bytes ends at a multiple of
+    align records, so files ordered into batches (order_by_parent.py) keep
+    their batch boundaries in every job.
+    """
+
+    def __init__(self, stem, header, max_bytes=MAX_JOB_BYTES, max_records=MAX_JOB_RECORDS, align=1):
+        self.stem = stem
+        self.header = header + "\r\n"
+        self.header_bytes = len(self.header.encode("utf-8"))
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.align = align
+        self.jobs = []  # {"file", "records", "bytes"} of each job file, in order
+        self._file = None
+
+    def write(self, lines, sizes):
+        """Write CSV lines (each with its line end) whose encoded sizes are sizes"""
+        start = 0
+        while start < len(lines):
+            if self._file is None:
+                self._open()
+            job = self.jobs[-1]
+            room_bytes = self.max_bytes - job["bytes"]
+            end = start
+            stop = min(len(lines), start + self.max_records - job["records"])
+            while end < stop and sizes[end] <= room_bytes:
+                room_bytes -= sizes[end]
+                end += 1
+            if end < stop and self.align > 1:
+                aligned = (job["records"] + end - start) // self.align * self.align - job["records"]
+                if aligned > 0 or job["records"]:  # Unless one batch is more than a whole job
+                    end = start + max(aligned, 0)
+            if end == start:
+                if job["records"] == 0:
+                    raise ValueError(f"a {sizes[start]:,}-byte row does not fit in a job of "
+                                     f"{self.max_bytes:,} bytes")
+                self.close()  # This job is full
+                continue
+            self._file.write("".join(lines[start:end]))
+            job["records"] += end - start
+            job["bytes"] += sum(sizes[start:end])
+            start = end
+
+    def _open(self):
+        filename = f"{self.stem}.job-{len(self.jobs) + 1:04d}.csv"
+        self._file = open(filename, "w", newline="", encoding="utf-8")
+        self._file.write(self.header)
+        self.jobs.append({"file": filename, "records": 0, "bytes": self.header_bytes})
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def plan_file(filename, out_dir, object_name=None, max_bytes=MAX_JOB_BYTES, max_records=MAX_JOB_RECORDS,
+              chunk_size=DEFAULT_CHUNK_SIZE, schema=None, align=1, operation="insert", external_id=None):
+    """Split one CSV into job files in out_dir and return its manifest entry"""
+    object_name = object_name or guess_object(filename)
+    schema_object = (schema or load_schema())[object_name]
+    stem = os.path.join(out_dir, os.path.splitext(os.path.basename(filename))[0])
+    entry = {"source": filename, "object": object_name, "records": 0, "rejected": 0}
+
+    with open(filename, newline="", encoding="utf-8-sig") as src:
+        reader = csv.reader(src)
+        fieldnames = next(reader, [])
+        try:
+            positions, api_names, dropped = operation_columns(schema_object, fieldnames, operation, external_id)
+        except ValueError as error:
+            raise ValueError(f"{filename}: {error}") from None
+        entry.update(columns=dict(zip([fieldnames[position] for position in positions], api_names)),
+                     dropped=dropped)
+        if not positions:
+            raise ValueError(f"{filename}: no column names a {object_name} field")
+        project = itemgetter(*positions) if len(positions) > 1 else lambda row: (row[positions[0]],)
+        jobs = JobFiles(stem, ",".join(api_names), max_bytes, max_records, align)
+        try:
+            while True:
+                rows = list(islice(reader, chunk_size))
+                if not rows:
+                    break
+                columns = list(zip(*map(project, rows)))
+                lines = [line + "\r\n" for line in map(",".join, zip(*map(format_column, columns)))]
+                sizes = [len(line) if line.isascii() else len(line.encode("utf-8")) for line in lines]
+                if max(sizes) > MAX_FIELD_CHARACTERS:
+                    kept = [k for k, line in enumerate(lines) if _fits(line, columns, k)]
+                    entry["rejected"] += len(lines) - len(kept)
+                    lines, sizes = [lines[k] for k in kept], [sizes[k] for k in kept]
+                jobs.write(lines, sizes)
+                entry["records"] += len(lines)
+        finally:
+            jobs.close()
+    entry["jobs"] = jobs.jobs
+    return entry
+
+
+def _fits(line, columns, k):
+    """Whether row k of a chunk is within the per-field and per-record character limits"""
+    return (len(line) <= MAX_RECORD_CHARACTERS
+            and all(len(column[k]) <= MAX_FIELD_CHARACTERS for column in columns))
+
+
+def load_phases(schema, entries):
+    """Objects of the entries grouped into phases, each after the objects its lookup columns point to"""
+    objects = {entry["object"] for entry in entries}
+    depends = {name: set() for name in objects}
+    for entry in entries:
+        schema_object = schema[entry["object"]]
+        for api_name in entry["columns"].values():
+            field = schema_object.field(api_name) if api_name != RECORD_ID else None
+            if field is not None and field.is_lookup:
+                depends[entry["object"]].update(target for target in field.reference_to
+                                                if target in objects and target != entry["object"])
+    phases, placed = [], set()
+    while len(placed) < len(objects):
+        ready = sorted(name for name in objects - placed if depends[name] <= placed)
+        if not ready:  # A lookup cycle; load the rest together
+            ready = sorted(objects - placed)
+        phases.append(ready)
+        placed.update(ready)
+    return phases
+
+
+def write_plan(filenames, out_dir, object_name=None, max_bytes=MAX_JOB_BYTES, max_records=MAX_JOB_RECORDS,
+               chunk_size=DEFAULT_CHUNK_SIZE, operation="insert", align=1, external_id=None):
+    """Plan the import of CSV files into out_dir and write its manifest; returns the manifest
+
+    external_id is the API name of the field an upsert matches records on.
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"unknown operation {operation}; expected one of {', '.join(OPERATIONS)}")
+    os.makedirs(out_dir, exist_ok=True)
+    schema = load_schema()
+    entries = [plan_file(filename, out_dir, object_name, max_bytes, max_records, chunk_size, schema, align,
+                         operation, external_id)
+               for filename in filenames]
+    phases = load_phases(schema, entries)
+    phase_of = {name: index for index, names in enumerate(phases) for name in names}
+    jobs = []
+    for entry in entries:
+        entry_jobs = entry.pop("jobs")
+        entry["job_count"] = len(entry_jobs)
+        jobs.extend({"phase": phase_of[entry["object"]], "object": entry["object"],
+                     "file": os.path.relpath(job["file"], out_dir), "records": job["records"], "bytes": job["bytes"]}
+                    for job in entry_jobs)
+    manifest = {
+        "operation": operation,
+        "external_id_field": external_id if operation == "upsert" else None,
+        "line_ending": LINE_ENDING,
+        "column_delimiter": "COMMA",
+        "phases": phases,
+        "sources": entries,
+        "jobs": sorted(jobs, key=lambda job: job["phase"]),
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split generated CSVs into Bulk API 2.0 job files")
+    parser.add_argument("files", nargs="+", help="generated CSV files to import")
+    parser.add_argument("--out", default="data/import", help="directory for the job files and manifest.json")
+    parser.add_argument("--object", default=None,
+                        help="object every file is for (default: from each file name)")
+    parser.add_argument("--operation", default="insert", choices=OPERATIONS,
+                        help="Bulk API operation the manifest asks for (update and delete need an Id column)")
+    parser.add_argument("--external-id", default=None,
+                        help="API name of the field upserts match records on")
+    parser.add_argument("--max-bytes", type=int, default=MAX_JOB_BYTES, help="bytes of CSV per job file")
+    parser.add_argument("--max-records", type=int, default=MAX_JOB_RECORDS, help="records per job file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows read and written per chunk")
+    parser.add_argument("--align", type=int, default=1,
+                        help="end jobs at multiples of this many records (10000 for order_by_parent.py output)")
+    args = parser.parse_args()
+    if args.operation == "upsert" and not args.external_id:
+        parser.error("--operation upsert needs --external-id")
+
+    manifest = write_plan(args.files, args.out, args.object, args.max_bytes, args.max_records, args.chunk_size,
+                          args.operation, args.align, args.external_id)
+    for source in manifest["sources"]:
+        print(f"📦 {source['source']} -> {source['object']}: {source['records']:,} records "
+              f"in {source['job_count']} jobs")
+        if source["dropped"]:
+            print(f"   ⚪ Dropped (no {source['object']} field): {', '.join(source['dropped'])}")
+        if source["rejected"]:
+            print(f"   ❌ Left out {source['rejected']:,} rows over the Bulk API field or record size limits")
+    for index, names in enumerate(manifest["phases"], 1):
+        print(f"🔢 Phase {index}: {', '.join(names)}")
+    print(f"📁 Manifest: {os.path.join(args.out, MANIFEST)}")
@@ -0,0 +1,897 @@
+#!/usr/bin/env python3
+"""
+Local Mock Salesforce Org for Offline Load Tests
+A stand-in for the REST and Bulk API 2.0 endpoints the import path uses, so
+loaders and batch planners can be benchmarked end to end without a live,
+rate-limited, shared org:
+
+    python3 data/mock_org.py --port 8787 --latency-ms 30 --record-ms 0.2 --error-rate 0.01
+
+Implemented (under /services/data/vXX.X):
+    sobjects/{Object}                 POST create; GET/PATCH/DELETE sobjects/{Object}/{Id}
+    composite/sobjects                POST create / PATCH update up to 200 records, DELETE ?ids=
+    composite                         POST up to 25 create subrequests, with @{ref.id} references
+    query?q=                          SELECT fields FROM Object [WHERE f = 'v' [AND ...]] [LIMIT n]
+    jobs/ingest                       Bulk API 2.0 ingest jobs: create, upload, close, info, results
+
+Records are checked against the object schema (schema.py) and kept in
+memory. Every request can be slowed (--latency-ms) or fail outright
+(--request-error-rate, 503), and single records can fail (--error-rate).
+Saving takes --record-ms per record while the rows it touches are locked:
+the parents its lookups point to and, for updates and deletes, the records
+themselves. A save that waits longer than --lock-timeout for a lock fails
+with UNABLE_TO_LOCK_ROW. Bulk jobs run 10,000-record batches in parallel
+(--bulk-workers), and batches that time out are retried serially at the end
+of the job, as Salesforce does, which is what random parent order costs.
+GET /mock/stats returns counters; POST /mock/reset empties the org.
+"""
+
+import argparse
+import csv
+import io
+import json
+import random
+import re
+import string
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from order_by_parent import BULK_BATCH_RECORDS
+from schema import load_schema
+
+API_VERSION = "62.0"
+DEFAULT_PORT = 8787
+
+MAX_COLLECTION_RECORDS = 200  # sObject Collections limit per request
+MAX_COMPOSITE_SUBREQUESTS = 25
+MAX_UPLOAD_BYTES = 150 * 1000 * 1000  # Bulk API 2.0 upload limit, counted after base64 encoding
+QUERY_BATCH_SIZE = 2000  # Records per query response before nextRecordsUrl
+LOCK_TIMEOUT = 10.0  # Seconds a save waits for a locked row, as in Salesforce
+DAILY_API_REQUESTS = 15000  # Reported in Sforce-Limit-Info only
+
+# Key prefixes of record Ids; custom objects get a00, a01, ... in name order
+KEY_PREFIXES = {"Account": "001", "Contact": "003", "User": "005", "RecordType": "012"}
+JOB_PREFIX = "750"
+
+# Lookups to these are not locked on save (and lookups with no known target are skipped too)
+SETUP_OBJECTS = {"RecordType", "User", "Group"}
+
+BASE62 = string.digits + string.ascii_uppercase + string.ascii_lowercase
+ID_SUFFIX_CHARACTERS = string.ascii_uppercase + "012345"
+
+COLUMN_DELIMITERS = {"COMMA": ",", "TAB": "\t", "PIPE": "|", "SEMICOLON": ";", "CARET": "^", "BACKQUOTE": "`"}
+BULK_OPERATIONS = {"insert", "update", "upsert", "delete", "hardDelete"}
+TEXT_TYPES = {"Text", "TextArea", "LongTextArea", "Html", "Phone", "Url"}
+
+QUERY = re.compile(r"SELECT\s+(?P<fields>.+?)\s+FROM\s+(?P<object>\w+)"
+                   r"(?:\s+WHERE\s+(?P<where>.+?))?(?:\s+LIMIT\s+(?P<limit>\d+))?\s*$", re.I | re.S)
+CONDITION = re.compile(r"(\w+)\s*=\s*'((?:[^'\\]|\\.)*)'$")
+REFERENCE = re.compile(r"@\{(\w+)\.(\w+)\}")
+
+
+def record_id(prefix, number):
+    """The 18-character Id of the number-th record with a key prefix"""
+    body = prefix + "0MK"  # The "pod" part of real Ids
+    digits = ""
+    while number:
+        number, digit = divmod(number, 62)
+        digits = BASE62[digit] + digits
+    body += digits.rjust(15 - len(body), "0")
+    suffix = ""
+    for start in (0, 5, 10):  # Each case-insensitive suffix character encodes five characters' case
+        bits = sum(1 << offset for offset, character in enumerate(body[start:start + 5]) if character.isupper())
+        suffix += ID_SUFFIX_CHARACTERS[bits]
+    return body + suffix
+
+
+def _text(value):
+    """A JSON value as the text a CSV would hold for it"""
+    if value is None:
+        return ""
+    if value is True or value is False:
+        return "true" if value else "false"
+    return value if isinstance(value, str) else str(value)
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+
+
+class SaveError(Exception):
+    """A record that could not be saved, with Salesforce's status code"""
+
+    def __init__(self, status_code, message, fields=()):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.fields = list(fields)
+
+    def as_json(self):
+        return {"statusCode": self.status_code, "message": self.message, "fields": self.fields}
+
+
+class RowLocks:
+    """Exclusive locks on record Ids, taken all at once so two saves never deadlock"""
+
+    def __init__(self):
+        self._held = set()
+        self._condition = threading.Condition()
+        self.waits = 0  # Saves that had to wait for a lock
+        self.timeouts = 0  # Saves that gave up waiting
+
+    def acquire(self, keys, timeout=None):
+        """Lock every key, waiting up to timeout seconds (None: for ever); False if it timed out"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            waited = False
+            while not self._held.isdisjoint(keys):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.timeouts += 1
+                    return False
+                waited = True
+                self._condition.wait(remaining)
+            self.waits += waited
+            self._held.update(keys)
+            return True
+
+    def release(self, keys):
+        with self._condition:
+            self._held.difference_update(keys)
+            self._condition.notify_all()
+
+
+class BulkJob:
+    """One Bulk API 2.0 ingest job and its results"""
+
+    def __init__(self, job_id, object_name, operation, external_id=None, line_ending="LF", column_delimiter="COMMA"):
+        self.id = job_id
+        self.object = object_name
+        self.operation = operation
+        self.external_id = external_id
+        self.line_ending = line_ending
+        self.column_delimiter = column_delimiter
+        self.state = "Open"
+        self.created = _now()
+        self.modified = self.created
+        self.data = None
+        self.error_message = None
+        self.fieldnames = []
+        self.successes = []  # (Id, created, row)
+        self.failures = []  # (Id, error, row)
+        self.unprocessed = []  # Rows of an aborted or failed job
+        self.retries = 0
+        self.processing_ms = 0
+        self.lock = threading.Lock()
+
+    def info(self):
+        info = {
+            "id": self.id,
+            "operation": self.operation,
+            "object": self.object,
+            "createdById": record_id(KEY_PREFIXES["User"], 1),
+            "createdDate": self.created,
+            "systemModstamp": self.modified,
+            "state": self.state,
+            "concurrencyMode": "Parallel",
+            "contentType": "CSV",
+            "apiVersion": float(API_VERSION),
+            "jobType": "V2Ingest",
+            "lineEnding": self.line_ending,
+            "columnDelimiter": self.column_delimiter,
+            "numberRecordsProcessed": len(self.successes) + len(self.failures),
+            "numberRecordsFailed": len(self.failures),
+            "retries": self.retries,
+            "totalProcessingTime": self.processing_ms,
+            "apiActiveProcessingTime": self.processing_ms,
+            "apexProcessingTime": 0,
+        }
+        if self.external_id:
+            info["externalIdFieldName"] = self.external_id
+        if self.error_message:
+            info["errorMessage"] = self.error_message
+        return info
+
+    def set_state(self, state):
+        self.state = state
+        self.modified = _now()
+
+
+class MockOrg:
+    """The in-memory org behind the mock endpoints, usable in-process by benchmarks
+
+        org = MockOrg(record_ms=0.2)
+        url = org.start()  # http://127.0.0.1:<free port>
+        ...
+        org.stop()
+    """
+
+    def __init__(self, schema=None, latency_ms=0.0, record_ms=0.0, error_rate=0.0, request_error_rate=0.0,
+                 lock_timeout=LOCK_TIMEOUT, bulk_workers=4, check_lookups=False, token=None, seed=None):
+        self.schema = schema or load_schema()
+        self.latency_ms = latency_ms
+        self.record_ms = record_ms
+        self.error_rate = error_rate
+        self.request_error_rate = request_error_rate
+        self.lock_timeout = lock_timeout
+        self.check_lookups = check_lookups
+        self.token = token
+        self.verbose = False
+        self.random = random.Random(seed)
+        self.locks = RowLocks()
+        self.bulk = ThreadPoolExecutor(max_workers=bulk_workers, thread_name_prefix="bulk-batch")
+        custom = sorted(obj.name for obj in self.schema if obj.name.endswith("__c"))
+        self.prefixes = dict(KEY_PREFIXES, **{name: f"a{BASE62[index // 62]}{BASE62[index % 62]}"
+                                               for index, name in enumerate(custom)})
+        self.objects = {prefix: name for name, prefix in self.prefixes.items()}
+        self.stats = Counter()
+        self._store_lock = threading.Lock()
+        self._server = None
+        self.reset()
+
+    def reset(self):
+        """Forget every record, job and counter"""
+        with self._store_lock:
+            self.records = {obj.name: {} for obj in self.schema}
+            self.jobs = {}
+            self.cursors = {}
+            self._numbers = Counter()
+            self._indexes = {}  # (object, field) -> {value: Id}, built by the first upsert on the field
+            self.stats.clear()
+            self.locks.waits = self.locks.timeouts = 0
+
+    # Serving
+
+    def start(self, host="127.0.0.1", port=0):
+        """Serve in a background thread; returns the base URL"""
+        self._server = _MockServer((host, port), _Handler)
+        self._server.org = self
+        threading.Thread(target=self._server.serve_forever, name="mock-org", daemon=True).start()
+        return f"http://{host}:{self._server.server_port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self.bulk.shutdown(wait=False, cancel_futures=True)
+
+    def counters(self):
+        counters = dict(self.stats, lock_waits=self.locks.waits, lock_timeouts=self.locks.timeouts)
+        counters["records"] = {name: len(records) for name, records in self.records.items() if records}
+        return counters
+
+    def chance(self, rate):
+        return rate > 0 and self.random.random() < rate
+
+    # Saving records
+
+    def object(self, name):
+        if name not in self.schema:
+            raise SaveError("NOT_FOUND", f"sObject type '{name}' is not supported.")
+        return self.schema[name]
+
+    def lock_keys(self, object_name, operation, records):
+        """The Ids saving records locks: lookup targets, and the records themselves unless inserted"""
+        schema_object = self.object(object_name)
+        lookups = [field.api_name for field in schema_object.lookups()
+                   if field.reference_to and not set(field.reference_to) <= SETUP_OBJECTS]
+        keys = {record[name] for record in records for name in lookups if record.get(name)}
+        if operation != "insert":
+            keys.update(record["Id"] for record in records if record.get("Id"))
+        return keys
+
+    def save_all(self, object_name, operation, records, all_or_none=False, timeout=LOCK_TIMEOUT, external_id=None):
+        """Save records (dicts of API name -> text) as one transaction; a list of (Id, created) or SaveError
+
+        Locks are held for --record-ms per record. If they cannot be had
+        within timeout seconds every record fails with UNABLE_TO_LOCK_ROW,
+        and None is returned instead so Bulk batches can be retried.
+        """
+        keys = self.lock_keys(object_name, operation, records)
+        if keys and not self.locks.acquire(keys, timeout):
+            return None
+        try:
+            if self.record_ms:
+                time.sleep(self.record_ms * len(records) / 1000)
+            with self._store_lock:
+                problems = [self._problem(object_name, operation, record, external_id) for record in records]
+                if all_or_none and any(problems):
+                    rolled_back = SaveError("ALL_OR_NONE_OPERATION_ROLLED_BACK",
+                                            "Record rolled back because not all records were valid and the "
+                                            "request was using AllOrNone header")
+                    results = [problem or rolled_back for problem in problems]
+                else:
+                    results = [problem or self._apply(object_name, operation, record, external_id)
+                               for record, problem in zip(records, problems)]
+            saved = sum(not isinstance(result, SaveError) for result in results)
+            self.stats["records_saved"] += saved
+            self.stats["records_failed"] += len(results) - saved
+            return results
+        finally:
+            if keys:
+                self.locks.release(keys)
+
+    def locked_out(self, object_name, operation, records):
+        """The results of records that could not get their locks"""
+        keys = sorted(self.lock_keys(object_name, operation, records))
+        self.stats["records_failed"] += len(records)
+        return [SaveError("UNABLE_TO_LOCK_ROW",
+                          f"unable to obtain exclusive access to this record or {len(keys)} records: "
+                          + ",".join(keys[:5]))] * len(records)
+
+    def _problem(self, object_name, operation, record, external_id):
+        """The SaveError that keeps record from being saved, or None (store lock held)"""
+        schema_object = self.object(object_name)
+        records = self.records[object_name]
+        if operation in ("update", "delete", "hardDelete"):
+            record_id_ = record.get("Id", "")
+            if not record_id_:
+                return SaveError("MISSING_ARGUMENT", "Id not specified in an update call", ["Id"])
+            if record_id_ not in records:
+                return SaveError("INVALID_CROSS_REFERENCE_KEY", "invalid cross reference id", ["Id"])
+            if operation != "update":
+                return None
+        if operation == "upsert" and not record.get(external_id):
+            return SaveError("MISSING_ARGUMENT", f"{external_id} not specified", [external_id])
+        if self.chance(self.error_rate):
+            return SaveError("FIELD_CUSTOM_VALIDATION_EXCEPTION", "Simulated validation rule failure")
+        creating = operation == "insert" or (operation == "upsert" and self._match(object_name, external_id,
+                                                                                   record[external_id]) is None)
+        for name, value in record.items():
+            if name == "Id":
+                continue
+            field = schema_object.fields.get(name)
+            if field is None:
+                return SaveError("INVALID_FIELD", f"No such column '{name}' on sobject of type {object_name}",
+                                 [name])
+            if not value and not creating:
+                continue
+            problem = field.check(value)
+            if problem:
+                return SaveError(self._status_code(field, value), f"{field.label}: {problem}", [name])
+            if self.check_lookups and field.is_lookup and value and \
+                    not any(value in self.records.get(target, ()) for target in field.reference_to):
+                return SaveError("INVALID_CROSS_REFERENCE_KEY", f"{field.label}: id value of incorrect type: "
+                                 f"{value}", [name])
+        if creating:
+            missing = [field.api_name for field in schema_object.fields.values()
+                       if field.required and not record.get(field.api_name)]
+            if missing:
+                return SaveError("REQUIRED_FIELD_MISSING", f"Required fields are missing: [{', '.join(missing)}]",
+                                 missing)
+        return None
+
+    @staticmethod
+    def _status_code(field, value):
+        if not value:
+            return "REQUIRED_FIELD_MISSING"
+        if field.picklist is not None:
+            return "INVALID_OR_NULL_FOR_RESTRICTED_PICKLIST"
+        if field.type == "Email":
+            return "INVALID_EMAIL_ADDRESS"
+        if field.type in TEXT_TYPES:
+            return "STRING_TOO_LONG"
+        return "INVALID_TYPE_ON_FIELD_IN_RECORD"
+
+    def _match(self, object_name, external_id, value):
+        """The Id of the record whose external_id field is value, or None (store lock held)"""
+        key = (object_name, external_id)
+        if key not in self._indexes:
+            self._indexes[key] = {record[external_id]: record_id_
+                                  for record_id_, record in self.records[object_name].items()
+                                  if record.get(external_id)}
+        return self._indexes[key].get(value)
+
+    def _apply(self, object_name, operation, record, external_id):
+        """Write a checked record; returns (Id, created) (store lock held)"""
+        records = self.records[object_name]
+        if operation in ("delete", "hardDelete"):
+            old = records.pop(record["Id"])
+            for (name, field), index in self._indexes.items():
+                if name == object_name and old.get(field):
+                    index.pop(old[field], None)
+            return record["Id"], False
+        target = record.get("Id") if operation == "update" else None
+        if operation == "upsert":
+            target = self._match(object_name, external_id, record[external_id])
+        created = target is None
+        if created:
+            self._numbers[object_name] += 1
+            target = record_id(self.prefixes[object_name], self._numbers[object_name])
+            records[target] = {"Id": target}
+        saved = records[target]
+        for (name, field), index in self._indexes.items():
+            if name == object_name and field in record:
+                index.pop(saved.get(field), None)
+                if record[field]:
+                    index[record[field]] = target
+        saved.update((name, value) for name, value in record.items() if name != "Id")
+        return target, created
+
+    # Bulk API 2.0
+
+    def create_job(self, body):
+        object_name, operation = body.get("object"), body.get("operation")
+        if operation not in BULK_OPERATIONS:
+            raise SaveError("INVALIDJOB", f"Invalid operation: {operation}")
+        self.object(object_name)
+        if operation == "upsert" and not body.get("externalIdFieldName"):
+            raise SaveError("INVALIDJOB", "externalIdFieldName is required for upsert")
+        if body.get("columnDelimiter", "COMMA") not in COLUMN_DELIMITERS:
+            raise SaveError("INVALIDJOB", f"Invalid columnDelimiter: {body['columnDelimiter']}")
+        with self._store_lock:
+            self._numbers["job"] += 1
+            job = BulkJob(record_id(JOB_PREFIX, self._numbers["job"]), object_name, operation,
+                          body.get("externalIdFieldName"), body.get("lineEnding", "LF"),
+                          body.get("columnDelimiter", "COMMA"))
+            self.jobs[job.id] = job
+        self.stats["bulk_jobs"] += 1
+        return job
+
+    def close_job(self, job):
+        """Start processing an uploaded job in the background"""
+        job.set_state("UploadComplete")
+        threading.Thread(target=self._run_job, args=(job,), name=f"job-{job.id}", daemon=True).start()
+
+    def _run_job(self, job):
+        start = time.perf_counter()
+        job.set_state("InProgress")
+        text = (job.data or b"").decode("utf-8-sig")
+        reader = csv.reader(io.StringIO(text, newline=""), delimiter=COLUMN_DELIMITERS[job.column_delimiter])
+        job.fieldnames = next(reader, [])
+        rows = list(reader)
+        schema_object = self.schema[job.object]
+        unknown = [name for name in job.fieldnames if name != "Id" and name not in schema_object.fields]
+        if not job.fieldnames or unknown:
+            job.error_message = (f"InvalidBatch : Field name not found : {unknown[0]}" if unknown
+                                 else "InvalidBatch : No content")
+            job.unprocessed = rows
+            job.set_state("Failed")
+            return
+        batches = [rows[start:start + BULK_BATCH_RECORDS] for start in range(0, len(rows), BULK_BATCH_RECORDS)]
+        futures = [self.bulk.submit(self._run_batch, job, batch, self.lock_timeout) for batch in batches]
+        locked = [batch for batch, future in zip(batches, futures) if not future.result()]
+        for batch in locked:  # Batches that timed out on locks are retried one at a time
+            job.retries += 1
+            self.stats["bulk_batch_retries"] += 1
+            self._run_batch(job, batch, None)
+        job.processing_ms = round((time.perf_counter() - start) * 1000)
+        if job.state != "Aborted":
+            job.set_state("JobComplete")
+
+    def _run_batch(self, job, rows, timeout):
+        """Save one batch of a job; False if it could not get its locks in time"""
+        if job.state == "Aborted":
+            with job.lock:
+                job.unprocessed.extend(rows)
+            return True
+        fieldnames = job.fieldnames
+        # Blank values leave a field unset, as in Bulk API CSVs
+        records = [{name: value for name, value in zip(fieldnames, row) if value} for row in rows]
+        results = self.save_all(job.object, job.operation, records, timeout=timeout, external_id=job.external_id)
+        if results is None:
+            return False
+        with job.lock:
+            for row, record, result in zip(rows, records, results):
+                if isinstance(result, SaveError):
+                    job.failures.append((record.get("Id", ""),
+                                         f"{result.status_code}:{result.message}:{','.join(result.fields)} --", row))
+                else:
+                    job.successes.append((result[0], "true" if result[1] else "false", row))
+        return True
+
+    def job_results(self, job, kind):
+        """The CSV text of a job's successfulResults, failedResults or unprocessedrecords"""
+        out = io.StringIO()
+        writer = csv.writer(out, quoting=csv.QUOTE_ALL, lineterminator="\n")
+        with job.lock:
+            if kind == "successfulResults":
+                writer.writerow(["sf__Id", "sf__Created"] + job.fieldnames)
+                writer.writerows([record_id_, created] + row for record_id_, created, row in job.successes)
+            elif kind == "failedResults":
+                writer.writerow(["sf__Id", "sf__Error"] + job.fieldnames)
+                writer.writerows([record_id_, error] + row for record_id_, error, row in job.failures)
+            else:
+                writer.writerow(job.fieldnames)
+                writer.writerows(job.unprocessed)
+        return out.getvalue()
+
+    # Queries
+
+    def query(self, soql):
+        match = QUERY.match(soql.strip())
+        if not match:
+            raise SaveError("MALFORMED_QUERY", f"mock queries are SELECT fields FROM Object [WHERE ...] [LIMIT n]: "
+                            f"{soql}")
+        object_name = match["object"]
+        schema_object = self.object(object_name)
+        fields = [name.strip() for name in match["fields"].split(",")]
+        conditions = []
+        for condition in re.split(r"\s+AND\s+", match["where"], flags=re.I) if match["where"] else []:
+            parsed = CONDITION.match(condition.strip())
+            if not parsed:
+                raise SaveError("MALFORMED_QUERY", f"mock WHERE clauses are field = 'value' joined by AND: "
+                                f"{condition}")
+            conditions.append((parsed[1], parsed[2].replace("\\'", "'")))
+        for name in fields + [name for name, _ in conditions]:
+            if name != "Id" and name not in schema_object.fields:
+                raise SaveError("INVALID_FIELD", f"No such column '{name}' on entity '{object_name}'")
+        with self._store_lock:
+            ids = [record_id_ for record_id_, record in self.records[object_name].items()
+                   if all(record.get(name, "") == value for name, value in conditions)]
+        if match["limit"]:
+            ids = ids[:int(match["limit"])]
+        self.stats["queries"] += 1
+        return self._query_page(object_name, fields, ids, len(ids))
+
+    def query_more(self, locator):
+        with self._store_lock:
+            cursor = self.cursors.pop(locator, None)
+        if cursor is None:
+            raise SaveError("INVALID_QUERY_LOCATOR", "invalid query locator")
+        return self._query_page(*cursor)
+
+    def _query_page(self, object_name, fields, ids, total):
+        page, rest = ids[:QUERY_BATCH_SIZE], ids[QUERY_BATCH_SIZE:]
+        records = []
+        with self._store_lock:
+            for record_id_ in page:
+                record = self.records[object_name].get(record_id_)
+                if record is not None:
+                    records.append(dict({"attributes": {"type": object_name, "url": self.record_url(object_name,
+                                                                                                   record_id_)}},
+                                        **{name: record.get(name) or None for name in fields}))
+            result = {"totalSize": total, "done": not rest, "records": records}
+            if rest:
+                self._numbers["cursor"] += 1  # Never reused, unlike len(self.cursors) once cursors are popped
+                locator = f"01g{self._numbers['cursor']:015d}-{total - len(rest)}"
+                self.cursors[locator] = (object_name, fields, rest, total)
+                result["nextRecordsUrl"] = f"/services/data/v{API_VERSION}/query/{locator}"
+        return result
+
+    @staticmethod
+    def record_url(object_name, record_id_):
+        return f"/services/data/v{API_VERSION}/sobjects/{object_name}/{record_id_}"
+
+
+class _MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # Load tests open many connections at once
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients can pool connections
+    server_version = "MockSalesforce/1.0"
+    routes = []  # (method, compiled path pattern, handler method name)
+
+    def log_message(self, format, *args):
+        if self.server.org.verbose:
+            super().log_message(format, *args)
+
+    # Plumbing
+
+    def _dispatch(self, method):
+        org = self.server.org
+        url = urlsplit(self.path)
+        self.query_params = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+        org.stats["requests"] += 1
+        if org.latency_ms:
+            time.sleep(org.latency_ms / 1000)
+        if org.token and self.headers.get("Authorization") != f"Bearer {org.token}":
+            return self._errors(401, "INVALID_SESSION_ID", "Session expired or invalid")
+        for route_method, pattern, name in self.routes:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                if not url.path.startswith("/mock/") and org.chance(org.request_error_rate):
+                    org.stats["request_errors"] += 1
+                    return self._errors(503, "SERVER_UNAVAILABLE", "Simulated outage, retry the request")
+                try:
+                    return getattr(self, name)(*map(unquote, match.groups()))
+                except SaveError as error:
+                    status = 404 if error.status_code == "NOT_FOUND" else 400
+                    return self._errors(status, error.status_code, error.message)
+                except (ValueError, KeyError, TypeError) as error:
+                    return self._errors(400, "JSON_PARSER_ERROR", str(error))
+        return self._errors(404, "NOT_FOUND", "The requested resource does not exist")
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _send(self, status, body=b"", content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Sforce-Limit-Info",
+                         f"api-usage={self.server.org.stats['requests']}/{DAILY_API_REQUESTS}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status, value):
+        self._send(status, json.dumps(value).encode("utf-8"))
+
+    def _errors(self, status, code, message, fields=None):
+        error = {"message": message, "errorCode": code}
+        if fields is not None:
+            error["fields"] = fields
+        self._json(status, [error])
+
+    def _read_json(self):
+        return json.loads(self.body or b"{}")
+
+    @staticmethod
+    def _record(body, object_name=None):
+        """(object, record of API name -> text) from a JSON record with optional attributes"""
+        body = dict(body)
+        attributes = body.pop("attributes", None) or {}
+        return attributes.get("type", object_name), {name: _text(value) for name, value in body.items()}
+
+    @staticmethod
+    def _result(result):
+        if isinstance(result, SaveError):
+            return {"success": False, "errors": [result.as_json()]}
+        return {"id": result[0], "success": True, "errors": []}
+
+    def _save(self, object_name, operation, records, all_or_none=False):
+        org = self.server.org
+        org.object(object_name)
+        results = org.save_all(object_name, operation, records, all_or_none, org.lock_timeout)
+        return results if results is not None else org.locked_out(object_name, operation, records)
+
+    # Endpoints
+
+    def versions(self):
+        self._json(200, [{"label": "Mock", "url": f"/services/data/v{API_VERSION}", "version": API_VERSION}])
+
+    def create(self, object_name):
+        _, record = self._record(self._read_json(), object_name)
+        [result] = self._save(object_name, "insert", [record])
+        if isinstance(result, SaveError):
+            return self._errors(400, result.status_code, result.message, result.fields)
+        self._json(201, self._result(result))
+
+    def get_record(self, object_name, record_id_):
+        org = self.server.org
+        org.object(object_name)
+        record = org.records[object_name].get(record_id_)
+        if record is None:
+            return self._errors(404, "NOT_FOUND", "The requested resource does not exist")
+        fields = self.query_params.get("fields", [",".join(record)])[0].split(",")
+        self._json(200, dict({"attributes": {"type": object_name, "url": org.record_url(object_name, record_id_)}},
+                             **{name: record.get(name) or None for name in fields}))
+
+    def update(self, object_name, record_id_):
+        _, record = self._record(self._read_json(), object_name)
+        [result] = self._save(object_name, "update", [dict(record, Id=record_id_)])
+        if isinstance(result, SaveError):
+            status = 404 if result.status_code == "INVALID_CROSS_REFERENCE_KEY" else 400
+            return self._errors(status, result.status_code, result.message, result.fields)
+        self._send(204)
+
+    def delete(self, object_name, record_id_):
+        [result] = self._save(object_name, "delete", [{"Id": record_id_}])
+        if isinstance(result, SaveError):
+            return self._errors(404, "ENTITY_IS_DELETED", "entity is deleted", [])
+        self._send(204)
+
+    def collection_save(self):
+        body = self._read_json()
+        operation = "insert" if self.command == "POST" else "update"
+        records = body.get("records", [])
+        if len(records) > MAX_COLLECTION_RECORDS:
+            return self._errors(400, "EXCEEDED_ID_LIMIT", f"record limit reached. cannot submit more than "
+                                f"{MAX_COLLECTION_RECORDS} records into this call")
+        # Records are saved in runs of one object, as Salesforce chunks mixed collections
+        parsed = [self._record(record) for record in records]
+        results, start = [], 0
+        while start < len(parsed):
+            object_name = parsed[start][0]
+            end = start
+            while end < len(parsed) and parsed[end][0] == object_name:
+                end += 1
+            results.extend(self._save(object_name, operation, [record for _, record in parsed[start:end]],
+                                      body.get("allOrNone", False)))
+            start = end
+        self._json(200, [self._result(result) for result in results])
+
+    def collection_delete(self):
+        org = self.server.org
+        ids = self.query_params.get("ids", [""])[0].split(",")
+        results = []
+        for record_id_ in ids:
+            object_name = org.objects.get(record_id_[:3])
+            if object_name is None:
+                results.append(SaveError("MALFORMED_ID", f"malformed id {record_id_}"))
+            else:
+                results.extend(self._save(object_name, "delete", [{"Id": record_id_}]))
+        self._json(200, [dict(self._result(result), id=record_id_) if not isinstance(result, SaveError)
+                         else self._result(result) for record_id_, result in zip(ids, results)])
+
+    def composite(self):
+        body = self._read_json()
+        subrequests = body.get("compositeRequest", [])
+        if len(subrequests) > MAX_COMPOSITE_SUBREQUESTS:
+            return self._errors(400, "LIMIT_EXCEEDED", f"Limit exceeded: more than {MAX_COMPOSITE_SUBREQUESTS} "
+                                "subrequests")
+        org = self.server.org
+        references, responses, created, failed = {}, [], [], False
+        for subrequest in subrequests:
+            reference_id = subrequest.get("referenceId")
+            path = urlsplit(subrequest.get("url", "")).path
+            match = re.match(r"/services/data/v[\d.]+/sobjects/(\w+)/?$", path)
+            if failed and body.get("allOrNone"):
+                responses.append({"body": [{"errorCode": "PROCESSING_HALTED",
+                                            "message": "The transaction was rolled back since another operation "
+                                                       "in the same transaction failed."}],
+                                  "httpHeaders": {}, "httpStatusCode": 400, "referenceId": reference_id})
+                continue
+            if subrequest.get("method") != "POST" or not match:
+                raise SaveError("METHOD_NOT_ALLOWED", "the mock runs only sObject create subrequests")
+            record_json = json.loads(REFERENCE.sub(lambda ref: str(references.get(ref[1], {}).get(ref[2], "")),
+                                                   json.dumps(subrequest.get("body", {}))))
+            _, record = self._record(record_json, match[1])
+            [result] = self._save(match[1], "insert", [record])
+            if isinstance(result, SaveError):
+                failed = True
+                responses.append({"body": [{"errorCode": result.status_code, "message": result.message,
+                                            "fields": result.fields}],
+                                  "httpHeaders": {}, "httpStatusCode": 400, "referenceId": reference_id})
+            else:
+                created.append((match[1], result[0]))
+                references[reference_id] = {"id": result[0]}
+                responses.append({"body": self._result(result), "httpHeaders": {"Location": org.record_url(
+                    match[1], result[0])}, "httpStatusCode": 201, "referenceId": reference_id})
+        if failed and body.get("allOrNone"):
+            with org._store_lock:  # Roll back what was created before the failure
+                for object_name, record_id_ in created:
+                    org.records[object_name].pop(record_id_, None)
+            for response in responses:
+                if response["httpStatusCode"] == 201:
+                    response.update(httpStatusCode=400, httpHeaders={}, body=[{
+                        "errorCode": "PROCESSING_HALTED",
+                        "message": "The transaction was rolled back since another operation in the same "
+                                   "transaction failed."}])
+        self._json(200, {"compositeResponse": responses})
+
+    def query(self):
+        self._json(200, self.server.org.query(self.query_params.get("q", [""])[0]))
+
+    def query_more(self, locator):
+        self._json(200, self.server.org.query_more(locator))
+
+    def create_job(self):
+        job = self.server.org.create_job(self._read_json())
+        self._json(200, job.info())
+
+    def list_jobs(self):
+        self._json(200, {"done": True, "records": [job.info() for job in self.server.org.jobs.values()],
+                         "nextRecordsUrl": None})
+
+    def _job(self, job_id):
+        job = self.server.org.jobs.get(job_id)
+        if job is None:
+            raise SaveError("NOT_FOUND", "The requested resource does not exist")
+        return job
+
+    def job_info(self, job_id):
+        self._json(200, self._job(job_id).info())
+
+    def upload(self, job_id):
+        job = self._job(job_id)
+        if job.state != "Open":
+            return self._errors(409, "INVALIDJOBSTATE", f"Job is not open for uploads, it is {job.state}")
+        if job.data is not None:
+            return self._errors(400, "INVALIDJOB", "the mock accepts one upload per job")
+        if -(-len(self.body) // 3) * 4 > MAX_UPLOAD_BYTES:
+            return self._errors(400, "INVALIDJOB", "upload exceeds 150 MB after base64 encoding")
+        job.data = self.body
+        self._send(201)
+
+    def change_job(self, job_id):
+        job = self._job(job_id)
+        state = self._read_json().get("state")
+        if state == "UploadComplete" and job.state == "Open":
+            self.server.org.close_job(job)
+        elif state == "Aborted" and job.state in ("Open", "UploadComplete", "InProgress"):
+            job.set_state("Aborted")
+        else:
+            return self._errors(400, "INVALIDJOBSTATE", f"Cannot change a {job.state} job to {state}")
+        self._json(200, job.info())
+
+    def delete_job(self, job_id):
+        job = self._job(job_id)
+        if job.state in ("UploadComplete", "InProgress"):
+            return self._errors(400, "INVALIDJOBSTATE", "Cannot delete a job that is being processed")
+        self.server.org.jobs.pop(job_id)
+        self._send(204)
+
+    def job_results(self, job_id, kind):
+        self._send(200, self.server.org.job_results(self._job(job_id), kind).encode("utf-8"), "text/csv")
+
+    def stats(self):
+        self._json(200, self.server.org.counters())
+
+    def reset(self):
+        self.server.org.reset()
+        self._send(204)
+
+
+_VERSIONED = r"/services/data/v[\d.]+"
+_Handler.routes = [(method, re.compile(pattern + "$"), name) for method, pattern, name in [
+    ("GET", r"/services/data/?", "versions"),
+    ("POST", _VERSIONED + r"/sobjects/(\w+)/?", "create"),
+    ("GET", _VERSIONED + r"/sobjects/(\w+)/(\w{15,18})", "get_record"),
+    ("PATCH", _VERSIONED + r"/sobjects/(\w+)/(\w{15,18})", "update"),
+    ("DELETE", _VERSIONED + r"/sobjects/(\w+)/(\w{15,18})", "delete"),
+    ("POST", _VERSIONED + r"/composite/sobjects/?", "collection_save"),
+    ("PATCH", _VERSIONED + r"/composite/sobjects/?", "collection_save"),
+    ("DELETE", _VERSIONED + r"/composite/sobjects/?", "collection_delete"),
+    ("POST", _VERSIONED + r"/composite/?", "composite"),
+    ("GET", _VERSIONED + r"/query/?", "query"),
+    ("GET", _VERSIONED + r"/query/([\w-]+)", "query_more"),
+    ("POST", _VERSIONED + r"/jobs/ingest/?", "create_job"),
+    ("GET", _VERSIONED + r"/jobs/ingest/?", "list_jobs"),
+    ("GET", _VERSIONED + r"/jobs/ingest/(\w+)/?", "job_info"),
+    ("PATCH", _VERSIONED + r"/jobs/ingest/(\w+)/?", "change_job"),
+    ("DELETE", _VERSIONED + r"/jobs/ingest/(\w+)/?", "delete_job"),
+    ("PUT", _VERSIONED + r"/jobs/ingest/(\w+)/batches/?", "upload"),
+    ("GET", _VERSIONED + r"/jobs/ingest/(\w+)/(successfulResults|failedResults|unprocessedrecords)/?",
+     "job_results"),
+    ("GET", r"/mock/stats", "stats"),
+    ("POST", r"/mock/reset", "reset"),
+]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local mock of the Salesforce REST and Bulk API 2.0")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every request")
+    parser.add_argument("--record-ms", type=float, default=0.0,
+                        help="time each record takes to save, with its rows locked")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="chance a record fails validation")
+    parser.add_argument("--request-error-rate", type=float, default=0.0,
+                        help="chance a whole request fails with 503 SERVER_UNAVAILABLE")
+    parser.add_argument("--lock-timeout", type=float, default=LOCK_TIMEOUT,
+                        help="seconds a save waits for locked rows before UNABLE_TO_LOCK_ROW")
+    parser.add_argument("--bulk-workers", type=int, default=4, help="Bulk API batches processed at once")
+    parser.add_argument("--check-lookups", action="store_true",
+                        help="fail records whose lookups name no record in the mock org")
+    parser.add_argument("--token", default=None, help="require this Bearer token (default: accept any request)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the simulated errors")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    org = MockOrg(latency_ms=args.latency_ms, record_ms=args.record_ms, error_rate=args.error_rate,
+                  request_error_rate=args.request_error_rate, lock_timeout=args.lock_timeout,
+                  bulk_workers=args.bulk_workers, check_lookups=args.check_lookups, token=args.token, seed=args.seed)
+    server = _MockServer((args.host, args.port), _Handler)
+    server.org = org
+    org.verbose = args.verbose
+    print(f"🧪 Mock Salesforce org at http://{args.host}:{server.server_port}/services/data/v{API_VERSION}")
+    print(f"   Objects: {', '.join(obj.name for obj in org.schema)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n📊 " + json.dumps(org.counters()))
+    finally:
+        server.server_close()
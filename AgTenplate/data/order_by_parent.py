@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Order Child Records by Parent for Bulk Loads
+Contacts are generated in random account order, so a bulk load spreads the
+children of one account over many batches; batches processed in parallel
+then wait on the same Account row locks and get retried one at a time.
+
+This stage rewrites a child CSV so that rows are grouped by parent
+(Account ID) and every parent's children fall in the same Bulk API batch
+(10,000 records). It is an external merge sort: sorted runs of at most
+--memory-mb of rows go to temporary files, which are merged back in one
+streaming pass, so files far larger than RAM sort in bounded memory.
+
+    python3 data/order_by_parent.py data/farmer_contacts.csv
+    python3 data/import_plan.py data/farmer_contacts.by_parent.csv --align 10000
+"""
+
+import argparse
+import csv
+import heapq
+import os
+import shutil
+import tempfile
+import time
+from contextlib import ExitStack
+from itertools import groupby, islice
+from operator import itemgetter
+
+from csv_stream import DEFAULT_CHUNK_SIZE
+from schema import load_schema
+from validate_csv import guess_object
+
+# Bulk API 2.0 splits job data into batches of this many records
+BULK_BATCH_RECORDS = 10000
+
+# Rows held in memory per sorted run, as an estimate of their Python size
+DEFAULT_MEMORY_MB = 256
+
+# Runs merged at once; more runs are merged in several passes
+MAX_MERGE_FANIN = 64
+
+# Approximate CPython size of a parsed row beyond its characters: the list
+# and, per field, a list slot and a str header
+ROW_OVERHEAD_BYTES = 56
+FIELD_OVERHEAD_BYTES = 57
+
+
+def parent_position(schema_object, fieldnames, parent="AccountId"):
+    """Position of the parent column, given by header or API name"""
+    for position, name in enumerate(fieldnames):
+        field = schema_object.field_for(name)
+        if name == parent or (field is not None and field.api_name == parent):
+            return position
+    raise ValueError(f"no {parent} column in {', '.join(fieldnames)}")
+
+
+def default_output(filename):
+    """farmer_contacts.csv -> farmer_contacts.by_parent.csv"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.by_parent{ext or '.csv'}"
+
+
+def sorted_runs(reader, key, temp_dir, memory_bytes, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the rows of reader as sorted runs: each a list of rows, or a temp file of them
+
+    Runs are stably sorted by key, so rows of one parent keep their order.
+    The last run (the only one, for a file that fits in memory) is returned
+    as a list rather than written out.
+    """
+    buffer, used, count = [], 0, 0
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if chunk:
+            buffer.extend(chunk)
+            used += sum(len(field) for row in chunk for field in row)
+            used += len(chunk) * (ROW_OVERHEAD_BYTES + FIELD_OVERHEAD_BYTES * len(chunk[0]))
+            if used < memory_bytes:
+                continue
+        if not buffer:
+            return
+        buffer.sort(key=key)
+        if not chunk:
+            yield buffer
+            return
+        count += 1
+        run_file = os.path.join(temp_dir, f"run-{count:05d}.csv")
+        with open(run_file, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(buffer)
+        yield run_file
+        buffer, used = [], 0
+
+
+def _read_run(stack, run):
+    if isinstance(run, list):
+        return iter(run)
+    return csv.reader(stack.enter_context(open(run, newline="", encoding="utf-8")))
+
+
+def merge_runs(runs, key, temp_dir, fanin=MAX_MERGE_FANIN):
+    """Yield the rows of sorted runs in key order, merging at most fanin runs at a time
+
+    Ties are taken from earlier runs first, so the merge is as stable as the
+    runs. Neighbouring runs are merged into new ones until fanin remain.
+    """
+    passes = 0
+    while len(runs) > fanin:
+        passes += 1
+        merged = []
+        for start in range(0, len(runs), fanin):
+            group = runs[start:start + fanin]
+            if len(group) == 1:
+                merged.extend(group)
+                continue
+            run_file = os.path.join(temp_dir, f"pass-{passes}-{start // fanin + 1:05d}.csv")
+            with ExitStack() as stack, open(run_file, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerows(heapq.merge(*(_read_run(stack, run) for run in group), key=key))
+            for run in group:
+                if not isinstance(run, list):
+                    os.remove(run)
+            merged.append(run_file)
+        runs = merged
+    with ExitStack() as stack:
+        yield from heapq.merge(*(_read_run(stack, run) for run in runs), key=key)
+
+
+def parent_groups(rows, key):
+    """Yield lists of consecutive rows with the same parent; rows without one are each their own group"""
+    for parent, group in groupby(rows, key):
+        if parent:
+            yield list(group)
+        else:
+            yield from ([row] for row in group)
+
+
+class BatchPacker:
+    """Packs groups of rows into batches of exactly batch_size rows (but the last)
+
+    A group that does not fit the room left in the current batch waits, with
+    at most holdover_rows rows of other such groups, and goes at the start of
+    the next batch; later, smaller groups fill the room instead. A group is
+    split over two batches only if it is larger than a batch, if too many
+    rows are waiting, or to fill the last batches at the end of the input.
+    """
+
+    def __init__(self, batch_size=BULK_BATCH_RECORDS, holdover_rows=None):
+        self.batch_size = batch_size
+        self.holdover_rows = batch_size if holdover_rows is None else holdover_rows
+        self.groups = 0
+        self.split_groups = 0
+
+    def pack(self, groups):
+        size = self.batch_size
+        batch, waiting, waiting_rows = [], [], 0
+        for group in groups:
+            self.groups += 1
+            if len(group) > size - len(batch) and len(group) <= size \
+                    and waiting_rows + len(group) <= self.holdover_rows:
+                waiting.append(group)
+                waiting_rows += len(group)
+                continue
+            yield from self._add(batch, group)
+            if not batch and waiting:  # A batch was just filled; waiting groups start the next
+                kept = []
+                for waiting_group in waiting:
+                    if len(waiting_group) <= size - len(batch):
+                        yield from self._add(batch, waiting_group)
+                    else:
+                        kept.append(waiting_group)
+                waiting, waiting_rows = kept, sum(map(len, kept))
+        for group in waiting:
+            yield from self._add(batch, group)
+        if batch:
+            yield batch
+
+    def _add(self, batch, rows):
+        """Add rows to batch, yielding (a copy of) it and starting over each time it fills up"""
+        size = self.batch_size
+        if len(rows) > size - len(batch):
+            self.split_groups += 1
+        while rows:
+            room = size - len(batch)
+            batch.extend(rows[:room])
+            rows = rows[room:]
+            if len(batch) == size:
+                yield batch[:]
+                batch.clear()
+
+
+class OrderSummary:
+    """Counts of one file's ordering"""
+
+    def __init__(self, filename, out_file):
+        self.filename = filename
+        self.out_file = out_file
+        self.rows = 0
+        self.parents = 0
+        self.split_parents = 0
+        self.batches = 0
+        self.runs = 0
+        self.seconds = 0.0
+
+
+def order_file(filename, out_file=None, object_name=None, parent="AccountId", batch_size=BULK_BATCH_RECORDS,
+               memory_mb=DEFAULT_MEMORY_MB, temp_dir=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write filename's rows grouped by parent and packed into batches; returns an OrderSummary
+
+    out_file defaults to default_output(filename); temp_dir is where the
+    sorted runs go (default: the system temp directory).
+    """
+    start = time.perf_counter()
+    out_file = out_file or default_output(filename)
+    summary = OrderSummary(filename, out_file)
+    schema_object = load_schema()[object_name or guess_object(filename)]
+    run_dir = tempfile.mkdtemp(prefix="order_by_parent-", dir=temp_dir)
+    try:
+        with open(filename, newline="", encoding="utf-8-sig") as src, \
+                open(out_file, "w", newline="", encoding="utf-8") as out:
+            reader = csv.reader(src)
+            fieldnames = next(reader)
+            key = itemgetter(parent_position(schema_object, fieldnames, parent))
+            runs = list(sorted_runs(reader, key, run_dir, memory_mb * 1024 * 1024, chunk_size))
+            summary.runs = len(runs)
+
+            writer = csv.writer(out)
+            writer.writerow(fieldnames)
+            packer = BatchPacker(batch_size)
+            for batch in packer.pack(parent_groups(merge_runs(runs, key, run_dir), key)):
+                writer.writerows(batch)
+                summary.rows += len(batch)
+                summary.batches += 1
+            summary.parents = packer.groups
+            summary.split_parents = packer.split_groups
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    summary.seconds = time.perf_counter() - start
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Group child CSV rows by parent so each parent's rows share a batch")
+    parser.add_argument("files", nargs="+", help="child CSV files (e.g. contacts) to order")
+    parser.add_argument("--object", default=None,
+                        help="object the rows are for, e.g. Contact (default: from the file name)")
+    parser.add_argument("--parent", default="AccountId", help="parent column, by API name or header")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_RECORDS,
+                        help="records per batch of the bulk job")
+    parser.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_MB,
+                        help="approximate memory for each sorted run")
+    parser.add_argument("--temp-dir", default=None, help="directory for the sorted runs")
+    parser.add_argument("--out", default=None, help="output CSV (default: <file>.by_parent.csv; one file only)")
+    args = parser.parse_args()
+    if args.out and len(args.files) > 1:
+        parser.error("--out needs a single input file")
+
+    for filename in args.files:
+        summary = order_file(filename, args.out, args.object, args.parent, args.batch_size, args.memory_mb,
+                             args.temp_dir)
+        print(f"🔀 {filename}: {summary.rows:,} rows of {summary.parents:,} parents in {summary.batches:,} batches "
+              f"({summary.runs} sorted runs, {summary.seconds:.1f}s)")
+        if summary.split_parents:
+            print(f"   ⚠️  {summary.split_parents:,} parents span two batches")
+        print(f"   📁 {summary.out_file}")
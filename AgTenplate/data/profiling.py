@@ -0,0 +1,102 @@
+"""
+Opt-In Per-Field Profiling for the Data Generators
+Times every column producer of every entity and every CSV write, so a slow
+generator shows where its time goes instead of leaving it to guesswork.
+
+Profiling is off unless a run starts it (the generators' --profile option).
+When off, entities run their normal compiled row functions, so there is no
+overhead at all; when on they run a variant with a clock read after each field.
+Times are self times: a field that Ref()s another is not charged for it.
+"""
+
+import atexit
+import json
+import sys
+from contextlib import contextmanager
+
+# Profile that entities and CSV writers report to, if any
+_active = None
+
+WRITER = "CSV writer"  # Entity name the CSV writers' costs are recorded under
+
+
+class Profile:
+    """Accumulated time and call counts per (entity, field)"""
+
+    def __init__(self):
+        self.costs = {}  # (entity, field) -> [seconds, calls]
+
+    def add(self, entity, field, seconds, calls=1):
+        """Charge seconds spent over calls calls to a field of an entity"""
+        cost = self.costs.setdefault((entity, field), [0.0, 0])
+        cost[0] += seconds
+        cost[1] += calls
+
+    def merge(self, other):
+        """Fold another Profile (e.g. from a worker process) into this one"""
+        for (entity, field), (seconds, calls) in other.costs.items():
+            self.add(entity, field, seconds, calls)
+        return self
+
+    @property
+    def total(self):
+        """Seconds recorded across all fields"""
+        return sum(seconds for seconds, _ in self.costs.values())
+
+    def entries(self):
+        """Profile entries as dicts, most expensive first"""
+        total = self.total or 1.0
+        return [
+            {"entity": entity, "field": field, "seconds": round(seconds, 6), "calls": calls,
+             "ns_per_call": round(seconds / calls * 1e9, 1) if calls else None,
+             "share": round(seconds / total, 4)}
+            for (entity, field), (seconds, calls) in sorted(self.costs.items(), key=lambda item: -item[1][0])
+        ]
+
+    def print_table(self, limit=None, file=None):
+        """Print the per-field cost table, most expensive first"""
+        file = file or sys.stdout
+        print(f"\n🔬 Per-field profile ({self.total:.2f}s recorded)", file=file)
+        print(f"{'Entity':<30} {'Field':<28} {'Seconds':>9} {'Calls':>10} {'ns/call':>9} {'Share':>7}", file=file)
+        for entry in self.entries()[:limit]:
+            print(f"{entry['entity'][:30]:<30} {entry['field'][:28]:<28} {entry['seconds']:>9.3f} "
+                  f"{entry['calls']:>10} {entry['ns_per_call'] or 0:>9.0f} {entry['share']:>7.1%}", file=file)
+
+    def save(self, filename):
+        """Write the profile as JSON"""
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump({"total_seconds": round(self.total, 6), "fields": self.entries()}, file, indent=2)
+
+
+def active():
+    """The Profile being recorded into, or None when profiling is off"""
+    return _active
+
+
+@contextmanager
+def profiling(profile=None):
+    """Record into profile (a fresh one by default) for the duration of the block"""
+    global _active
+    previous, _active = _active, profile if profile is not None else Profile()
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+def start(filename=None, limit=30):
+    """Turn profiling on for the rest of the run
+
+    At exit the cost table is printed and, if filename is given, the profile is
+    saved there as JSON.
+    """
+    global _active
+    _active = Profile()
+
+    def report(profile=_active):
+        profile.print_table(limit)
+        if filename:
+            profile.save(filename)
+            print(f"📁 Profile saved to: {filename}")
+    atexit.register(report)
+    return _active
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Resolve Contact Account IDs Against an Org Export
+The contact generators fill Account ID with mock IDs (account_join.py) that
+match nothing in a real org. This stage swaps them for the real Ids of an
+Account export, matching on Account Name:
+
+    sf data query --query "SELECT Id, Name, BillingCity, BillingState FROM Account" \\
+        --result-format csv > temp_accounts.csv
+    python3 data/resolve_account_ids.py data/farmer_contacts.csv --accounts temp_accounts.csv
+
+It is a hash join: the export (the small side) is read into a table keyed by
+name, and the contacts stream past it once, a chunk at a time, so files of
+tens of millions of contacts take memory for the accounts only. When several
+accounts share a name, the contact's Mailing City and State pick the one
+with that Billing City and State. Rows that match no account, or more than
+one, are left out of the output and written to an unmatched report.
+"""
+
+import argparse
+import csv
+import os
+import time
+from itertools import islice
+
+from csv_stream import DEFAULT_CHUNK_SIZE
+from schema import load_schema
+
+# Contact columns (as the generators write them) the join reads and rewrites
+NAME_COLUMN = "Account Name"
+ID_COLUMN = "Account ID"
+CITY_COLUMN = "Mailing City"
+STATE_COLUMN = "Mailing State"
+
+# Account export columns, by API name (labels are accepted too)
+EXPORT_FIELDS = ("Id", "Name", "BillingCity", "BillingState")
+
+AMBIGUOUS = object()  # A (city, state) shared by several accounts of one name
+
+NO_ACCOUNT = "no account with this name"
+NO_ADDRESS = "several accounts with this name, none in this city and state"
+SAME_ADDRESS = "several accounts with this name in this city and state"
+
+
+def _key(value):
+    """Names, cities and states compare case- and space-insensitively"""
+    return " ".join(value.split()).casefold()
+
+
+def export_columns(fieldnames):
+    """Positions of EXPORT_FIELDS in an Account export header (None for a missing city or state)"""
+    account = load_schema()["Account"]
+    positions = {}
+    for position, name in enumerate(fieldnames):
+        field = account.field_for(name)
+        api_name = "Id" if name in ("Id", "Account ID") else field.api_name if field else None
+        if api_name in EXPORT_FIELDS:
+            positions.setdefault(api_name, position)
+    for required in ("Id", "Name"):
+        if required not in positions:
+            raise ValueError(f"the account export has no {required} column: {', '.join(fieldnames)}")
+    return [positions.get(name) for name in EXPORT_FIELDS]
+
+
+class AccountIndex:
+    """Account Ids by name, and by (city, state) for names several accounts share
+
+    by_name maps a unique name straight to its Id; a shared name maps to a
+    dict of (city, state) -> Id, or AMBIGUOUS where even those collide.
+    """
+
+    def __init__(self):
+        self.by_name = {}
+        self.accounts = 0
+        self.shared_names = 0
+
+    @classmethod
+    def from_export(cls, filename):
+        index = cls()
+        with open(filename, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            id_at, name_at, city_at, state_at = export_columns(next(reader, []))
+            for row in reader:
+                if not row:
+                    continue
+                index.add(row[name_at], row[id_at],
+                          row[city_at] if city_at is not None else "", row[state_at] if state_at is not None else "")
+        return index
+
+    def add(self, name, account_id, city="", state=""):
+        self.accounts += 1
+        key, place = _key(name), (_key(city), _key(state))
+        found = self.by_name.get(key)
+        if found is None:
+            self.by_name[key] = (account_id, place)  # Kept with its place until the name is shared
+            return
+        if isinstance(found, tuple):
+            first_id, first_place = found
+            found = self.by_name[key] = {first_place: first_id}
+            self.shared_names += 1
+        found[place] = AMBIGUOUS if place in found else account_id
+
+    def resolve(self, name, city, state):
+        """(Id, None) for the account this contact belongs to, or (None, reason)"""
+        found = self.by_name.get(_key(name))
+        if found is None:
+            return None, NO_ACCOUNT
+        if isinstance(found, tuple):
+            return found[0], None
+        account_id = found.get((_key(city), _key(state)))
+        if account_id is None:
+            return None, NO_ADDRESS
+        if account_id is AMBIGUOUS:
+            return None, SAME_ADDRESS
+        return account_id, None
+
+
+class ResolveSummary:
+    """Counts of one file's resolution"""
+
+    def __init__(self, filename, out_file, report_file):
+        self.filename = filename
+        self.out_file = out_file
+        self.report_file = report_file
+        self.rows = 0
+        self.matched = 0
+        self.by_address = 0  # Matched through city and state
+        self.unmatched = {}  # Reason -> rows
+        self.seconds = 0.0
+
+
+def default_outputs(filename):
+    """(output, unmatched report) next to filename: contacts.resolved.csv and contacts.unmatched.csv"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.resolved{ext or '.csv'}", f"{root}.unmatched{ext or '.csv'}"
+
+
+def resolve_file(filename, index, out_file=None, report_file=None, keep_unmatched=False,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+    """Rewrite the Account ID column of a contact CSV from an AccountIndex; returns a ResolveSummary
+
+    Unmatched rows go to the report (Row, Reason and the row) and, with
+    keep_unmatched, also to the output with a blank Account ID.
+    """
+    start = time.perf_counter()
+    default_out, default_report = default_outputs(filename)
+    summary = ResolveSummary(filename, out_file or default_out, report_file or default_report)
+    with open(filename, newline="", encoding="utf-8-sig") as src, \
+            open(summary.out_file, "w", newline="", encoding="utf-8") as out, \
+            open(summary.report_file, "w", newline="", encoding="utf-8") as report_out:
+        reader = csv.reader(src)
+        fieldnames = next(reader, [])
+        missing = [name for name in (NAME_COLUMN, ID_COLUMN) if name not in fieldnames]
+        if missing:
+            raise ValueError(f"{filename} has no {' or '.join(missing)} column")
+        name_at, id_at = fieldnames.index(NAME_COLUMN), fieldnames.index(ID_COLUMN)
+        city_at = fieldnames.index(CITY_COLUMN) if CITY_COLUMN in fieldnames else None
+        state_at = fieldnames.index(STATE_COLUMN) if STATE_COLUMN in fieldnames else None
+        writer, report = csv.writer(out), csv.writer(report_out)
+        writer.writerow(fieldnames)
+        report.writerow(["Row", "Reason"] + fieldnames)
+        by_name, resolve = index.by_name, index.resolve
+
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                break
+            kept, unmatched = [], []
+            for offset, row in enumerate(rows, summary.rows + 1):
+                found = by_name.get(_key(row[name_at]))
+                if type(found) is tuple:  # The common case: a name only one account has
+                    row[id_at] = found[0]
+                    kept.append(row)
+                    continue
+                account_id, reason = resolve(row[name_at], row[city_at] if city_at is not None else "",
+                                             row[state_at] if state_at is not None else "")
+                if account_id is not None:
+                    summary.by_address += 1
+                    row[id_at] = account_id
+                    kept.append(row)
+                    continue
+                summary.unmatched[reason] = summary.unmatched.get(reason, 0) + 1
+                unmatched.append([offset, reason] + row)
+                if keep_unmatched:
+                    kept.append(row[:id_at] + [""] + row[id_at + 1:])
+            summary.rows += len(rows)
+            summary.matched += len(rows) - len(unmatched)
+            writer.writerows(kept)
+            report.writerows(unmatched)
+    summary.seconds = time.perf_counter() - start
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replace mock Account IDs in contact CSVs with Ids from an org export")
+    parser.add_argument("files", nargs="+", help="generated contact CSV files")
+    parser.add_argument("--accounts", default="temp_accounts.csv",
+                        help="Account export with Id, Name and optionally BillingCity, BillingState")
+    parser.add_argument("--keep-unmatched", action="store_true",
+                        help="keep unmatched rows in the output, with a blank Account ID")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows read and written per chunk")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = AccountIndex.from_export(args.accounts)
+    print(f"🏢 {index.accounts:,} accounts from {args.accounts} ({index.shared_names:,} names shared, "
+          f"{time.perf_counter() - start:.1f}s)")
+    failed = False
+    for filename in args.files:
+        summary = resolve_file(filename, index, keep_unmatched=args.keep_unmatched, chunk_size=args.chunk_size)
+        rate = summary.rows / summary.seconds if summary.seconds else 0
+        print(f"🔗 {filename}: {summary.matched:,} of {summary.rows:,} rows matched "
+              f"({summary.by_address:,} by city and state) in {summary.seconds:.1f}s ({rate:,.0f} rows/s)")
+        for reason, count in summary.unmatched.items():
+            failed = True
+            print(f"   ❌ {count:,}: {reason}")
+        if summary.unmatched:
+            print(f"   📋 Unmatched rows in {summary.report_file}")
+        print(f"   📁 {summary.out_file}")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,512 @@
+"""
+Salesforce Object Schema from the force-app Metadata
+Parses force-app/main/default/objects/*/fields/*.field-meta.xml into one
+schema of objects and fields (type, label, length, precision, picklist values,
+lookups), so the generators take their column names and picklists from the
+same metadata the org is deployed from instead of keeping their own copies.
+
+Parsed fields are cached in __pycache__/ keyed by each file's mtime and size,
+so after the first run loading the schema reads no XML at all, and only the
+files that changed are parsed again:
+
+    ACCOUNT = load_schema()["Account"]
+    ACCOUNT.column("Farm_Size_Acres__c", RandInt(50, 5000))  # Column("Farm Size (Acres)", ...)
+    ACCOUNT.field("Soil_Type__c").check("Peat")  # "'Peat' is not one of the Soil Type picklist values"
+"""
+
+import argparse
+import os
+import pickle
+import re
+import xml.etree.ElementTree as ElementTree
+from datetime import date
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OBJECTS_DIR = os.path.normpath(os.path.join(HERE, os.pardir, "force-app", "main", "default", "objects"))
+CACHE_FILE = os.path.join(HERE, "__pycache__", "force_app_schema.pickle")
+CACHE_VERSION = 2  # Bump when FieldSchema changes so old caches are reparsed
+
+METADATA_NAMESPACE = "{http://soap.sforce.com/2006/04/metadata}"
+FIELD_SUFFIX = ".field-meta.xml"
+
+# Field types whose values are record Ids
+LOOKUP_TYPES = {"Lookup", "MasterDetail", "Hierarchy"}
+NUMBER_TYPES = {"Number", "Currency", "Percent"}
+RECORD_ID = re.compile(r"[a-zA-Z0-9]{15}(?:[a-zA-Z0-9]{3})?$")
+NUMBER = re.compile(r"[+-]?(\d*)(?:\.(\d*))?$")
+CHECKBOX_VALUES = {"true", "false", "1", "0", "yes", "no"}
+EMAIL = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+class FieldSchema:
+    """One field of an object, as declared in its .field-meta.xml
+
+    Standard fields listed without a type (and not in STANDARD_FIELDS) have
+    type None and accept any value.
+    """
+
+    def __init__(self, api_name, label=None, type=None, length=None, precision=None, scale=None,
+                 required=False, unique=False, picklist=None, restricted=False, reference_to=(),
+                 relationship_name=None, description=None):
+        self.api_name = api_name
+        self.label = label or api_name
+        self.type = type
+        self.length = length
+        self.precision = precision
+        self.scale = scale
+        self.required = required
+        self.unique = unique
+        self.picklist = picklist  # Tuple of values, or None when not a picklist
+        self.restricted = restricted
+        self.reference_to = tuple(reference_to)
+        self.relationship_name = relationship_name
+        self.description = description
+        self._check = None
+        self._column_ok = None
+
+    @classmethod
+    def parse(cls, filename):
+        """The field declared in one .field-meta.xml file"""
+        root = ElementTree.parse(filename).getroot()
+
+        def text(element, tag):
+            found = element.find(METADATA_NAMESPACE + tag)
+            return found.text.strip() if found is not None and found.text else None
+
+        def number(tag):
+            value = text(root, tag)
+            return int(value) if value is not None else None
+
+        picklist = None
+        value_set = root.find(METADATA_NAMESPACE + "valueSet")
+        if value_set is not None:
+            definition = value_set.find(METADATA_NAMESPACE + "valueSetDefinition")
+            if definition is not None:  # Global value sets are not in this tree and stay unchecked
+                picklist = tuple(text(value, "fullName")
+                                 for value in definition.iter(METADATA_NAMESPACE + "value"))
+        return cls(
+            api_name=text(root, "fullName") or os.path.basename(filename)[:-len(FIELD_SUFFIX)],
+            label=text(root, "label"),
+            type=text(root, "type"),
+            length=number("length"),
+            precision=number("precision"),
+            scale=number("scale"),
+            required=text(root, "required") == "true",
+            unique=text(root, "unique") == "true",
+            picklist=picklist,
+            restricted=value_set is not None and text(value_set, "restricted") == "true",
+            reference_to=[element.text.strip() for element in root.iter(METADATA_NAMESPACE + "referenceTo")],
+            relationship_name=text(root, "relationshipName"),
+            description=text(root, "description"),
+        )
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_check"] = state["_column_ok"] = None  # Compiled checks are closures, rebuilt on demand
+        return state
+
+    def __repr__(self):
+        return f"<FieldSchema {self.api_name} {self.type}>"
+
+    @property
+    def is_lookup(self):
+        return self.type in LOOKUP_TYPES
+
+    def check(self, value):
+        """None if value fits the field, otherwise a message saying why not
+
+        Values are checked as they appear in a CSV: empty means blank, which is
+        only an error for required fields.
+        """
+        if self._check is None:
+            self._check = self._compile_check()
+        return self._check(value)
+
+    def _compile_check(self):
+        """A check function specialized to this field's type and limits"""
+        label, required = self.label, self.required
+
+        def blank_or(check):
+            def checked(value):
+                if value is None or value == "":
+                    return f"{label} is required" if required else None
+                return check(value)
+            return checked
+
+        if self.picklist is not None and self.restricted:
+            allowed = frozenset(self.picklist)
+            return blank_or(lambda value: None if value in allowed
+                            else f"{value!r} is not one of the {label} picklist values")
+        if self.type in NUMBER_TYPES:
+            whole = (self.precision or 18) - (self.scale or 0)
+            scale = self.scale or 0
+
+            def check_number(value):
+                match = NUMBER.match(str(value).strip())
+                if match is None or not (match.group(1) or match.group(2)):
+                    return f"{label} {value!r} is not a number"
+                digits = match.group(1).lstrip("0")
+                decimals = (match.group(2) or "").rstrip("0")
+                if len(digits) > whole:
+                    return f"{label} {value!r} has more than {whole} digits before the decimal point"
+                if len(decimals) > scale:
+                    return f"{label} {value!r} has more than {scale} decimal places"
+                return None
+            return blank_or(check_number)
+        if self.type in LOOKUP_TYPES:
+            return blank_or(lambda value: None if RECORD_ID.match(str(value))
+                            else f"{label} {value!r} is not a record Id")
+        if self.type == "Checkbox":
+            return blank_or(lambda value: None if str(value).lower() in CHECKBOX_VALUES
+                            else f"{label} {value!r} is not a checkbox value")
+        if self.type == "Email":
+            length = self.length or 80
+            return blank_or(lambda value: None if EMAIL.match(str(value)) and len(str(value)) <= length
+                            else f"{label} {value!r} is not a valid email address")
+        if self.type == "Date":
+            def check_date(value):
+                try:
+                    date.fromisoformat(str(value))
+                except ValueError:
+                    return f"{label} {value!r} is not a YYYY-MM-DD date"
+                return None
+            return blank_or(check_date)
+        if self.length is not None:
+            length = self.length
+            return blank_or(lambda value: None if len(str(value)) <= length
+                            else f"{label} is longer than {length} characters")
+        return blank_or(lambda value: None)
+
+    def check_column(self, values):
+        """[(index, message), ...] for the values of a column of strings that do not fit the field
+
+        The whole column is tested at once first (one regex over the joined
+        values, a set comparison or a max length), so only a column with a
+        problem is checked value by value.
+        """
+        if self._column_ok is None:
+            self._column_ok = self._compile_column_ok()
+        if self._column_ok(values):
+            return []
+        check = self.check
+        return [(index, problem) for index, value in enumerate(values) for problem in [check(value)] if problem]
+
+    def _compile_column_ok(self):
+        """A function telling whether every value of a column passes check()
+
+        It may answer False for a column that passes; check_column() then
+        finds that out value by value.
+        """
+        required = self.required
+
+        def blanks_ok(values):
+            return not required or "" not in values
+
+        if self.picklist is not None and self.restricted:
+            allowed = frozenset(self.picklist) | (frozenset() if required else {""})
+            return allowed.issuperset
+        if self.type in ("Checkbox", "Date"):
+            check = self.check
+            return lambda values: all(check(value) is None for value in set(values))
+        if self.type in NUMBER_TYPES:
+            whole = (self.precision or 18) - (self.scale or 0)
+            value = rf"(?=[+-]?\.?\d)[+-]?0*\d{{0,{whole}}}(?:\.\d{{0,{self.scale or 0}}}0*)?"
+        elif self.type in LOOKUP_TYPES:
+            value = RECORD_ID.pattern.rstrip("$")
+        elif self.type == "Email":
+            value = rf"(?=[^\n]{{1,{self.length or 80}}}\n){EMAIL.pattern.rstrip('$')}"
+        elif self.length is not None:
+            length = self.length
+            return lambda values: blanks_ok(values) and max(map(len, values), default=0) <= length
+        else:
+            return blanks_ok
+        lines = re.compile(rf"(?:(?:{value}){'' if required else '?'}\n)*")
+
+        def column_ok(values):
+            joined = "\n".join(values) + "\n"
+            # A value holding a newline would pass as two lines, so count them
+            return joined.count("\n") == len(values) and lines.fullmatch(joined) is not None
+        return column_ok
+
+
+class SchemaObject:
+    """The fields of one object, by API name in sorted order"""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = {field.api_name: field for field in sorted(fields, key=lambda field: field.api_name)}
+        self._by_label = {field.label: field for field in self.fields.values()}
+
+    def __repr__(self):
+        return f"<SchemaObject {self.name}: {len(self.fields)} fields>"
+
+    def __contains__(self, api_name):
+        return api_name in self.fields
+
+    def field(self, api_name):
+        """The FieldSchema of an API name; KeyError names the object if it is missing"""
+        try:
+            return self.fields[api_name]
+        except KeyError:
+            raise KeyError(f"{self.name} has no field {api_name!r} in {OBJECTS_DIR}") from None
+
+    def by_label(self, label):
+        """The FieldSchema with this label (the generated CSVs' header), or None"""
+        return self._by_label.get(label)
+
+    def field_for(self, header):
+        """The FieldSchema a CSV header names, by API name or label, or None"""
+        return self.fields.get(header) or self._by_label.get(header)
+
+    def label(self, api_name):
+        return self.field(api_name).label
+
+    def lookups(self):
+        """The lookup and master-detail fields, which hold other records' Ids"""
+        return [field for field in self.fields.values() if field.is_lookup]
+
+    def api_names(self, first=()):
+        """Custom field API names, the ones in first (checked to exist) leading in that order
+
+        Fields added to the metadata later are appended, so a CSV written with
+        these fieldnames never silently leaves out a field.
+        """
+        first = [self.field(name).api_name for name in first]
+        rest = [name for name in self.fields if name.endswith("__c") and name not in first]
+        return first + rest
+
+    def column(self, api_name, producer):
+        """A fieldgen Column headed by the field's label, its producer checked against the field
+
+        Every value the producer can be seen to produce (Const, Choice of a list,
+        Weighted, WeightedBy) must fit the field, e.g. be one of a restricted
+        picklist's values; ValueError lists the ones that do not.
+        """
+        from fieldgen import Column
+
+        field = self.field(api_name)
+        problems = sorted({problem for value in _known_values(producer)
+                           for problem in [field.check(value)] if problem})
+        if problems:
+            raise ValueError(f"{self.name}.{api_name}: " + "; ".join(problems))
+        return Column(field.label, producer)
+
+    def check(self, row):
+        """(API name, message) for every value of a dict row that does not fit its field
+
+        row may be keyed by API names or labels; columns of other names are ignored.
+        """
+        problems = []
+        for key, value in row.items():
+            field = self.field_for(key)
+            if field is not None:
+                problem = field.check(value)
+                if problem:
+                    problems.append((field.api_name, problem))
+        return problems
+
+
+def _known_values(producer):
+    """The values a fieldgen producer can produce, where they are known without running it"""
+    from fieldgen import Choice, Const, Weighted, WeightedBy
+
+    if isinstance(producer, Const):
+        return [producer.value]
+    if isinstance(producer, Choice) and isinstance(producer.options, (list, tuple)):
+        return list(producer.options)
+    if isinstance(producer, Weighted):
+        return list(producer.table.options)
+    if isinstance(producer, WeightedBy):
+        return [option for table in [*producer.tables.values(), producer.default] for option in table.options]
+    if not hasattr(producer, "emit"):
+        return [producer]  # A literal value, which Column wraps as a Const
+    return []
+
+
+def _standard(api_name, label, type, length=None, precision=None, scale=None, required=False, reference_to=()):
+    return FieldSchema(api_name, label, type, length=length, precision=precision, scale=scale,
+                       required=required, reference_to=reference_to)
+
+
+def _address(prefix, label):
+    """The compound address fields (BillingStreet, ...) as their own fields"""
+    return [
+        _standard(f"{prefix}Street", f"{label} Street", "TextArea", 255),
+        _standard(f"{prefix}City", f"{label} City", "Text", 40),
+        _standard(f"{prefix}State", f"{label} State", "Text", 80),
+        _standard(f"{prefix}PostalCode", f"{label} Postal Code", "Text", 20),
+        _standard(f"{prefix}Country", f"{label} Country", "Text", 80),
+        _standard(f"{prefix}Latitude", f"{label} Latitude", "Number", precision=18, scale=15),
+        _standard(f"{prefix}Longitude", f"{label} Longitude", "Number", precision=18, scale=15),
+    ]
+
+
+# Standard fields the generated CSVs fill, with Salesforce's types and limits.
+# The metadata lists most of them without a type, and Contact not at all;
+# labels are the generated CSV headers. Metadata that does give a field a type
+# and label takes precedence.
+STANDARD_FIELDS = {
+    "Account": [
+        _standard("Name", "Account Name", "Text", 255, required=True),
+        _standard("RecordTypeId", "Record Type ID", "Lookup", reference_to=["RecordType"]),
+        _standard("Industry", "Industry", "Picklist"),
+        _standard("Phone", "Phone", "Phone", 40),
+        _standard("Website", "Website", "Url", 255),
+        _standard("AnnualRevenue", "Annual Revenue", "Currency", precision=18, scale=0),
+        _standard("NumberOfEmployees", "Number of Employees", "Number", precision=8, scale=0),
+        _standard("Description", "Description", "LongTextArea", 32000),
+        _standard("Rating", "Rating", "Picklist"),
+        *_address("Billing", "Billing"),
+    ],
+    "Contact": [
+        # Every generated contact belongs to an account, so imports need its Id
+        _standard("AccountId", "Account ID", "Lookup", required=True, reference_to=["Account"]),
+        _standard("FirstName", "First Name", "Text", 40),
+        _standard("LastName", "Last Name", "Text", 80, required=True),
+        _standard("Title", "Title", "Text", 128),
+        _standard("Department", "Department", "Text", 80),
+        _standard("Phone", "Phone", "Phone", 40),
+        _standard("Email", "Email", "Email", 80),
+        _standard("Description", "Description", "LongTextArea", 32000),
+        _standard("LeadSource", "Lead Source", "Picklist"),
+        *_address("Mailing", "Mailing"),
+    ],
+}
+
+
+class Schema:
+    """Every object of the metadata tree, by API name"""
+
+    def __init__(self, objects, objects_dir=OBJECTS_DIR):
+        self.objects = dict(sorted(objects.items()))
+        self.objects_dir = objects_dir
+
+    def __getitem__(self, name):
+        try:
+            return self.objects[name]
+        except KeyError:
+            raise KeyError(f"no object {name!r} in {self.objects_dir}") from None
+
+    def __contains__(self, name):
+        return name in self.objects
+
+    def __iter__(self):
+        return iter(self.objects.values())
+
+    def __repr__(self):
+        return f"<Schema {len(self.objects)} objects>"
+
+
+def _field_files(objects_dir):
+    """{path: (mtime_ns, size)} of every field metadata file"""
+    files = {}
+    with os.scandir(objects_dir) as objects:
+        for entry in objects:
+            fields_dir = os.path.join(entry.path, "fields")
+            if not entry.is_dir() or not os.path.isdir(fields_dir):
+                continue
+            with os.scandir(fields_dir) as fields:
+                for field in fields:
+                    if field.name.endswith(FIELD_SUFFIX):
+                        stat = field.stat()
+                        files[field.path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def _read_cache(cache_file):
+    """{path: (mtime_ns, size, FieldSchema)} from the cache file, or {} if it is missing or stale"""
+    try:
+        with open(cache_file, "rb") as f:
+            version, entries = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+        return {}
+    return entries if version == CACHE_VERSION else {}
+
+
+def _write_cache(cache_file, entries):
+    """Save the parsed fields, quietly skipping read-only checkouts"""
+    temporary = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(temporary, "wb") as f:
+            pickle.dump((CACHE_VERSION, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, cache_file)
+    except OSError:
+        pass
+
+
+_loaded = {}  # (objects_dir, cache_file) -> (file stamps, Schema) already loaded in this process
+
+
+def load_schema(objects_dir=OBJECTS_DIR, cache_file=CACHE_FILE):
+    """The Schema of objects_dir, parsing only field files changed since they were cached
+
+    cache_file=None parses every file and writes no cache.
+    """
+    files = _field_files(objects_dir)
+    key = (objects_dir, cache_file)
+    if key in _loaded and _loaded[key][0] == files:
+        return _loaded[key][1]
+    cached = _read_cache(cache_file) if cache_file else {}
+    entries = {}
+    for path, stamp in files.items():
+        entry = cached.get(path)
+        entries[path] = entry if entry is not None and entry[:2] == stamp else (*stamp, FieldSchema.parse(path))
+    if cache_file and entries != cached:
+        _write_cache(cache_file, entries)
+    fields_by_object = {}
+    for path, (_, _, field) in entries.items():
+        name = os.path.basename(os.path.dirname(os.path.dirname(path)))
+        fields_by_object.setdefault(name, {})[field.api_name] = field
+    for name, fields in fields_by_object.items():
+        if name.endswith("__c"):
+            fields.setdefault("Name", _standard("Name", "Name", "Text", 80))  # Every custom object's record name
+    for name, standard_fields in STANDARD_FIELDS.items():
+        fields = fields_by_object.setdefault(name, {})
+        for standard in standard_fields:
+            declared = fields.get(standard.api_name)
+            if declared is None or declared.type is None or declared.label == declared.api_name:
+                fields[standard.api_name] = standard
+    schema = Schema({name: SchemaObject(name, fields.values()) for name, fields in fields_by_object.items()},
+                    objects_dir)
+    _loaded[key] = (files, schema)
+    return schema
+
+
+def describe(schema, names=()):
+    """Printable summary of the objects named (default: all) and their fields"""
+    lines = []
+    for obj in schema:
+        if names and obj.name not in names:
+            continue
+        lines.append(f"📦 {obj.name} ({len(obj.fields)} fields)")
+        for field in obj.fields.values():
+            if field.type is None:
+                continue  # Standard fields listed without metadata
+            details = [field.type]
+            if field.length:
+                details.append(f"length {field.length}")
+            if field.precision:
+                details.append(f"precision {field.precision}, scale {field.scale or 0}")
+            if field.picklist is not None:
+                details.append(f"{len(field.picklist)} {'restricted ' if field.restricted else ''}values")
+            if field.reference_to:
+                details.append(f"-> {', '.join(field.reference_to)}")
+            if field.required:
+                details.append("required")
+            lines.append(f"   {field.api_name:<32} {field.label:<28} {'; '.join(details)}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the object schema compiled from the force-app metadata")
+    parser.add_argument("objects", nargs="*", help="objects to show (default: all)")
+    parser.add_argument("--objects-dir", default=OBJECTS_DIR, help="force-app objects directory")
+    parser.add_argument("--no-cache", action="store_true", help="parse every field file and skip the cache")
+    args = parser.parse_args()
+
+    schema = load_schema(args.objects_dir, cache_file=None if args.no_cache else CACHE_FILE)
+    missing = [name for name in args.objects if name not in schema]
+    if missing:
+        parser.error(f"unknown objects: {', '.join(missing)}")
+    print(describe(schema, args.objects))
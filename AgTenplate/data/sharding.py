@@ -0,0 +1,245 @@
+"""
+Multi-Process Sharded Generation for the Data Generators
+Splits a record count into shards, generates each shard in a process pool with
+its own seed derived from a master seed, and merges the shard part files
+
+Output is a pure function of (master seed, shard count, as-of date): each shard
+only depends on its own seed, record count and starting row index, and parts are
+merged in shard order, so the same inputs always give byte-identical CSVs. Shard
+seeds are also keyed by the run's output file, so generators given the same
+master seed still draw different random streams.
+"""
+
+import hashlib
+import os
+import random
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import csv_stream
+import dataset_cache
+import profiling
+
+# Reference date used by seeded runs that do not pass --as-of, so a seed alone
+# is enough to reproduce the generated Created/Last Activity dates
+SEEDED_AS_OF = date(2025, 1, 1)
+
+
+def add_sharding_arguments(parser):
+    """Add the shared --workers/--shards/--seed/--as-of/--keep-parts options"""
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (default: 1, in-process)")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="number of shards to split the records into (default: --workers)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="master seed; per-shard seeds are derived from it")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None,
+                        help="reference date (YYYY-MM-DD) that generated dates count back from")
+    parser.add_argument("--keep-parts", action="store_true",
+                        help="keep one part file per shard instead of merging into one CSV")
+    parser.add_argument("--columnar", action="store_true",
+                        help="also write each CSV as a columnar file (.agcol) with typed, compressed columns")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="JSON",
+                        help="time every column and CSV write, print the cost table and "
+                             "optionally save it as JSON")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="generate even if the dataset cache has this seeded run's output, and don't store it")
+
+
+def resolve_run(args):
+    """Return (master_seed, as_of) for parsed CLI args
+
+    Unseeded runs draw a fresh master seed and use today's date; seeded runs
+    pin the date to SEEDED_AS_OF unless --as-of is given. --profile turns on
+    per-field profiling for the rest of the run, and --columnar makes every CSV
+    writer also write a columnar copy. Seeded runs read and fill the dataset
+    cache unless --no-cache or --profile is given.
+    """
+    if args.profile is not None:
+        profiling.start(args.profile or None)
+    if args.columnar:
+        csv_stream.write_columnar(True)
+    if args.seed is None:
+        master_seed = random.SystemRandom().getrandbits(63)
+        as_of = args.as_of or date.today()
+    else:
+        master_seed = args.seed
+        as_of = args.as_of or SEEDED_AS_OF
+        if not args.no_cache and args.profile is None:
+            dataset_cache.enable()
+    return master_seed, as_of
+
+
+def derive_seed(master_seed, *labels):
+    """Derive a stable 64-bit seed from the master seed and shard labels"""
+    key = ":".join(str(part) for part in (master_seed,) + labels)
+    return int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big")
+
+
+def split_counts(total, shards):
+    """Split total records into shard sizes that differ by at most one"""
+    base, extra = divmod(total, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+def part_filename(filename, shard_index):
+    """Name of a shard's part file, e.g. data/farms.part-00003.csv"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.part-{shard_index:05d}{ext}"
+
+
+def saved_label(filename, args):
+    """Describe where a run's output ended up, for the summary printout"""
+    shards = args.shards or args.workers
+    if args.keep_parts and shards > 1:
+        root, ext = os.path.splitext(filename)
+        return f"{root}.part-*{ext} ({shards} parts)"
+    return filename
+
+
+def output_files(filename, args):
+    """The files a run's output for filename ended up in: its parts with --keep-parts, else itself"""
+    shards = args.shards or args.workers
+    if args.keep_parts and shards > 1:
+        return [part_filename(filename, index) for index in range(shards)]
+    return [filename]
+
+
+def merge_parts(part_files, filename):
+    """Concatenate CSV part files into filename, keeping only the first header"""
+    header_written = False
+    with open(filename, "wb") as out:
+        for part in part_files:
+            if not os.path.exists(part):
+                continue  # Empty shards write no part file
+            with open(part, "rb") as src:
+                header = src.readline()
+                if not header_written:
+                    out.write(header)
+                    header_written = True
+                shutil.copyfileobj(src, out, 1024 * 1024)
+            os.remove(part)
+    if not header_written:
+        os.remove(filename)
+
+
+def merge_columnar_parts(part_files, filename):
+    """Merge the columnar copies of CSV part files, if the shards wrote any"""
+    from columnar import columnar_filename, merge_files
+
+    parts = [columnar_filename(part) for part in part_files]
+    if any(os.path.exists(part) for part in parts):
+        merge_files(parts, columnar_filename(filename))
+
+
+def _run_shard(task):
+    """Unpack one shard task inside a worker process"""
+    shard_fn, count, seed, start_index, filenames, columnar, kwargs = task
+    csv_stream.write_columnar(columnar)  # Workers don't necessarily inherit the parent's setting
+    return shard_fn(count, seed, start_index, filenames, **kwargs)
+
+
+def _run_profiled_shard(task):
+    """_run_shard recording into a fresh profile, returned with the result"""
+    with profiling.profiling() as profile:
+        return _run_shard(task), profile
+
+
+def run_sharded(shard_fn, total, filenames, master_seed, workers=1, shards=None,
+                keep_parts=False, finish=None, **kwargs):
+    """Generate total records across shards and return the shard results in order
+
+    shard_fn(count, seed, start_index, filenames, **kwargs) must be a module-level
+    function that writes its rows to the given filenames (one per output CSV) and
+    returns a picklable summary. With a single shard it runs in-process and writes
+    straight to the final files. finish, a functools.partial, runs once the outputs
+    are in place (e.g. a dedup across the shards rewriting them).
+
+    While the dataset cache is on, a run it already holds is unpacked from it
+    instead, finish included, and new runs are added to it.
+    """
+    shards = shards or workers
+    cache = dataset_cache.active()
+    key = None
+    if cache is not None:
+        key = cache.key(shard_fn, total, filenames, master_seed, shards, keep_parts,
+                        csv_stream.writing_columnar(), dict(kwargs, finish=finish))
+    stateful = _stateful_arguments(kwargs, finish)
+    if key is not None:
+        cached = cache.restore(key)
+        if cached is not None:
+            # Arguments the run updates (a UniqueValues filter) end up as the run left them
+            results, state = cached
+            for name, attributes in state.items():
+                vars(stateful[name]).update(attributes)
+            print(f"📦 Unpacked {', '.join(filenames)} from the dataset cache ({key[:12]})")
+            return results
+
+    results = _generate_sharded(shard_fn, total, filenames, master_seed, workers, shards, keep_parts, kwargs)
+    if finish is not None:
+        finish()
+    if key is not None:
+        state = {name: vars(value) for name, value in stateful.items()}
+        cache.store(key, _written_files(filenames, shards, keep_parts), (results, state))
+    return results
+
+
+def _stateful_arguments(kwargs, finish):
+    """Arguments of a run that describe themselves with a cache_key (and so may hold state), by name"""
+    arguments = dict(kwargs)
+    if finish is not None:
+        arguments.update((f"finish:{index}", value) for index, value in enumerate(finish.args))
+        arguments.update((f"finish:{name}", value) for name, value in finish.keywords.items())
+    return {name: value for name, value in arguments.items() if hasattr(value, "cache_key")}
+
+
+def _written_files(filenames, shards, keep_parts):
+    """The files a run_sharded run leaves behind: outputs or their parts, and their columnar copies"""
+    written = [part_filename(filename, index) for filename in filenames for index in range(shards)] \
+        if keep_parts and shards > 1 else list(filenames)
+    if csv_stream.writing_columnar():
+        from columnar import columnar_filename
+
+        written += [columnar_filename(filename) for filename in written
+                    if os.path.exists(columnar_filename(filename))]
+    return written
+
+
+def _generate_sharded(shard_fn, total, filenames, master_seed, workers, shards, keep_parts, kwargs):
+    """run_sharded without the cache"""
+    counts = split_counts(total, shards)
+    label = os.path.basename(filenames[0])  # Which generator's stream, e.g. "farmer_contacts.csv"
+
+    if shards == 1:
+        return [shard_fn(total, derive_seed(master_seed, label, 0), 0, list(filenames), **kwargs)]
+
+    tasks = []
+    start = 0
+    for index, count in enumerate(counts):
+        parts = [part_filename(filename, index) for filename in filenames]
+        tasks.append((shard_fn, count, derive_seed(master_seed, label, index), start, parts,
+                      csv_stream.writing_columnar(), kwargs))
+        start += count
+
+    profile = profiling.active()
+    if workers > 1 and profile is not None:
+        # Worker processes profile into their own copies, merged back here
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = []
+            for result, shard_profile in pool.map(_run_profiled_shard, tasks):
+                results.append(result)
+                profile.merge(shard_profile)
+    elif workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_shard, tasks))
+    else:
+        results = [_run_shard(task) for task in tasks]
+
+    if not keep_parts:
+        for output_index, filename in enumerate(filenames):
+            parts = [task[4][output_index] for task in tasks]
+            merge_parts(parts, filename)
+            merge_columnar_parts(parts, filename)
+
+    return results
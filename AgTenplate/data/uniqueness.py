@@ -0,0 +1,211 @@
+"""
+Bounded-Memory Uniqueness for Generated Values
+Keeps generated emails (or any column) unique at tens of millions of rows
+without remembering every value: candidates are checked against a Bloom
+filter, and one it has (probably) seen is rewritten with a random numeric
+suffix until the filter has not seen it.
+
+A Bloom filter never misses a value it was given, so the output is
+guaranteed unique. Its false positives only cost an unneeded suffix, at the
+rate the filter was sized for. Memory is fixed up front by the expected
+number of values: 3 MB per million values, for about 0.2% false positives.
+
+    emails = UniqueValues(capacity=10_000_000)
+    rows = emails.unique_rows(rows, "Email")
+    ...
+    print(emails.report())
+
+Files generated in separate runs that must not share a value either (the
+contact files, which all load as Contact) each keep to their own lane of the
+value space: a value belongs to the lane its hash picks, and one outside the
+run's lane is rewritten like a repeat.
+"""
+
+import csv
+import math
+import os
+import random
+from array import array
+from hashlib import blake2b
+from itertools import islice
+
+from csv_stream import DEFAULT_CHUNK_SIZE, CsvRowWriter
+
+# Filter bits per expected value and bits set per value; at capacity about
+# 0.2% of never-seen values are wrongly reported as seen
+BITS_PER_VALUE = 24
+HASH_BITS = 9
+PATTERN_BITS = 12  # log2 of the number of precomputed bit patterns
+
+# Suffixes start with this many digits and get one more after each failed retry
+SUFFIX_DIGITS = 3
+
+# Words sampled to estimate a filter's false-positive rate
+FILL_SAMPLE = 4096
+
+# Lanes of the contact email space: farmer contacts keep to lane 0 and
+# distributor contacts to lane 1, so the two files never share an email
+CONTACT_EMAIL_LANES = 2
+
+
+class BloomFilter:
+    """A fixed-size, blocked Bloom filter of strings
+
+    Each value sets HASH_BITS bits of a single 64-bit word, picked from a
+    table of precomputed bit patterns, so a check is one hash and one word
+    read instead of one memory access per bit. Sized for capacity values;
+    adding more still works but raises the false-positive rate.
+    """
+
+    def __init__(self, capacity, bits_per_value=BITS_PER_VALUE):
+        self.words = array("Q", bytes(8 * max(1, math.ceil(max(1, capacity) * bits_per_value / 64))))
+        patterns = random.Random(0)
+        self.patterns = array("Q", [sum(1 << bit for bit in patterns.sample(range(64), HASH_BITS))
+                                    for _ in range(1 << PATTERN_BITS)])
+        self.count = 0
+
+    @property
+    def nbytes(self):
+        """Memory taken by the filter's words"""
+        return self.words.itemsize * len(self.words)
+
+    def add(self, value):
+        """Add a value and return whether it was (probably) in the filter already"""
+        digest = int.from_bytes(blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+        index = (digest & 0xFFFFFFFFFF) % len(self.words)
+        pattern = self.patterns[digest >> (64 - PATTERN_BITS)]
+        word = self.words[index]
+        if word & pattern == pattern:
+            return True
+        self.words[index] = word | pattern
+        self.count += 1
+        return False
+
+    def false_positive_rate(self):
+        """Estimated chance that a new value is reported as seen, from a sample of words"""
+        sample = random.Random(1)
+        words = [self.words[sample.randrange(len(self.words))] for _ in range(FILL_SAMPLE)]
+        return sum((bin(word).count("1") / 64) ** HASH_BITS for word in words) / FILL_SAMPLE
+
+
+def value_lane(value, lanes):
+    """The lane (0 <= lane < lanes) a value belongs to, by its hash"""
+    digest = blake2b(value.encode("utf-8"), digest_size=8, person=b"lane").digest()
+    return int.from_bytes(digest, "little") % lanes
+
+
+def email_variant(email, number):
+    """email with number appended to its local part: jane.doe@x.com -> jane.doe482@x.com"""
+    local, at, domain = email.partition("@")
+    return f"{local}{number}{at}{domain}"
+
+
+class UniqueValues:
+    """Hands out unique values, rewriting repeats with random numeric suffixes
+
+    variant(value, number) makes the rewritten candidates (email_variant by
+    default). Suffixes are drawn from their own seeded RNG, so a run is
+    reproducible; each retry draws from a ten times larger range, so the
+    expected number of retries stays small however full the filter gets.
+
+    With lanes > 1 only values in lane (by value_lane) are handed out, so runs
+    using different lanes never hand out the same value; others are rewritten
+    too, without counting as collisions.
+    """
+
+    def __init__(self, capacity, variant=email_variant, seed=0, bits_per_value=BITS_PER_VALUE, lane=0, lanes=1):
+        if not 0 <= lane < lanes:
+            raise ValueError(f"lane {lane} of {lanes}")
+        self.filter = BloomFilter(capacity, bits_per_value)
+        self.variant = variant
+        self.rng = random.Random(seed)
+        self.lane = lane
+        self.lanes = lanes
+        self.settings = (capacity, bits_per_value, seed, lane, lanes)
+        self.checked = 0
+        self.collisions = 0  # Values that had to be rewritten
+        self.retries = 0  # Rewritten candidates that collided again
+        self.moved = 0  # Values rewritten because they were in another lane
+
+    @property
+    def cache_key(self):
+        """What the rewritten values depend on, for dataset_cache (only fresh filters are comparable)"""
+        return [*self.settings, self.variant.__name__, self.checked]
+
+    def _in_lane(self, value):
+        return self.lanes == 1 or value_lane(value, self.lanes) == self.lane
+
+    def claim(self, value):
+        """value if it is new (and in lane), otherwise a new variant of it"""
+        self.checked += 1
+        if not self._in_lane(value):
+            self.moved += 1
+        elif not self.filter.add(value):
+            return value
+        else:
+            self.collisions += 1
+        digits = SUFFIX_DIGITS
+        while True:
+            candidate = self.variant(value, self.rng.randrange(10 ** (digits - 1), 10 ** digits))
+            if not self._in_lane(candidate):
+                continue  # Another lane's; not a collision, so the suffix doesn't grow
+            if not self.filter.add(candidate):
+                return candidate
+            self.retries += 1
+            digits += 1
+
+    def unique_rows(self, rows, column):
+        """Yield dict rows with their column value made unique (rows are updated in place)"""
+        claim = self.claim
+        for row in rows:
+            row[column] = claim(row[column])
+            yield row
+
+    @property
+    def collision_rate(self):
+        """Share of checked values that collided with an earlier one"""
+        return self.collisions / self.checked if self.checked else 0.0
+
+    def report(self):
+        """One line summarizing collisions and filter memory"""
+        moved = f", {self.moved:,} moved to lane {self.lane} of {self.lanes}" if self.lanes > 1 else ""
+        return (f"{self.collisions:,} of {self.checked:,} collided ({self.collision_rate:.2%}){moved}, "
+                f"rewritten with suffixes ({self.retries:,} retries); "
+                f"filter {self.filter.nbytes / 1e6:.1f} MB, "
+                f"~{self.filter.false_positive_rate():.3%} false positives")
+
+
+def unique_column_in_files(filenames, column, values, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Make column unique across CSV files (e.g. shard parts), in order, rewriting them in place
+
+    values is the UniqueValues that decides; every row is checked, so this
+    also catches repeats between files generated by different processes. A
+    columnar copy next to a file (--columnar) is rewritten to match. Returns
+    the number of rows checked.
+    """
+    from columnar import columnar_filename, convert_csv
+
+    checked = 0
+    for filename in filenames:
+        if not os.path.exists(filename):
+            continue  # Empty shards write no part file
+        temporary = filename + ".tmp"
+        with open(filename, newline="", encoding="utf-8") as src, \
+                open(temporary, "w", newline="", encoding="utf-8") as out:
+            reader = csv.reader(src)
+            fieldnames = next(reader)
+            position = fieldnames.index(column)
+            writer = CsvRowWriter(out, fieldnames)
+            writer.writeheader()
+            while True:
+                rows = list(islice(reader, chunk_size))
+                if not rows:
+                    break
+                columns = [list(field) for field in zip(*rows)]
+                columns[position] = list(map(values.claim, columns[position]))
+                writer.writecolumns(columns)
+                checked += len(rows)
+        os.replace(temporary, filename)
+        if os.path.exists(columnar_filename(filename)):
+            convert_csv(filename, columnar_filename(filename), chunk_size=chunk_size)
+    return checked
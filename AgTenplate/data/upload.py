@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""
+Async Uploader for Generated Data
+Loads generated CSVs over a handful of pooled keep-alive HTTPS connections
+instead of one CLI process per record or job: the org's credentials are read
+once (sf org display), and records go out 200 at a time through sObject
+Collections calls, or as Bulk API 2.0 jobs from an import_plan.py manifest.
+
+    python3 data/upload.py data/us_crops.csv --target-org "Ag Template"
+    python3 data/upload.py data/import/manifest.json --concurrency 4
+    python3 data/upload.py data/agriculture_farms.csv --bulk --out data/import
+
+At most --concurrency requests (or Bulk jobs) run at once. Limit errors
+(429, 503, REQUEST_LIMIT_EXCEEDED, records that hit UNABLE_TO_LOCK_ROW)
+halve the limit and back off exponentially with jitter; successes raise it
+again one step at a time. Progress is journaled to --out, so an interrupted
+upload run again with the same arguments skips what was already sent (only
+the requests in flight when it stopped are sent again). Records that failed
+in an earlier run still count as failed, so the rerun exits non-zero too.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import random
+import ssl
+import subprocess
+import time
+from itertools import islice
+from urllib.parse import urlsplit
+
+from import_plan import MANIFEST, map_headers, write_plan
+from schema import load_schema
+from validate_csv import guess_object
+
+API_VERSION = "62.0"
+COLLECTION_SIZE = 200  # Records per sObject Collections call, the API's limit
+DEFAULT_CONCURRENCY = 4
+MAX_ATTEMPTS = 8  # Tries per request or record before giving up
+BACKOFF_SECONDS = 0.5  # First backoff; doubled per attempt, up to MAX_BACKOFF_SECONDS
+MAX_BACKOFF_SECONDS = 60.0
+POLL_SECONDS = 2.0  # First Bulk job status poll; the interval grows to MAX_POLL_SECONDS
+MAX_POLL_SECONDS = 15.0
+UPLOAD_BLOCK_BYTES = 1024 * 1024  # Job files are streamed to the socket in blocks of this size
+PROGRESS_FILE = "upload_progress.jsonl"
+
+RETRY_STATUSES = {429, 502, 503, 504}
+RETRY_ERROR_CODES = {"REQUEST_LIMIT_EXCEEDED", "SERVER_UNAVAILABLE", "UNABLE_TO_LOCK_ROW"}
+FINISHED_JOB_STATES = {"JobComplete", "Failed", "Aborted"}
+
+
+class ApiError(Exception):
+    """An HTTP error response from the org"""
+
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+        try:
+            errors = json.loads(body)
+            error = errors[0] if isinstance(errors, list) and errors else {}
+        except ValueError:
+            error = {}
+        self.code = error.get("errorCode", "")
+        super().__init__(f"HTTP {status} {self.code}: {error.get('message', body[:200].decode('utf-8', 'replace'))}")
+
+    @property
+    def retryable(self):
+        return self.status in RETRY_STATUSES or self.code in RETRY_ERROR_CODES
+
+
+class FileBody:
+    """A request body streamed from a file"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.size = os.path.getsize(filename)
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, head, body):
+        self.writer.write(head)
+        if isinstance(body, FileBody):
+            with open(body.filename, "rb") as f:
+                for block in iter(lambda: f.read(UPLOAD_BLOCK_BYTES), b""):
+                    self.writer.write(block)
+                    await self.writer.drain()
+        else:
+            self.writer.write(body)
+        await self.writer.drain()
+        return await self._response()
+
+    async def _response(self):
+        """(status, headers, body, keep alive) of the next response"""
+        reader = self.reader
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by the server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if not size:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass  # Trailer fields
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b"".join(parts)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        elif status in (204, 304):
+            body = b""
+        else:
+            body, keep_alive = await reader.read(), False
+        return status, headers, body, keep_alive
+
+    def close(self):
+        self.writer.close()
+
+
+class Session:
+    """Pooled keep-alive connections to one org, authorized with its access token"""
+
+    def __init__(self, instance_url, access_token, pool_size=DEFAULT_CONCURRENCY, api_version=API_VERSION):
+        url = urlsplit(instance_url)
+        self.host = url.hostname
+        self.secure = url.scheme == "https"
+        self.port = url.port or (443 if self.secure else 80)
+        self.access_token = access_token
+        self.base = f"/services/data/v{api_version}"
+        self._idle = []
+        self._slots = asyncio.Semaphore(pool_size)
+        self.requests = 0
+        self.connections = 0
+
+    async def request(self, method, path, body=b"", content_type="application/json"):
+        """The body of a 2xx response to method path (relative to /services/data/vXX.X); ApiError otherwise"""
+        if not path.startswith("/services/"):
+            path = self.base + path
+        size = body.size if isinstance(body, FileBody) else len(body)
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nAuthorization: Bearer {self.access_token}\r\n"
+                f"Accept: application/json\r\nContent-Type: {content_type}\r\nContent-Length: {size}\r\n\r\n")
+        async with self._slots:
+            for attempt in range(2):
+                pooled = attempt == 0 and bool(self._idle)
+                connection = self._idle.pop() if pooled else await self._connect()
+                try:
+                    status, _, response, keep_alive = await connection.request(head.encode("latin-1"), body)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    connection.close()
+                    if not pooled:
+                        raise
+                    continue  # An idle connection the server had closed; try a fresh one
+                self.requests += 1
+                if keep_alive:
+                    self._idle.append(connection)
+                else:
+                    connection.close()
+                if status >= 300:
+                    raise ApiError(status, response)
+                return response
+
+    async def json(self, method, path, value=None):
+        response = await self.request(method, path, json.dumps(value).encode("utf-8") if value is not None else b"")
+        return json.loads(response) if response else None
+
+    async def _connect(self):
+        context = ssl.create_default_context() if self.secure else None
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+        self.connections += 1
+        return _Connection(reader, writer)
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+
+class AdaptiveLimit:
+    """A concurrency limit that halves on limit errors and grows back by one per limit's worth of successes
+
+    While a backoff is pending, no new request starts.
+    """
+
+    def __init__(self, maximum):
+        self.maximum = maximum
+        self.limit = maximum
+        self.active = 0
+        self.backoffs = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def __aexit__(self, *exc_info):
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    def success(self):
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.maximum:
+            self.limit += 1
+            self._successes = 0
+
+    def throttle(self, attempt):
+        """Halve the limit and push back every new request; returns this attempt's delay"""
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+        self.backoffs += 1
+        delay = min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** attempt) * random.uniform(0.5, 1.0)
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        return delay
+
+
+async def with_retries(limit, call):
+    """await call() within the limit, backing off and retrying while it fails with a retryable error"""
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            async with limit:
+                result = await call()
+                limit.success()
+                return result
+        except (ApiError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError) as error:
+            if attempt == MAX_ATTEMPTS - 1 or (isinstance(error, ApiError) and not error.retryable):
+                raise
+            await asyncio.sleep(limit.throttle(attempt))
+
+
+class Progress:
+    """An append-only journal of finished work, so a rerun can skip it
+
+    The first line identifies the input; a journal for a different input
+    (or a changed file) is started over.
+    """
+
+    def __init__(self, filename, identity):
+        self.filename = filename
+        self.entries = []
+        if os.path.exists(filename):
+            with open(filename, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+            if lines and lines[0] == identity:
+                self.entries = lines[1:]
+        self._file = open(filename, "a" if self.entries else "w", encoding="utf-8")
+        if not self.entries:
+            self._write(identity)
+
+    def record(self, **entry):
+        self.entries.append(entry)
+        self._write(entry)
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def file_identity(filename, **settings):
+    stat = os.stat(filename)
+    return dict(source=os.path.abspath(filename), size=stat.st_size, mtime_ns=stat.st_mtime_ns, **settings)
+
+
+class UploadSummary:
+    """Counts of one upload"""
+
+    def __init__(self, source, object_name=None):
+        self.source = source
+        self.object_name = object_name
+        self.records = 0
+        self.saved = 0
+        self.failed = 0
+        self.skipped = 0  # Sent by an earlier run (saved or failed there), not sent again
+        self.retried = 0  # Records sent again after UNABLE_TO_LOCK_ROW
+        self.jobs = 0
+        self.seconds = 0.0
+
+
+async def upload_records(session, filename, out_dir, object_name=None, concurrency=DEFAULT_CONCURRENCY,
+                         batch_size=COLLECTION_SIZE):
+    """Insert a CSV's rows through sObject Collections calls; returns an UploadSummary
+
+    Results go to <out_dir>/<file>.success.csv (Row, Id) and
+    <file>.failed.csv (Row, Error and the row's values).
+    """
+    start = time.perf_counter()
+    object_name = object_name or guess_object(filename)
+    schema_object = load_schema()[object_name]
+    stem = os.path.join(out_dir, os.path.splitext(os.path.basename(filename))[0])
+    progress = Progress(f"{stem}.{PROGRESS_FILE}", file_identity(filename, object=object_name,
+                                                                 batch_size=batch_size))
+    done = {entry["start"]: entry for entry in progress.entries}
+    summary = UploadSummary(filename, object_name)
+    limit = AdaptiveLimit(concurrency)
+
+    with open(filename, newline="", encoding="utf-8-sig") as src, \
+            open(f"{stem}.success.csv", "a", newline="", encoding="utf-8") as success_out, \
+            open(f"{stem}.failed.csv", "a", newline="", encoding="utf-8") as failed_out:
+        reader = csv.reader(src)
+        fieldnames = next(reader, [])
+        positions, api_names, _ = map_headers(schema_object, fieldnames)
+        successes, failures = csv.writer(success_out), csv.writer(failed_out)
+        if not success_out.tell():
+            successes.writerow(["Row", "Id"])
+        if not failed_out.tell():
+            failures.writerow(["Row", "Error"] + fieldnames)
+
+        async def send(first_row, rows):
+            records = [dict({"attributes": {"type": object_name}},
+                            **{name: row[position] for position, name in zip(positions, api_names) if row[position]})
+                       for row in rows]
+            todo = list(range(len(rows)))
+            ok, failed = [], []
+            for attempt in range(MAX_ATTEMPTS):
+                results = await with_retries(limit, lambda: session.json(
+                    "POST", "/composite/sobjects", {"allOrNone": False, "records": [records[k] for k in todo]}))
+                locked = []
+                for k, result in zip(todo, results):
+                    errors = result.get("errors") or []
+                    if result.get("success"):
+                        ok.append([first_row + k, result["id"]])
+                    elif attempt < MAX_ATTEMPTS - 1 and any(e.get("statusCode") == "UNABLE_TO_LOCK_ROW"
+                                                             for e in errors):
+                        locked.append(k)
+                    else:
+                        failed.append([first_row + k, "; ".join(f"{e.get('statusCode')}: {e.get('message')}"
+                                                                for e in errors)] + rows[k])
+                if not locked:
+                    break
+                summary.retried += len(locked)
+                todo = locked
+                await asyncio.sleep(limit.throttle(attempt))
+            successes.writerows(ok)
+            failures.writerows(failed)
+            success_out.flush()
+            failed_out.flush()
+            progress.record(start=first_row, saved=len(ok), failed=len(failed))
+            summary.saved += len(ok)
+            summary.failed += len(failed)
+
+        tasks, errors = set(), []
+        room = asyncio.Semaphore(2 * concurrency)  # Chunks read ahead of their requests
+
+        def finished(task):
+            tasks.discard(task)
+            room.release()
+            if not task.cancelled() and task.exception():
+                errors.append(task.exception())
+
+        try:
+            first_row = 1
+            while not errors:
+                rows = list(islice(reader, batch_size))
+                if not rows:
+                    break
+                summary.records += len(rows)
+                if first_row in done:
+                    # Sent by an earlier run; its failures still count
+                    summary.skipped += len(rows)
+                    summary.saved += done[first_row]["saved"]
+                    summary.failed += done[first_row]["failed"]
+                else:
+                    await room.acquire()
+                    task = asyncio.create_task(send(first_row, rows))
+                    tasks.add(task)
+                    task.add_done_callback(finished)
+                first_row += len(rows)
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if errors:
+                raise errors[0]
+        finally:
+            for task in list(tasks):
+                task.cancel()
+            progress.close()
+    summary.seconds = time.perf_counter() - start
+    return summary
+
+
+async def upload_manifest(session, manifest_file, concurrency=DEFAULT_CONCURRENCY, poll_seconds=POLL_SECONDS):
+    """Run the Bulk API 2.0 jobs of an import_plan.py manifest, phase by phase; returns an UploadSummary
+
+    Each job's failed records go to <job file>.failed.csv next to it. A rerun
+    skips finished jobs and goes back to polling jobs that were already closed.
+    """
+    start = time.perf_counter()
+    plan_dir = os.path.dirname(manifest_file)
+    with open(manifest_file, encoding="utf-8") as f:
+        manifest = json.load(f)
+    # Keyed by content: --bulk plans the same files into the same manifest again on a rerun
+    with open(manifest_file, "rb") as f:
+        identity = {"manifest": os.path.abspath(manifest_file), "sha256": hashlib.sha256(f.read()).hexdigest()}
+    progress = Progress(os.path.join(plan_dir, PROGRESS_FILE), identity)
+    jobs_by_file = {}
+    for entry in progress.entries:
+        jobs_by_file.setdefault(entry["file"], {}).update(entry)
+    summary = UploadSummary(manifest_file)
+    limit = AdaptiveLimit(concurrency)
+    slots = asyncio.Semaphore(concurrency)  # Jobs in progress at once
+
+    async def run_job(job):
+        state = jobs_by_file.get(job["file"], {})
+        summary.records += job["records"]
+        if state.get("state") in FINISHED_JOB_STATES:
+            summary.skipped += job["records"]
+            summary.saved += state["saved"]
+            summary.failed += job["records"] - state["saved"]
+            return state["state"] == "JobComplete"
+        async with slots:
+            job_id = state.get("job")
+            if job_id and state.get("state") != "UploadComplete":  # Created but maybe not uploaded: start over
+                try:
+                    await with_retries(limit, lambda: session.json("PATCH", f"/jobs/ingest/{job_id}",
+                                                                   {"state": "Aborted"}))
+                except ApiError as error:
+                    print(f"   ⚠️  Could not abort job {job_id} of {job['file']}: {error}")
+                job_id = None
+            if not job_id:
+                body = {"object": job["object"], "operation": manifest["operation"], "contentType": "CSV",
+                        "lineEnding": manifest["line_ending"], "columnDelimiter": manifest["column_delimiter"]}
+                if manifest.get("external_id_field"):
+                    body["externalIdFieldName"] = manifest["external_id_field"]
+                info = await with_retries(limit, lambda: session.json("POST", "/jobs/ingest", body))
+                job_id = info["id"]
+                progress.record(file=job["file"], job=job_id, state="Open")
+                await with_retries(limit, lambda: session.request(
+                    "PUT", f"/jobs/ingest/{job_id}/batches", FileBody(os.path.join(plan_dir, job["file"])), "text/csv"))
+                await with_retries(limit, lambda: session.json("PATCH", f"/jobs/ingest/{job_id}",
+                                                               {"state": "UploadComplete"}))
+                progress.record(file=job["file"], job=job_id, state="UploadComplete")
+            summary.jobs += 1
+            delay = poll_seconds
+            while True:
+                info = await with_retries(limit, lambda: session.json("GET", f"/jobs/ingest/{job_id}"))
+                if info["state"] in FINISHED_JOB_STATES:
+                    break
+                await asyncio.sleep(delay)
+                delay = min(MAX_POLL_SECONDS, delay * 1.5)
+            failed = info.get("numberRecordsFailed", 0)
+            if failed:
+                results = await with_retries(limit, lambda: session.request(
+                    "GET", f"/jobs/ingest/{job_id}/failedResults"))
+                with open(os.path.join(plan_dir, os.path.splitext(job["file"])[0] + ".failed.csv"), "wb") as f:
+                    f.write(results)
+            saved = info.get("numberRecordsProcessed", 0) - failed
+            summary.saved += saved
+            summary.failed += job["records"] - saved
+            progress.record(file=job["file"], job=job_id, state=info["state"], saved=saved,
+                            error=info.get("errorMessage"))
+            unsaved = job["records"] - saved
+            # A completed job can still have failed every record
+            print(f"   {'✅' if info['state'] == 'JobComplete' and not unsaved else '❌'} {job['file']}: "
+                  f"{info['state']}, {saved:,} saved, {unsaved:,} not")
+            return info["state"] == "JobComplete"
+
+    try:
+        for phase in sorted({job["phase"] for job in manifest["jobs"]}):
+            outcomes = await asyncio.gather(*(run_job(job) for job in manifest["jobs"] if job["phase"] == phase))
+            if not all(outcomes):
+                raise RuntimeError(f"jobs of phase {phase + 1} failed; later phases were not started")
+    finally:
+        progress.close()
+        summary.seconds = time.perf_counter() - start
+    return summary
+
+
+def org_credentials(target_org=None):
+    """(instance URL, access token) of an sf CLI org, from a single `sf org display`"""
+    command = ["sf", "org", "display", "--json"] + (["--target-org", target_org] if target_org else [])
+    result = json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout)["result"]
+    return result["instanceUrl"], result["accessToken"]
+
+
+async def _main(args):
+    instance_url, access_token = args.instance_url, args.access_token
+    if not (instance_url and access_token):
+        instance_url, access_token = org_credentials(args.target_org)
+    os.makedirs(args.out, exist_ok=True)
+    session = Session(instance_url, access_token, args.concurrency, args.api_version)
+    summaries = []
+    try:
+        if args.bulk:
+            write_plan(args.files, args.out, args.object)
+            args.files = [os.path.join(args.out, MANIFEST)]
+        for filename in args.files:
+            print(f"🚀 {filename}")
+            if filename.endswith(".json"):
+                summary = await upload_manifest(session, filename, args.concurrency, args.poll_seconds)
+            else:
+                summary = await upload_records(session, filename, args.out, args.object, args.concurrency)
+            summaries.append(summary)
+            rate = (summary.records - summary.skipped) / summary.seconds if summary.seconds else 0
+            print(f"   📦 {summary.saved:,} saved, {summary.failed:,} failed"
+                  + (f" ({summary.skipped:,} of them in an earlier run)" if summary.skipped else "")
+                  + f" in {summary.seconds:.1f}s ({rate:,.0f} records/s)")
+            if summary.retried:
+                print(f"   🔁 {summary.retried:,} records retried after row lock errors")
+    finally:
+        session.close()
+    print(f"🔌 {session.requests:,} requests over {session.connections} connections")
+    return summaries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload generated CSVs over pooled connections")
+    parser.add_argument("files", nargs="+", help="CSV files to insert, or import_plan.py manifest.json files")
+    parser.add_argument("--object", default=None, help="object of the CSV rows (default: from the file name)")
+    parser.add_argument("--bulk", action="store_true",
+                        help="plan the CSVs into Bulk API 2.0 jobs (import_plan.py) and run those")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="requests (or Bulk jobs) in flight at once")
+    parser.add_argument("--out", default="data/upload", help="directory for results and progress journals")
+    parser.add_argument("--target-org", default=None, help="sf CLI org alias or username to read credentials from")
+    parser.add_argument("--instance-url", default=os.environ.get("SF_INSTANCE_URL"),
+                        help="org URL, with --access-token instead of the sf CLI (default: $SF_INSTANCE_URL)")
+    parser.add_argument("--access-token", default=os.environ.get("SF_ACCESS_TOKEN"),
+                        help="session id for --instance-url (default: $SF_ACCESS_TOKEN)")
+    parser.add_argument("--api-version", default=API_VERSION, help="REST API version")
+    parser.add_argument("--poll-seconds", type=float, default=POLL_SECONDS, help="first Bulk job status poll interval")
+    args = parser.parse_args()
+
+    summaries = asyncio.run(_main(args))
+    raise SystemExit(1 if any(summary.failed for summary in summaries) else 0)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Validate Generated CSVs Against the Org Schema
+Checks every row of a generated CSV against the field types, lengths,
+picklist values and required lookups of its object (schema.py) before it is
+uploaded, instead of finding out from a failed bulk job.
+
+The file is read once, in blocks of whole records that worker processes check
+in parallel; results are written in file order as they come back, so memory
+stays bounded by a few blocks however large the file is. Rows that pass go to
+a clean CSV, ready to import; problems go to a compact report (at most
+--max-reported rows per field, all of them counted):
+
+    python3 data/validate_csv.py data/agriculture_farms.csv --workers 8
+    python3 data/validate_csv.py data/farmer_contacts.csv --object Contact
+"""
+
+import argparse
+import csv
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from schema import OBJECTS_DIR, load_schema
+
+# Bytes of CSV read (and checked by one worker) at a time
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Problem rows written to the report per field; the rest are only counted
+MAX_REPORTED = 100
+
+# Object of each generated CSV, by file name
+OBJECTS_BY_FILE = {
+    "agriculture_farms.csv": "Account",
+    "agriculture_distributors.csv": "Account",
+    "nearby_farms.csv": "Account",
+    "farmer_contacts.csv": "Contact",
+    "distributor_contacts.csv": "Contact",
+    "nearby_farmer_contacts.csv": "Contact",
+    "us_crops.csv": "Crop__c",
+}
+
+ROW_FIELD = "(row)"  # Report field name for problems with the row's shape
+
+
+def guess_object(filename):
+    """The object a generated CSV holds, from its name (shard parts and clean files included)"""
+    name = os.path.basename(filename)
+    root, ext = os.path.splitext(name)
+    root = root.split(".part-")[0]
+    if root.endswith(".clean"):
+        root = root[:-len(".clean")]
+    name = root + ext
+    if name in OBJECTS_BY_FILE:
+        return OBJECTS_BY_FILE[name]
+    return "Contact" if "contact" in name else "Account"
+
+
+def default_outputs(filename):
+    """(clean file, report file) next to filename: farms.clean.csv and farms.errors.csv"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.clean{ext or '.csv'}", f"{root}.errors.csv"
+
+
+def iter_blocks(f, block_size=DEFAULT_BLOCK_SIZE):
+    """Yield blocks of bytes from a binary file, each ending at the end of a CSV record
+
+    A newline inside a quoted field never ends a block, since the quotes
+    before a record boundary always pair up.
+    """
+    pending = b""
+    while True:
+        data = f.read(block_size)
+        if not data:
+            if pending:
+                yield pending
+            return
+        block = pending + data
+        end = _last_record_end(block)
+        pending = block[end:]
+        if end:
+            yield block[:end]
+
+
+def _last_record_end(block):
+    """Offset just past the block's last newline outside quotes, or 0 if it has none"""
+    quotes = block.count(b'"')
+    end = block.rfind(b"\n")
+    while end >= 0:
+        if (quotes - block.count(b'"', end + 1)) % 2 == 0:
+            return end + 1
+        end = block.rfind(b"\n", 0, end)
+    return 0
+
+
+def header_checks(schema_object, fieldnames):
+    """(checks, unmapped): (column position, field) for columns naming a field, other headers
+
+    Required fields with no column at all fail every row, so they are checked
+    as if their column were always blank (position None).
+    """
+    checks, unmapped, seen = [], [], set()
+    for position, name in enumerate(fieldnames):
+        field = schema_object.field_for(name)
+        if field is None:
+            unmapped.append(name)
+        else:
+            checks.append((position, field))
+            seen.add(field.api_name)
+    checks.extend((None, field) for field in schema_object.fields.values()
+                  if field.required and field.api_name not in seen)
+    return checks, unmapped
+
+
+class _BlockChecker:
+    """Checks blocks of CSV rows against compiled field checks (one per worker process)"""
+
+    def __init__(self, object_name, fieldnames, objects_dir=OBJECTS_DIR):
+        self.checks, _ = header_checks(load_schema(objects_dir)[object_name], fieldnames)
+        self.width = len(fieldnames)
+
+    def __call__(self, block):
+        """(rows, clean CSV bytes, [(row offset, field, problem), ...]) for one block
+
+        Row offsets count from 1 at the block's first row. Each field checks
+        its whole column of the block at once. Clean rows are copied as they
+        were written, not re-serialized.
+        """
+        lines = [line + "\n" for line in block.decode("utf-8").split("\n")]
+        if lines[-1] == "\n":
+            lines.pop()  # What followed the block's last line break
+        else:
+            lines[-1] = lines[-1][:-1]  # A last record without a line break
+        reader = csv.reader(lines)
+        rows, ends = [], []  # Each row, and the line after its last one
+        for row in reader:
+            rows.append(row)
+            ends.append(reader.line_num)
+        problems = []
+        width = self.width
+        if any(len(row) != width for row in rows):
+            problems = [(offset, ROW_FIELD, f"has {len(row)} values, the header has {width}")
+                        for offset, row in enumerate(rows, 1) if len(row) != width]
+            shaped = [row for row in rows if len(row) == width]
+            offsets = [offset for offset, row in enumerate(rows, 1) if len(row) == width]
+        else:
+            shaped, offsets = rows, None
+        columns = list(zip(*shaped)) if shaped else [()] * width
+        for position, field in self.checks:
+            values = columns[position] if position is not None else [""] * len(shaped)
+            for index, problem in field.check_column(values):
+                problems.append((offsets[index] if offsets else index + 1, field.api_name, problem))
+        if not problems:
+            return len(rows), block, problems
+        bad = {offset for offset, _, _ in problems}
+        starts = [0] + ends[:-1]
+        clean = "".join("".join(lines[start:end]) for offset, (start, end) in enumerate(zip(starts, ends), 1)
+                        if offset not in bad)
+        problems.sort(key=lambda problem: problem[0])
+        return len(rows), clean.encode("utf-8"), problems
+
+
+_checker = None  # The worker process's _BlockChecker
+
+
+def _init_worker(object_name, fieldnames, objects_dir):
+    global _checker
+    _checker = _BlockChecker(object_name, fieldnames, objects_dir)
+
+
+def _check_block(block):
+    return _checker(block)
+
+
+class ValidationSummary:
+    """Counts of one file's validation"""
+
+    def __init__(self, filename, object_name, unmapped):
+        self.filename = filename
+        self.object_name = object_name
+        self.unmapped = unmapped  # Headers that name no field of the object, so went unchecked
+        self.rows = 0
+        self.bad_rows = 0
+        self.problems = Counter()  # Field -> number of problems
+        self.seconds = 0.0
+
+    @property
+    def clean_rows(self):
+        return self.rows - self.bad_rows
+
+
+def validate_file(filename, object_name=None, clean_file=None, report_file=None, workers=1,
+                  block_size=DEFAULT_BLOCK_SIZE, max_reported=MAX_REPORTED, objects_dir=OBJECTS_DIR):
+    """Check every row of a CSV in one pass, writing clean rows and a problem report
+
+    object_name defaults to guess_object(filename) and the outputs to
+    default_outputs(filename); clean_file=False skips writing clean rows.
+    Returns a ValidationSummary.
+    """
+    start = time.perf_counter()
+    object_name = object_name or guess_object(filename)
+    default_clean, default_report = default_outputs(filename)
+    clean_file = default_clean if clean_file is None else clean_file
+    report_file = report_file or default_report
+
+    with open(filename, "rb") as src:
+        header = src.readline()
+        fieldnames = next(csv.reader([header.decode("utf-8-sig")]))
+        schema_object = load_schema(objects_dir)[object_name]
+        _, unmapped = header_checks(schema_object, fieldnames)
+        summary = ValidationSummary(filename, object_name, unmapped)
+        reported = Counter()
+
+        clean = open(clean_file, "wb") if clean_file else None
+        try:
+            with open(report_file, "w", newline="", encoding="utf-8") as report_out:
+                report = csv.writer(report_out)
+                report.writerow(["Row", "Field", "Problem"])
+                if clean is not None:
+                    clean.write(header)
+
+                def record(result):
+                    rows, clean_bytes, problems = result
+                    bad_rows = set()
+                    for offset, name, problem in problems:
+                        bad_rows.add(offset)
+                        summary.problems[name] += 1
+                        if reported[name] < max_reported:
+                            reported[name] += 1
+                            report.writerow([summary.rows + offset, name, problem])
+                    summary.rows += rows
+                    summary.bad_rows += len(bad_rows)
+                    if clean is not None:
+                        clean.write(clean_bytes)
+
+                blocks = iter_blocks(src, block_size)
+                if workers > 1:
+                    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                             initargs=(object_name, fieldnames, objects_dir)) as pool:
+                        # Keep a few blocks per worker in flight and take results in file order
+                        pending = deque()
+                        for block in blocks:
+                            pending.append(pool.submit(_check_block, block))
+                            if len(pending) >= 2 * workers:
+                                record(pending.popleft().result())
+                        while pending:
+                            record(pending.popleft().result())
+                else:
+                    checker = _BlockChecker(object_name, fieldnames, objects_dir)
+                    for block in blocks:
+                        record(checker(block))
+        finally:
+            if clean is not None:
+                clean.close()
+
+    summary.seconds = time.perf_counter() - start
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate generated CSVs against the force-app object schema")
+    parser.add_argument("files", nargs="+", help="CSV files to validate")
+    parser.add_argument("--object", default=None,
+                        help="object the rows are for, e.g. Account or Contact (default: from the file name)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes checking blocks (default: all cores)")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE,
+                        help="bytes of CSV checked per block")
+    parser.add_argument("--max-reported", type=int, default=MAX_REPORTED,
+                        help="problem rows written to the report per field")
+    parser.add_argument("--no-clean", action="store_true", help="don't write the clean-rows file")
+    args = parser.parse_args()
+
+    failed = False
+    for filename in args.files:
+        clean_file, report_file = default_outputs(filename)
+        summary = validate_file(filename, args.object, clean_file=False if args.no_clean else clean_file,
+                                report_file=report_file, workers=args.workers, block_size=args.block_size,
+                                max_reported=args.max_reported)
+        rate = summary.rows / summary.seconds if summary.seconds else 0
+        print(f"🔎 {filename} ({summary.object_name}): {summary.rows:,} rows in {summary.seconds:.1f}s "
+              f"({rate:,.0f} rows/s)")
+        if summary.unmapped:
+            print(f"   ⚪ Not checked (no {summary.object_name} field): {', '.join(summary.unmapped)}")
+        if summary.bad_rows:
+            failed = True
+            print(f"   ❌ {summary.bad_rows:,} rows with problems, report in {report_file}")
+            for name, count in summary.problems.most_common():
+                print(f"      {name}: {count:,}")
+        else:
+            print("   ✅ Every row fits the schema")
+        if not args.no_clean:
+            print(f"   📁 {summary.clean_rows:,} clean rows in {clean_file}")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,86 @@
+#!/bin/bash
+
+# Check Delta Files Load End to End
+# Generates farms, loads them into a local mock org (data/mock_org.py), makes
+# an insert/update/delete delta with data/delta.py, plans each delta file with
+# data/import_plan.py and uploads it with data/upload.py. The check passes when
+# the org then holds exactly the rows of the changed farm file.
+
+set -o pipefail  # A failed upload fails the step even though its output is filtered
+
+REPO="$(cd "$(dirname "$0")/.." && pwd)"
+PORT="${1:-8799}"
+URL="http://127.0.0.1:$PORT"
+WORK="$(mktemp -d)"
+
+echo "=========================================="
+echo "Delta round trip against a mock org"
+echo "=========================================="
+
+python3 "$REPO/data/mock_org.py" --port "$PORT" > "$WORK/mock_org.log" 2>&1 &
+MOCK_PID=$!
+trap 'kill $MOCK_PID 2> /dev/null; rm -rf "$WORK"' EXIT
+cd "$WORK" && mkdir -p data
+
+# Exports the org's farms as Id,Name,Phone CSV (the sf data query --result-format csv shape)
+export_farms() {
+    python3 - "$URL" "$1" << 'EOF'
+import csv, json, sys, time, urllib.parse, urllib.request
+url, out = sys.argv[1], sys.argv[2]
+path = "/services/data/v62.0/query?q=" + urllib.parse.quote("SELECT Id, Name, Phone FROM Account")
+for attempt in range(50):  # The mock org may still be starting
+    try:
+        page = json.load(urllib.request.urlopen(url + path))
+        break
+    except OSError:
+        time.sleep(0.1)
+with open(out, "w", newline="") as f:
+    writer = csv.writer(f)
+    writer.writerow(["Id", "Name", "Phone"])
+    while True:
+        writer.writerows([record["Id"], record["Name"], record.get("Phone", "")] for record in page["records"])
+        if not page.get("nextRecordsUrl"):
+            break
+        page = json.load(urllib.request.urlopen(url + page["nextRecordsUrl"]))
+EOF
+}
+
+# Plans one delta file for an operation and uploads it
+load() {
+    python3 "$REPO/data/import_plan.py" "$1" --object Account --operation "$2" --out "data/plan-$2" > /dev/null &&
+        python3 "$REPO/data/upload.py" "data/plan-$2/manifest.json" --out "data/plan-$2" \
+            --instance-url "$URL" --access-token mock | grep "📦"
+}
+
+export_farms data/empty.csv  # Waits for the org to be up
+python3 "$REPO/data/generate_farm_data.py" --records 500 --seed 1 --no-cache > /dev/null || exit 1
+python3 "$REPO/data/delta.py" data/agriculture_farms.csv > /dev/null || exit 1
+echo "🌾 Loading 500 farms"
+load data/agriculture_farms.csv insert || exit 1
+
+export_farms data/accounts.csv
+python3 "$REPO/data/delta.py" data/agriculture_farms.csv --add 40 --update 60 --delete 25 --seed 2 \
+    --ids data/accounts.csv --out data/delta | grep "➕" || exit 1
+for OPERATION in insert update delete; do
+    echo "🔁 $OPERATION"
+    load "data/delta/agriculture_farms.delta-$OPERATION.csv" "$OPERATION" || exit 1
+done
+
+# The org must now match the changed file: same names, same phones
+export_farms data/after.csv
+python3 - << 'EOF'
+import csv
+expected = {row["Account Name"]: row["Phone"] for row in csv.DictReader(open("data/agriculture_farms.csv"))}
+actual = {row["Name"]: row["Phone"] for row in csv.DictReader(open("data/after.csv"))}
+missing, extra = expected.keys() - actual.keys(), actual.keys() - expected.keys()
+stale = [name for name in expected.keys() & actual.keys() if expected[name] != actual[name]]
+print(f"📊 {len(actual)} farms in the org, {len(expected)} in the file: "
+      f"{len(missing)} missing, {len(extra)} extra, {len(stale)} with an old phone")
+raise SystemExit(1 if missing or extra or stale else 0)
+EOF
+if [ $? -eq 0 ]; then
+    echo "✅ The org matches the changed farm file"
+else
+    echo "❌ The org does not match the changed farm file"
+    exit 1
+fi
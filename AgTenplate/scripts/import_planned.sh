@@ -0,0 +1,100 @@
+#!/bin/bash
+
+# Import a Planned Bulk Load
+# Uploads the job files of a manifest written by data/import_plan.py, phase by
+# phase; the jobs of one phase run in parallel
+#
+#   python3 data/import_plan.py data/agriculture_farms.csv data/farmer_contacts.csv --out data/import
+#   ./scripts/import_planned.sh data/import/manifest.json [target-org]
+#
+# PARALLEL_JOBS sets how many jobs run at once (default 4)
+
+MANIFEST="${1:-data/import/manifest.json}"
+TARGET_ORG="$2"
+PARALLEL_JOBS="${PARALLEL_JOBS:-4}"
+
+echo "🚀 Starting planned Bulk API import from $MANIFEST..."
+
+# Check if Salesforce CLI is installed
+if ! command -v sf &> /dev/null; then
+    echo "❌ Salesforce CLI is not installed. Please install it first."
+    echo "   Visit: https://developer.salesforce.com/tools/sfdxcli"
+    exit 1
+fi
+
+# Check if we're authenticated to a Salesforce org
+if ! sf org display ${TARGET_ORG:+--target-org "$TARGET_ORG"} &> /dev/null; then
+    echo "❌ Not authenticated to a Salesforce org."
+    echo "   Please run: sf org login web"
+    exit 1
+fi
+
+if [ ! -f "$MANIFEST" ]; then
+    echo "❌ Manifest not found: $MANIFEST"
+    echo "   Please run: python3 data/import_plan.py <csv files> --out $(dirname "$MANIFEST")"
+    exit 1
+fi
+
+echo "✅ Salesforce CLI found and authenticated"
+
+PLAN_DIR="$(dirname "$MANIFEST")"
+OPERATION=$(python3 -c 'import json, sys; print(json.load(open(sys.argv[1]))["operation"])' "$MANIFEST")
+EXTERNAL_ID=$(python3 -c 'import json, sys; print(json.load(open(sys.argv[1])).get("external_id_field") or "")' "$MANIFEST")
+case "$OPERATION" in
+    insert) COMMAND="import" ;;
+    update) COMMAND="update" ;;
+    delete) COMMAND="delete" ;;
+    upsert) COMMAND="upsert" ;;
+    *)
+        echo "❌ This script does not run $OPERATION jobs"
+        exit 1
+        ;;
+esac
+
+# One "phase<TAB>object<TAB>file<TAB>records" line per job, in phase order
+JOBS=$(python3 -c '
+import json, sys
+manifest = json.load(open(sys.argv[1]))
+for job in manifest["jobs"]:
+    print(job["phase"], job["object"], job["file"], job["records"], sep="\t")
+' "$MANIFEST")
+
+LOG_DIR="$PLAN_DIR/logs"
+FAILED_FILE="$LOG_DIR/failed.txt"
+mkdir -p "$LOG_DIR"
+: > "$FAILED_FILE"
+
+run_job() {
+    local object="$1" file="$2" records="$3"
+    local log="$LOG_DIR/$(basename "$file" .csv).log"
+    echo "📦 $object: $file ($records records)"
+    if sf data $COMMAND bulk --file "$PLAN_DIR/$file" --sobject "$object" --line-ending CRLF --wait 30 \
+            ${EXTERNAL_ID:+--external-id "$EXTERNAL_ID"} ${TARGET_ORG:+--target-org "$TARGET_ORG"} > "$log" 2>&1; then
+        echo "✅ $file loaded"
+    else
+        echo "❌ $file failed, see $log"
+        echo "$file" >> "$FAILED_FILE"
+    fi
+}
+
+for PHASE in $(echo "$JOBS" | cut -f1 | sort -nu); do
+    echo ""
+    echo "🔢 Phase $((PHASE + 1))"
+    while IFS=$'\t' read -r JOB_PHASE OBJECT FILE RECORDS; do
+        [ "$JOB_PHASE" = "$PHASE" ] || continue
+        # Keep at most PARALLEL_JOBS uploads running
+        while [ "$(jobs -rp | wc -l)" -ge "$PARALLEL_JOBS" ]; do
+            wait -n
+        done
+        run_job "$OBJECT" "$FILE" "$RECORDS" &
+    done <<< "$JOBS"
+    # The next phase may look up records of this one, so wait for all of it
+    wait
+    if [ -s "$FAILED_FILE" ]; then
+        echo "❌ $(wc -l < "$FAILED_FILE") jobs failed (listed in $FAILED_FILE); later phases were not started"
+        exit 1
+    fi
+done
+
+echo ""
+echo "🎉 All planned jobs loaded!"